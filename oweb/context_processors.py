@@ -0,0 +1,57 @@
+"""Contains the context processors of this app
+
+The views of an account pass :py:class:`Navigation` to their templates
+themselves. Add ``'oweb.context_processors.navigation'`` to the setting
+``TEMPLATE_CONTEXT_PROCESSORS``, if other templates need the navigation, too.
+"""
+# app imports
+from oweb.libs.navigation import get_account_id, get_navigation
+
+
+class Navigation(object):
+    """Provides the navigation of the account of the current page
+
+    :param req: The current request
+    :type req: HttpRequest object
+
+    The account is determined by the arguments of the URL (``account_id``,
+    ``planet_id`` or ``moon_id``). Nothing is fetched, until the template
+    accesses :py:attr:`planets`. Only the owner of the account gets its
+    planets.
+    """
+
+    def __init__(self, req):
+        self._req = req
+        self._planets = None
+
+    def _get_account_id(self):
+        """Returns the ID of the account of the current page or ``None``"""
+        match = getattr(self._req, 'resolver_match', None)
+        if match is None:
+            return None
+        kwargs = match.kwargs
+        if 'account_id' in kwargs:
+            return int(kwargs['account_id'])
+        if 'planet_id' in kwargs:
+            return get_account_id(int(kwargs['planet_id']))
+        if 'moon_id' in kwargs:
+            return get_account_id(int(kwargs['moon_id']), moon=True)
+        return None
+
+    @property
+    def planets(self):
+        """The planets of the account as NavigationPlanet objects"""
+        if self._planets is None:
+            self._planets = []
+            if self._req.user.is_authenticated():
+                account_id = self._get_account_id()
+                if account_id is not None:
+                    owner_id, planets = get_navigation(account_id)
+                    if owner_id == self._req.user.id:
+                        self._planets = planets
+        return self._planets
+
+
+def navigation(req):
+    """Provides ``navigation``, the :py:class:`Navigation` of the current page"""
+    return {'navigation': Navigation(req)}
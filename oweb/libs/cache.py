@@ -0,0 +1,227 @@
+"""
+Contains a simple in-process cache and the cache of computed results
+
+The :py:class:`LRUCache` keeps a bounded number of entries. If the cache is
+full, the least recently used entry is evicted. The cache counts its hits and
+misses, so the efficiency can be checked with :py:meth:`LRUCache.info`.
+
+Results, that depend on the objects of a planet or an account (i.e. the build
+queue), are stored in the backend returned by :py:func:`get_backend`. The
+backend is selected by the setting ``OWEB_CACHE``:
+
+``'lru'`` (default)
+    An in-process :py:class:`LRUCache` with ``OWEB_CACHE_SIZE`` entries
+``'django'``
+    Django's cache with the alias ``OWEB_CACHE_ALIAS`` (default: ``'default'``)
+``None``
+    Nothing is cached
+
+Cached results are keyed with *state versions* (see :py:func:`get_version`).
+The signals in :py:mod:`oweb.models.signals` bump the versions, whenever the
+relevant objects are saved, so outdated results are never found again.
+"""
+# Python imports
+from collections import OrderedDict
+from threading import Lock
+from uuid import uuid4
+# Django imports
+from django.conf import settings
+from django.core.cache import get_cache
+
+
+class LRUCache(object):
+    """A bounded mapping with least-recently-used eviction
+
+    :param maxsize: The maximum number of entries
+    :type maxsize: int
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        """The maximum number of entries"""
+
+        self.hits = 0
+        """The number of successful lookups"""
+
+        self.misses = 0
+        """The number of failed lookups"""
+
+        self.evictions = 0
+        """The number of evicted entries"""
+
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """Returns the value of a key or ``default``
+
+        A successful lookup marks the entry as most recently used.
+        """
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Stores a value and evicts the least recently used entry, if necessary"""
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        """Removes a key, if it is present"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Removes all entries and resets the counters"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self):
+        """Returns the statistics of this cache
+
+        :returns: dict -- hits, misses, evictions, current size, maxsize and hit ratio
+        """
+        lookups = self.hits + self.misses
+        try:
+            ratio = self.hits / float(lookups)
+        except ZeroDivisionError:
+            ratio = 0.0
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ratio': ratio,
+        }
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DjangoCache(object):
+    """Provides the interface of :py:class:`LRUCache` for Django's cache
+
+    :param alias: The alias of the cache in the setting ``CACHES``
+    :type alias: string
+
+    The keys are tuples; they are converted to strings.
+    """
+
+    def __init__(self, alias='default'):
+        self.cache = get_cache(alias)
+        """Django's cache"""
+
+    def _key(self, key):
+        return 'oweb:' + ':'.join(str(k) for k in key)
+
+    def get(self, key, default=None):
+        """Returns the value of a key or ``default``"""
+        return self.cache.get(self._key(key), default)
+
+    def set(self, key, value):
+        """Stores a value"""
+        self.cache.set(self._key(key), value)
+
+    def delete(self, key):
+        """Removes a key"""
+        self.cache.delete(self._key(key))
+
+    def clear(self):
+        """Removes all entries"""
+        self.cache.clear()
+
+
+class NullCache(object):
+    """A cache, that does not store anything"""
+
+    def get(self, key, default=None):
+        return default
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+_backend = None
+"""The backend of the results"""
+
+
+def get_backend():
+    """Returns the backend of the results, as selected by ``OWEB_CACHE``
+
+    :returns: LRUCache, DjangoCache or NullCache object
+    """
+    global _backend
+    if _backend is None:
+        name = getattr(settings, 'OWEB_CACHE', 'lru')
+        if name == 'lru':
+            _backend = LRUCache(maxsize=getattr(settings, 'OWEB_CACHE_SIZE', 1024))
+        elif name == 'django':
+            _backend = DjangoCache(getattr(settings, 'OWEB_CACHE_ALIAS', 'default'))
+        else:
+            _backend = NullCache()
+    return _backend
+
+
+def reset_backend():
+    """Drops the backend, so it is created again on next use
+
+    This is necessary, if the settings are changed at runtime.
+    """
+    global _backend
+    _backend = None
+
+
+def get_version(scope, id):
+    """Returns the current state version of an object
+
+    :param scope: The kind of object, i.e. ``'planet'`` or ``'account'``
+    :type scope: string
+    :param id: The ID of the object
+    :type id: int
+    :returns: string -- The version
+
+    A version is a random token, not a counter. If the version was evicted
+    from the backend, a new token is created, so results of the old version
+    can not be found anymore.
+    """
+    backend = get_backend()
+    key = ('version', scope, id)
+    version = backend.get(key)
+    if version is None:
+        version = uuid4().hex
+        backend.set(key, version)
+    return version
+
+
+def bump_version(scope, id):
+    """Sets a new state version for an object
+
+    :param scope: The kind of object, i.e. ``'planet'`` or ``'account'``
+    :type scope: string
+    :param id: The ID of the object
+    :type id: int
+    """
+    get_backend().set(('version', scope, id), uuid4().hex)
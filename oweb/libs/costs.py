@@ -14,7 +14,108 @@ latter group are suffixed with "_total".
 
 The formulas (and where to use them) were taken from http://owiki.de. Additional
 mathematic formulas were taken from Wikipedia.
+
+The results of :py:func:`costs` and :py:func:`costs_total` are memoized in
+plain dictionaries, keyed by the item type (base costs and modifier) and the
+level. A lookup must be cheaper than the formula itself, so the tables are
+not locked and do not track the use of their entries; if a table is full, an
+arbitrary entry is evicted for a new one. Hits, misses and evictions are
+counted; use :py:func:`cost_table_info` to check the hit ratio.
+
+Functions suffixed with "_range" calculate the costs of all levels between two
+given levels, i.e. the costs of an upgrade over several levels. The sum is
+calculated with the closed form of the geometric series, so the effort does
+not depend on the number of levels. Items with rounded costs (see
+:py:func:`costs_rounded`) use memoized prefix sums instead.
+
+Functions suffixed with "_batch" calculate the costs of many items at once.
+They take sequences of base costs and levels and return an ``(n, 3)`` array of
+integers. If NumPy is available, the calculation is vectorized; otherwise the
+scalar functions are used and a list of tuples is returned. Both ways return
+exactly the same values.
 """
+# Python imports
+from math import floor
+# NumPy is optional
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+COST_TABLE_SIZE = 4096
+"""The maximum number of entries in each cost table"""
+
+_cost_table = {}
+"""Memoizes the results of costs()"""
+
+_cost_total_table = {}
+"""Memoizes the results of costs_total()"""
+
+_cost_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+"""Counts the lookups of both cost tables"""
+
+
+def cost_table_info():
+    """Returns the statistics of the cost tables
+
+    :returns: dict -- ``hits``, ``misses``, ``evictions``, ``size`` (the number of entries of both tables), ``costs``, ``costs_total`` (the entries of each table) and ``maxsize``
+    """
+    info = dict(_cost_stats)
+    info['costs'] = len(_cost_table)
+    info['costs_total'] = len(_cost_total_table)
+    info['size'] = info['costs'] + info['costs_total']
+    info['maxsize'] = COST_TABLE_SIZE
+    return info
+
+
+def clear_cost_tables():
+    """Drops the entries and resets the counters of the cost tables"""
+    _cost_table.clear()
+    _cost_total_table.clear()
+    for key in _cost_stats:
+        _cost_stats[key] = 0
+
+
+def _memoized(table, calc, base_cost, modifier, level):
+    """Returns a result from a cost table or calculates and stores it"""
+    key = (base_cost, modifier, level)
+    try:
+        result = table[key]
+    except KeyError:
+        pass
+    except TypeError:
+        # the base costs are not hashable, i.e. a list
+        _cost_stats['misses'] += 1
+        return calc(base_cost, modifier, level)
+    else:
+        _cost_stats['hits'] += 1
+        return result
+
+    _cost_stats['misses'] += 1
+    if len(table) >= COST_TABLE_SIZE:
+        table.popitem()
+        _cost_stats['evictions'] += 1
+    result = table[key] = calc(base_cost, modifier, level)
+    return result
+
+
+def _calc_costs(base_cost, modifier, level):
+    """Calculates the costs of a given level without the cost table"""
+    metal = (base_cost[0] / modifier) * modifier ** level
+    crystal = (base_cost[1] / modifier) * modifier ** level
+    deut = (base_cost[2] / modifier) * modifier ** level
+
+    return int(metal), int(crystal), int(deut)
+
+
+def _calc_costs_total(base_cost, modifier, level):
+    """Calculates the total costs of a given level without the cost table"""
+    geo = float(1 - modifier ** (level + 1)) / float(1 - modifier)
+    metal = (base_cost[0] / modifier) * geo - (base_cost[0] / modifier)
+    crystal = (base_cost[1] / modifier) * geo - (base_cost[1] / modifier)
+    deut = (base_cost[2] / modifier) * geo - (base_cost[2] / modifier)
+    return int(metal), int(crystal), int(deut)
 
 
 def costs(base_cost, modifier, level):
@@ -28,11 +129,7 @@ def costs(base_cost, modifier, level):
     :type level: int
     :returns: tuple -- The costs in metal, crystal and deuterium
     """
-    metal = (base_cost[0] / modifier) * modifier ** level
-    crystal = (base_cost[1] / modifier) * modifier ** level
-    deut = (base_cost[2] / modifier) * modifier ** level
-
-    return int(metal), int(crystal), int(deut)
+    return _memoized(_cost_table, _calc_costs, base_cost, modifier, level)
 
 
 def costs_total(base_cost, modifier, level):
@@ -46,13 +143,165 @@ def costs_total(base_cost, modifier, level):
     :type level: int
     :returns: tuple -- The costs in metal, crystal and deuterium
     """
-    geo = float(1 - modifier ** (level + 1)) / float(1 - modifier)
-    metal = (base_cost[0] / modifier) * geo - (base_cost[0] / modifier)
-    crystal = (base_cost[1] / modifier) * geo - (base_cost[1] / modifier)
-    deut = (base_cost[2] / modifier) * geo - (base_cost[2] / modifier)
+    return _memoized(_cost_total_table, _calc_costs_total, base_cost, modifier, level)
+
+
+def costs_range(base_cost, modifier, from_level, to_level):
+    """Generic function to calculate the costs of a range of levels
+
+    :param base_cost: The base costs of the item
+    :type base_cost: tuple
+    :param modifier: The base factor to be used
+    :type modifier: float
+    :param from_level: The first level to be calculated
+    :type from_level: int
+    :param to_level: The last level to be calculated
+    :type to_level: int
+    :returns: tuple -- The costs in metal, crystal and deuterium
+
+    The costs of ``from_level`` and ``to_level`` are included, so the costs of
+    an upgrade from level *a* to level *b* are
+    ``costs_range(base_cost, modifier, a + 1, b)``. An empty range costs
+    nothing.
+    """
+    if to_level < from_level:
+        return 0, 0, 0
+
+    geo = float(modifier ** (to_level + 1) - modifier ** from_level) / float(modifier - 1)
+    metal = (base_cost[0] / modifier) * geo
+    crystal = (base_cost[1] / modifier) * geo
+    deut = (base_cost[2] / modifier) * geo
+
     return int(metal), int(crystal), int(deut)
 
 
+_rounded_sums = {}
+"""Maps the item types with rounded costs to lists of prefix sums"""
+
+
+def costs_rounded(base_cost, modifier, level):
+    """Calculates the costs of a given level, rounded to hundreds
+
+    :param base_cost: The base costs of the item
+    :type base_cost: tuple
+    :param modifier: The base factor to be used
+    :type modifier: float
+    :param level: The level to be calculated
+    :type level: int
+    :returns: tuple -- The costs in metal, crystal and deuterium
+
+    This formula is used by :py:class:`oweb.models.research.Research124`
+    (Astrophysics). The formula is taken from owiki.de
+    """
+    metal = int(100 * (floor(0.5 + (base_cost[0] // 100) * modifier ** (level - 1))))
+    crystal = int(100 * (floor(0.5 + (base_cost[1] // 100) * modifier ** (level - 1))))
+    deut = int(100 * (floor(0.5 + (base_cost[2] // 100) * modifier ** (level - 1))))
+    return metal, crystal, deut
+
+
+def costs_rounded_range(base_cost, modifier, from_level, to_level):
+    """Calculates the costs of a range of levels with rounded costs
+
+    :param base_cost: The base costs of the item
+    :type base_cost: tuple
+    :param modifier: The base factor to be used
+    :type modifier: float
+    :param from_level: The first level to be calculated
+    :type from_level: int
+    :param to_level: The last level to be calculated
+    :type to_level: int
+    :returns: tuple -- The costs in metal, crystal and deuterium
+
+    The rounding prevents a closed form, so the sums of levels 1 to *n* are
+    memoized per item type; a range is the difference of two of these sums.
+    See :py:func:`costs_range` for the range semantics.
+    """
+    from_level = max(from_level, 1)
+    if to_level < from_level:
+        return 0, 0, 0
+
+    sums = _rounded_sums.setdefault((tuple(base_cost[:3]), modifier), [(0, 0, 0)])
+    while len(sums) <= to_level:
+        last = sums[-1]
+        cost = costs_rounded(base_cost, modifier, len(sums))
+        sums.append((last[0] + cost[0], last[1] + cost[1], last[2] + cost[2]))
+
+    upper = sums[to_level]
+    lower = sums[from_level - 1]
+    return upper[0] - lower[0], upper[1] - lower[1], upper[2] - lower[2]
+
+
+def _powers(modifier, levels):
+    """Returns ``modifier ** level`` for an array of levels
+
+    The powers are calculated by Python for every distinct level, so they are
+    exactly the same as in the scalar functions.
+    """
+    if not len(levels):
+        return numpy.zeros(0)
+    lowest = min(int(levels.min()), 0)
+    table = numpy.array([modifier ** l for l in range(lowest, int(levels.max()) + 1)])
+    return table[levels - lowest]
+
+
+def _to_int(values):
+    """Truncates an array of floats to integers like ``int()``
+
+    Values, that do not fit into 64 bit integers, are converted to Python
+    integers.
+    """
+    if not values.size or abs(values).max() < 2 ** 61:
+        return numpy.trunc(values).astype(numpy.int64)
+    return numpy.array([[int(v) for v in row] for row in values], dtype=object).reshape(values.shape)
+
+
+def costs_batch(base_costs, modifier, levels):
+    """Calculates the costs of many items with the same modifier
+
+    :param base_costs: The base costs of the items
+    :type base_costs: sequence of tuples
+    :param modifier: The base factor to be used
+    :type modifier: float
+    :param levels: The levels to be calculated
+    :type levels: sequence of int
+    :returns: array -- ``(n, 3)`` costs in metal, crystal and deuterium
+
+    This is the batch version of :py:func:`costs`.
+    """
+    if numpy is None:
+        return [costs(b, modifier, l) for b, l in zip(base_costs, levels)]
+
+    base = numpy.array([b[:3] for b in base_costs], dtype=numpy.int64).reshape(-1, 3)
+    levels = numpy.asarray(levels, dtype=numpy.int64)
+    powers = _powers(modifier, levels)
+
+    return _to_int((base / modifier) * powers[:, numpy.newaxis])
+
+
+def costs_total_batch(base_costs, modifier, levels):
+    """Calculates the total costs of many items with the same modifier
+
+    :param base_costs: The base costs of the items
+    :type base_costs: sequence of tuples
+    :param modifier: The base factor to be used
+    :type modifier: float
+    :param levels: The levels to be calculated
+    :type levels: sequence of int
+    :returns: array -- ``(n, 3)`` costs in metal, crystal and deuterium
+
+    This is the batch version of :py:func:`costs_total`.
+    """
+    if numpy is None:
+        return [costs_total(b, modifier, l) for b, l in zip(base_costs, levels)]
+
+    base = numpy.array([b[:3] for b in base_costs], dtype=numpy.int64).reshape(-1, 3)
+    levels = numpy.asarray(levels, dtype=numpy.int64)
+    geo = (1 - _powers(modifier, levels + 1)) / float(1 - modifier)
+    base = base / modifier
+
+    return _to_int(base * geo[:, numpy.newaxis] - base)
+
+
 def costs_onepointfive(base_cost, current_level, offset=1):
     """Returns a tuple with the costs of a given level
 
@@ -83,6 +332,52 @@ def costs_onepointfive_total(base_cost, level):
     return costs_total(base_cost, 1.5, level)
 
 
+def costs_onepointfive_range(base_cost, from_level, to_level):
+    """Returns the costs of a range of levels
+
+    :param base_cost: The base costs of the item
+    :type base_cost: tuple
+    :param from_level: The first level to be calculated
+    :type from_level: int
+    :param to_level: The last level to be calculated
+    :type to_level: int
+    :returns: tuple --  The costs in metal, crystal and deuterium
+
+    This function is used for buildings/researches with a base factor of 1.5
+    """
+    return costs_range(base_cost, 1.5, from_level, to_level)
+
+
+def costs_onepointfive_batch(base_costs, current_levels, offset=1):
+    """Returns the costs of the given levels of many items
+
+    :param base_costs: The base costs of the items
+    :type base_costs: sequence of tuples
+    :param current_levels: The current levels of the items
+    :type current_levels: sequence of int
+    :param offset: The offset from the current levels
+    :type offset: int
+    :returns: array -- ``(n, 3)`` costs in metal, crystal and deuterium
+
+    This is the batch version of :py:func:`costs_onepointfive`.
+    """
+    return costs_batch(base_costs, 1.5, [l + offset for l in current_levels])
+
+
+def costs_onepointfive_total_batch(base_costs, levels):
+    """Returns the total costs of many items
+
+    :param base_costs: The base costs of the items
+    :type base_costs: sequence of tuples
+    :param levels: The current levels of the items
+    :type levels: sequence of int
+    :returns: array -- ``(n, 3)`` costs in metal, crystal and deuterium
+
+    This is the batch version of :py:func:`costs_onepointfive_total`.
+    """
+    return costs_total_batch(base_costs, 1.5, levels)
+
+
 def costs_onepointsix(base_cost, current_level, offset=1):
     """Returns a tuple with the costs of a given level
 
@@ -113,6 +408,52 @@ def costs_onepointsix_total(base_cost, level):
     return costs_total(base_cost, 1.6, level)
 
 
+def costs_onepointsix_range(base_cost, from_level, to_level):
+    """Returns the costs of a range of levels
+
+    :param base_cost: The base costs of the item
+    :type base_cost: tuple
+    :param from_level: The first level to be calculated
+    :type from_level: int
+    :param to_level: The last level to be calculated
+    :type to_level: int
+    :returns: tuple --  The costs in metal, crystal and deuterium
+
+    This function is used for buildings/researches with a base factor of 1.6
+    """
+    return costs_range(base_cost, 1.6, from_level, to_level)
+
+
+def costs_onepointsix_batch(base_costs, current_levels, offset=1):
+    """Returns the costs of the given levels of many items
+
+    :param base_costs: The base costs of the items
+    :type base_costs: sequence of tuples
+    :param current_levels: The current levels of the items
+    :type current_levels: sequence of int
+    :param offset: The offset from the current levels
+    :type offset: int
+    :returns: array -- ``(n, 3)`` costs in metal, crystal and deuterium
+
+    This is the batch version of :py:func:`costs_onepointsix`.
+    """
+    return costs_batch(base_costs, 1.6, [l + offset for l in current_levels])
+
+
+def costs_onepointsix_total_batch(base_costs, levels):
+    """Returns the total costs of many items
+
+    :param base_costs: The base costs of the items
+    :type base_costs: sequence of tuples
+    :param levels: The current levels of the items
+    :type levels: sequence of int
+    :returns: array -- ``(n, 3)`` costs in metal, crystal and deuterium
+
+    This is the batch version of :py:func:`costs_onepointsix_total`.
+    """
+    return costs_total_batch(base_costs, 1.6, levels)
+
+
 def costs_onepointeight(base_cost, current_level, offset=1):
     """Returns a tuple with the costs of a given level
 
@@ -143,6 +484,52 @@ def costs_onepointeight_total(base_cost, level):
     return costs_total(base_cost, 1.8, level)
 
 
+def costs_onepointeight_range(base_cost, from_level, to_level):
+    """Returns the costs of a range of levels
+
+    :param base_cost: The base costs of the item
+    :type base_cost: tuple
+    :param from_level: The first level to be calculated
+    :type from_level: int
+    :param to_level: The last level to be calculated
+    :type to_level: int
+    :returns: tuple --  The costs in metal, crystal and deuterium
+
+    This function is used for buildings/researches with a base factor of 1.8
+    """
+    return costs_range(base_cost, 1.8, from_level, to_level)
+
+
+def costs_onepointeight_batch(base_costs, current_levels, offset=1):
+    """Returns the costs of the given levels of many items
+
+    :param base_costs: The base costs of the items
+    :type base_costs: sequence of tuples
+    :param current_levels: The current levels of the items
+    :type current_levels: sequence of int
+    :param offset: The offset from the current levels
+    :type offset: int
+    :returns: array -- ``(n, 3)`` costs in metal, crystal and deuterium
+
+    This is the batch version of :py:func:`costs_onepointeight`.
+    """
+    return costs_batch(base_costs, 1.8, [l + offset for l in current_levels])
+
+
+def costs_onepointeight_total_batch(base_costs, levels):
+    """Returns the total costs of many items
+
+    :param base_costs: The base costs of the items
+    :type base_costs: sequence of tuples
+    :param levels: The current levels of the items
+    :type levels: sequence of int
+    :returns: array -- ``(n, 3)`` costs in metal, crystal and deuterium
+
+    This is the batch version of :py:func:`costs_onepointeight_total`.
+    """
+    return costs_total_batch(base_costs, 1.8, levels)
+
+
 def costs_two(base_cost, current_level, offset=1):
     """Returns a tuple with the costs of a given level
 
@@ -173,6 +560,52 @@ def costs_two_total(base_cost, level):
     return costs_total(base_cost, 2.0, level)
 
 
+def costs_two_range(base_cost, from_level, to_level):
+    """Returns the costs of a range of levels
+
+    :param base_cost: The base costs of the item
+    :type base_cost: tuple
+    :param from_level: The first level to be calculated
+    :type from_level: int
+    :param to_level: The last level to be calculated
+    :type to_level: int
+    :returns: tuple --  The costs in metal, crystal and deuterium
+
+    This function is used for buildings/researches with a base factor of 2.0
+    """
+    return costs_range(base_cost, 2.0, from_level, to_level)
+
+
+def costs_two_batch(base_costs, current_levels, offset=1):
+    """Returns the costs of the given levels of many items
+
+    :param base_costs: The base costs of the items
+    :type base_costs: sequence of tuples
+    :param current_levels: The current levels of the items
+    :type current_levels: sequence of int
+    :param offset: The offset from the current levels
+    :type offset: int
+    :returns: array -- ``(n, 3)`` costs in metal, crystal and deuterium
+
+    This is the batch version of :py:func:`costs_two`.
+    """
+    return costs_batch(base_costs, 2.0, [l + offset for l in current_levels])
+
+
+def costs_two_total_batch(base_costs, levels):
+    """Returns the total costs of many items
+
+    :param base_costs: The base costs of the items
+    :type base_costs: sequence of tuples
+    :param levels: The current levels of the items
+    :type levels: sequence of int
+    :returns: array -- ``(n, 3)`` costs in metal, crystal and deuterium
+
+    This is the batch version of :py:func:`costs_two_total`.
+    """
+    return costs_total_batch(base_costs, 2.0, levels)
+
+
 def costs_twopointthree(base_cost, current_level, offset=1):
     """Returns a tuple with the costs of a given level
 
@@ -201,3 +634,49 @@ def costs_twopointthree_total(base_cost, level):
     This function is used for buildings/researches with a base factor of 2.3
     """
     return costs_total(base_cost, 2.3, level)
+
+
+def costs_twopointthree_range(base_cost, from_level, to_level):
+    """Returns the costs of a range of levels
+
+    :param base_cost: The base costs of the item
+    :type base_cost: tuple
+    :param from_level: The first level to be calculated
+    :type from_level: int
+    :param to_level: The last level to be calculated
+    :type to_level: int
+    :returns: tuple --  The costs in metal, crystal and deuterium
+
+    This function is used for buildings/researches with a base factor of 2.3
+    """
+    return costs_range(base_cost, 2.3, from_level, to_level)
+
+
+def costs_twopointthree_batch(base_costs, current_levels, offset=1):
+    """Returns the costs of the given levels of many items
+
+    :param base_costs: The base costs of the items
+    :type base_costs: sequence of tuples
+    :param current_levels: The current levels of the items
+    :type current_levels: sequence of int
+    :param offset: The offset from the current levels
+    :type offset: int
+    :returns: array -- ``(n, 3)`` costs in metal, crystal and deuterium
+
+    This is the batch version of :py:func:`costs_twopointthree`.
+    """
+    return costs_batch(base_costs, 2.3, [l + offset for l in current_levels])
+
+
+def costs_twopointthree_total_batch(base_costs, levels):
+    """Returns the total costs of many items
+
+    :param base_costs: The base costs of the items
+    :type base_costs: sequence of tuples
+    :param levels: The current levels of the items
+    :type levels: sequence of int
+    :returns: array -- ``(n, 3)`` costs in metal, crystal and deuterium
+
+    This is the batch version of :py:func:`costs_twopointthree_total`.
+    """
+    return costs_total_batch(base_costs, 2.3, levels)
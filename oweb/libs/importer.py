@@ -0,0 +1,231 @@
+"""
+Contains the import of text, that is copied from the game
+
+The pages of the game list the items with their levels or counts. If the text
+of these pages is copied, every item ends up on its own line, i.e.::
+
+    Metal Mine (Level 25)
+    Light Fighter (1.234)
+    Energy Technology	12
+
+The empire view lists all planets side by side. Its text contains a line with
+the coordinates of the planets and one line per item with the values of every
+planet, separated by tabs::
+
+    	[1:123:4]	[1:124:7]
+    Metal Mine	25	24
+
+The empire view of the moons shows the names of the moons and the coordinates
+of their planets. Moons share the coordinates with their planets, so the
+columns of a text are either planets or moons; see :py:func:`get_import_updates`.
+
+The text is parsed line by line (see :py:func:`iter_entries`); unknown lines
+are skipped. :py:func:`get_import_updates` maps the entries onto the objects
+of an account and returns the changes, that can be applied with
+:py:func:`oweb.views.updates.apply_item_updates`.
+"""
+# Python imports
+from collections import namedtuple
+import re
+# Django imports
+from django.contrib.contenttypes.models import ContentType
+# app imports
+from oweb.models import Building, Civil212, Defense, Moon, Planet, Research, Ship
+from oweb.models.signals import ACCOUNT_RESEARCH, ACCOUNT_SHIPS, PLANET_BUILDINGS, MOON_BUILDINGS, PLANET_DEFENSE
+
+
+Entry = namedtuple('Entry', ('body', 'model', 'value'))
+"""An item of the imported text
+
+``body`` is the column of the empire view (the coordinates or the name of a
+planet or moon) or ``None`` for the text of a single page. ``model`` is the
+*real* class of the item and ``value`` its level or count.
+"""
+
+ALIASES = {
+    'heavy fighter': 'heavy figher',
+    'death star': 'deathstar',
+    'anti-ballistic missile': 'anti-ballistic missiles',
+    'interplanetary missile': 'interplanetary missiles',
+}
+"""Maps names of the game to the names of the models"""
+
+_names = {}
+"""Maps the normalized names to the *real* classes"""
+
+_line = re.compile(r'^(?P<name>[^\t(]*?)\s*(?:\(\s*(?:level\s+)?(?P<level>[\d.,]+)\s*\)|\s(?P<value>[\d.,]+))\s*$',
+                   re.IGNORECASE)
+"""Matches a line of a single page, i.e. ``Metal Mine (Level 25)``"""
+
+_coord = re.compile(r'^\[?(\d+:\d+:\d+)\]?$')
+"""Matches the coordinates of a planet"""
+
+MOON_ONLY_BUILDINGS = tuple(b for b in MOON_BUILDINGS if b not in PLANET_BUILDINGS)
+"""The buildings, that are only found on moons"""
+
+
+def _normalize(name):
+    """Returns a name in lower case with single spaces"""
+    name = ' '.join(name.lower().split())
+    return ALIASES.get(name, name)
+
+
+def get_model(name):
+    """Returns the *real* class of an item
+
+    :param name: The name of the item, as shown by the game
+    :type name: string
+    :returns: class -- The *real* class or ``None``
+    """
+    if not _names:
+        for model in ACCOUNT_RESEARCH + ACCOUNT_SHIPS + PLANET_BUILDINGS + MOON_BUILDINGS + PLANET_DEFENSE + (Civil212,):
+            _names[_normalize(model().name)] = model
+    return _names.get(_normalize(name))
+
+
+def _number(value):
+    """Converts a number of the game (with separators) or returns ``None``"""
+    value = value.strip().replace('.', '').replace(',', '')
+    if value.isdigit():
+        return int(value)
+    return None
+
+
+def iter_entries(lines):
+    """Yields the items of the imported text
+
+    :param lines: The lines of the text
+    :type lines: iterable
+    :returns: generator -- Entry objects
+
+    Every line is looked at once. A line with tabs, that does not start with
+    an item, may set the columns of the empire view: coordinates set the
+    columns at any time, names (of planets or moons) only before the first
+    columns are known. The following lines with tabs are assigned to these
+    columns.
+    """
+    columns = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+
+        cells = line.split('\t')
+        if len(cells) > 1:
+            model = get_model(cells[0])
+            if model is None:
+                names = [c.strip() for c in cells[1:]]
+                coords = [_coord.match(n) for n in names]
+                if any(coords):
+                    columns = [c.group(1) if c else n for c, n in zip(coords, names)]
+                elif columns is None and all(n and n != '-' and _number(n) is None for n in names):
+                    columns = names
+                continue
+            if columns is not None:
+                for body, cell in zip(columns, cells[1:]):
+                    value = _number(cell)
+                    if value is not None:
+                        yield Entry(body, model, value)
+                continue
+            # a single page with additional columns
+            value = _number(cells[1])
+            if value is not None:
+                yield Entry(None, model, value)
+                continue
+
+        match = _line.match(line.strip())
+        if match:
+            model = get_model(match.group('name'))
+            value = _number(match.group('level') or match.group('value'))
+            if model is not None and value is not None:
+                yield Entry(None, model, value)
+
+
+def get_import_updates(account, entries, body=None, moons=None):
+    """Returns the changes of an account, that are described by imported entries
+
+    :param account: The account in question
+    :type account: Account object
+    :param entries: The imported items
+    :type entries: iterable of Entry objects
+    :param body: The planet or moon of a single page (default: None)
+    :type body: Planet or Moon object
+    :param moons: Are the columns of the empire view moons? (default: None)
+    :type moons: bool
+    :returns: list -- ``(item_type, item_id, value)`` tuples
+
+    The objects of the account are fetched with six queries. Only changed
+    values are returned.
+
+    Entries without a column belong to ``body``; if ``body`` is not given,
+    buildings, defense devices and Solar Satellites of these entries are
+    skipped. The columns of the empire view are matched with the coordinates
+    and names of either the planets or the moons. If ``moons`` is not given,
+    the columns are moons, if they name a moon, that is not the name of a
+    planet, or if they contain a building, that is only found on moons. Ships
+    of the empire view (except Solar Satellites) are summed up; the ships of
+    a single page are skipped, because the page only lists the ships of one
+    planet or moon.
+    """
+    entries = list(entries)
+    planets = list(Planet.objects.filter(account=account).values_list('id', 'name', 'coord'))
+    moon_list = list(Moon.objects.filter(planet__account=account).values_list('id', 'name', 'coord'))
+
+    if moons is None:
+        planet_names = set(p[1] for p in planets)
+        moon_names = set(m[1] for m in moon_list) - planet_names
+        moons = any(e.body in moon_names or (e.body is not None and e.model in MOON_ONLY_BUILDINGS)
+                    for e in entries)
+
+    bodies = {}
+    for astro_id, name, coord in (moon_list if moons else planets):
+        bodies[name] = astro_id
+        bodies[coord] = astro_id
+    astro_ids = [p[0] for p in planets] + [m[0] for m in moon_list]
+
+    # the current values
+    items = {}
+    for pk, astro_id, content_type_id, level in Building.objects.filter(astro_object_id__in=astro_ids).values_list(
+            'pk', 'astro_object_id', 'content_type_id', 'level'):
+        items[(astro_id, content_type_id)] = ('building', pk, level)
+    for pk, astro_id, content_type_id, count in Defense.objects.filter(astro_object_id__in=astro_ids).values_list(
+            'pk', 'astro_object_id', 'content_type_id', 'count'):
+        items[(astro_id, content_type_id)] = ('defense', pk, count)
+    for pk, content_type_id, level in Research.objects.filter(account=account).values_list(
+            'pk', 'real_class_id', 'level'):
+        items[(None, content_type_id)] = ('research', pk, level)
+    for pk, content_type_id, count, astro_id in Ship.objects.filter(account=account).values_list(
+            'pk', 'content_type_id', 'count', 'civil212__astro_object_id'):
+        items[(astro_id, content_type_id)] = ('ship', pk, count)
+
+    values = {}
+    for entry in entries:
+        content_type_id = ContentType.objects.get_for_model(entry.model).id
+        if entry.body is None:
+            astro_id = body.id if body else None
+        else:
+            astro_id = bodies.get(entry.body)
+            if astro_id is None:
+                continue
+
+        if issubclass(entry.model, Research):
+            key = (None, content_type_id)
+            values[key] = max(values.get(key, 0), entry.value)
+        elif issubclass(entry.model, Ship) and entry.model is not Civil212:
+            # a single page lists the ships of one planet or moon only
+            if entry.body is not None:
+                key = (None, content_type_id)
+                values[key] = values.get(key, 0) + entry.value
+        elif astro_id is not None:
+            values[(astro_id, content_type_id)] = entry.value
+
+    updates = []
+    for key, value in values.items():
+        try:
+            item_type, pk, current = items[key]
+        except KeyError:
+            continue
+        if value != current:
+            updates.append((item_type, pk, value))
+
+    return updates
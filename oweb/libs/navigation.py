@@ -0,0 +1,121 @@
+"""
+Contains the navigation of an account
+
+Every page of an account lists the planets of this account and links the moon
+of the current planet. These values rarely change, so they are kept in the
+backend of :py:mod:`oweb.libs.cache` instead of being fetched on every page.
+
+The navigation is keyed with the state version ``('navigation', account_id)``.
+The signals in :py:mod:`oweb.models.signals` bump this version, whenever a
+planet or moon is created, changed or deleted.
+
+The navigation is provided to the templates by
+:py:class:`oweb.context_processors.Navigation`.
+"""
+# Python imports
+from collections import namedtuple
+# app imports
+from oweb.models import Account, Moon, Planet
+from oweb.libs.cache import bump_version, get_backend, get_version
+
+
+NavigationMoon = namedtuple('NavigationMoon', ('id', 'name'))
+"""A moon in the navigation"""
+
+
+class NavigationPlanet(namedtuple('NavigationPlanet', ('id', 'name', 'coord', 'moon'))):
+    """A planet in the navigation
+
+    ``moon`` is a :py:class:`NavigationMoon` or ``None``. The planet is shown
+    like a :py:class:`oweb.models.planet.Planet`.
+    """
+    __slots__ = ()
+
+    def __unicode__(self):
+        return u'{0} [{1}]'.format(self.name, self.coord)
+
+
+def get_navigation(account_id):
+    """Returns the owner and the planets of an account
+
+    :param account_id: The ID of the account
+    :type account_id: int
+    :returns: tuple -- the ID of the owner and a list of NavigationPlanet objects
+
+    If the navigation is not cached, it is fetched with three queries.
+    """
+    backend = get_backend()
+    key = ('navigation', account_id, get_version('navigation', account_id))
+    navigation = backend.get(key)
+    if navigation is None:
+        try:
+            owner_id = Account.objects.values_list('owner_id', flat=True).get(id=account_id)
+        except Account.DoesNotExist:
+            return None, []
+
+        moons = dict((planet_id, NavigationMoon(moon_id, name))
+                     for moon_id, planet_id, name in Moon.objects.filter(
+                         planet__account_id=account_id).values_list('id', 'planet_id', 'name'))
+        planets = [NavigationPlanet(planet_id, name, coord, moons.get(planet_id))
+                   for planet_id, name, coord in Planet.objects.filter(
+                       account_id=account_id).values_list('id', 'name', 'coord')]
+
+        navigation = (owner_id, planets)
+        backend.set(key, navigation)
+
+        # the account of a planet or moon is looked up by the context processor
+        for p in planets:
+            backend.set(('navigation', 'astro', p.id), account_id)
+            if p.moon:
+                backend.set(('navigation', 'astro', p.moon.id), account_id)
+
+    return navigation
+
+
+def get_planet_moon(planet):
+    """Returns the moon of a planet from the navigation
+
+    :param planet: The planet in question
+    :type planet: Planet object
+    :returns: NavigationMoon -- The moon or ``None``
+    """
+    for p in get_navigation(planet.account_id)[1]:
+        if p.id == planet.id:
+            return p.moon
+    return None
+
+
+def get_account_id(astro_object_id, moon=False):
+    """Returns the ID of the account of a planet or moon
+
+    :param astro_object_id: The ID of the planet or moon
+    :type astro_object_id: int
+    :param moon: Is the object a moon? (default: False)
+    :type moon: bool
+    :returns: int -- The ID of the account or ``None``
+
+    The IDs are kept, while the navigation of the account is cached.
+    """
+    backend = get_backend()
+    account_id = backend.get(('navigation', 'astro', astro_object_id))
+    if account_id is None:
+        if moon:
+            ids = Moon.objects.filter(id=astro_object_id).values_list('planet__account_id', flat=True)
+        else:
+            ids = Planet.objects.filter(id=astro_object_id).values_list('account_id', flat=True)
+        account_id = ids.first()
+    return account_id
+
+
+def bump_navigation(account_id, astro_object_id=None):
+    """Drops the navigation of an account
+
+    :param account_id: The ID of the account or ``None``
+    :type account_id: int
+    :param astro_object_id: The ID of a deleted planet or moon (default: None)
+    :type astro_object_id: int
+    """
+    if account_id is not None:
+        bump_version('navigation', account_id)
+    if astro_object_id is not None:
+        get_backend().delete(('navigation', 'astro', astro_object_id))
@@ -1,96 +1,369 @@
+"""
+Contains the functions to calculate points
+
+The points of an item are the sum of metal, crystal and deuterium, that were
+spent on it. Buildings and researches are priced by their level, ships and
+defense devices by their count.
+
+The calculation does not need model instances. Every row is reduced to its
+ContentType ID and its level (or count); the ContentType ID is resolved to
+the item's cost model by :py:func:`get_cost_model`. This way, the points of
+whole accounts are calculated from plain value lists (see
+:py:func:`get_accounts_points`).
+"""
+# Django imports
+from django.db.models import Q
 # app imports
 from oweb.models.planet import Moon
 from oweb.models.building import Building, Supply1, Supply2, Supply3, Supply4, Supply12
 from oweb.models.defense import Defense
 from oweb.models.ship import Ship, Civil202, Civil203, Civil208, Civil210, Civil212
 from oweb.models.research import Research
-from oweb.libs.shortcuts import get_list_or_404
+from oweb.models.polymorphic import get_real_class
+from oweb.libs.costs import costs_total, costs_total_batch
+from oweb.libs.shortcuts import get_values_list_or_404
 
-def get_planet_points(planet):
-    buildings = get_list_or_404(Building, astro_object=planet)
-    defense = get_list_or_404(Defense, astro_object=planet)
 
-    other_points = 0
-    production_points = 0
-    defense_points = 0
+PRODUCTION_BUILDINGS = (Supply1, Supply2, Supply3, Supply4, Supply12)
+"""Buildings, that count as production points"""
 
-    for b in buildings:
-        this_building_cost = b.get_total_cost()
-        this_building_points = this_building_cost[0] + this_building_cost[1] + this_building_cost[2]
+CIVIL_SHIPS = (Civil202, Civil203, Civil208, Civil210, Civil212)
+"""Ships, that count as civil points"""
+
+_cost_models = {}
+"""Maps the IDs of ContentType objects to the cost models"""
 
-        if b.content_type.model_class() in [Supply1, Supply2, Supply3, Supply4, Supply12]:
-            production_points += this_building_points
-        else:
-            other_points += this_building_points
 
-    for d in defense:
-        this_defense = d.as_real_class()
-        this_defense_points = this_defense.count * (this_defense.cost[0] + this_defense.cost[1] + this_defense.cost[2])
+def get_cost_model(content_type_id):
+    """Returns the cost model of a given ContentType ID
 
-        defense_points += this_defense_points
+    :param content_type_id: The ID of the ContentType
+    :type content_type_id: int
+    :returns: tuple -- base costs, cost modifier and category flag
 
+    For items with levels (buildings, researches), the cost modifier is the
+    factor of the item's class. For items with a count (ships, defense), the
+    cost modifier is ``None`` and the base costs are the costs per piece.
+
+    The category flag is ``True`` for production buildings and civil ships.
+    """
     try:
-        moon = Moon.objects.get(planet=planet)
-        moon_points, moon_buildings, moon_defense = get_moon_points(moon)
-    except Moon.DoesNotExist:
-        moon_points = 0
-        moon_buildings = 0
-        moon_defense = 0
+        return _cost_models[content_type_id]
+    except KeyError:
+        pass
+
+    model = get_real_class(content_type_id)
+    if issubclass(model, (Ship, Defense)):
+        cost_model = (model.cost, None, issubclass(model, CIVIL_SHIPS))
+    else:
+        cost_model = (model.base_cost, model.cost_modifier, issubclass(model, PRODUCTION_BUILDINGS))
+    _cost_models[content_type_id] = cost_model
+
+    return cost_model
+
+
+def get_item_points(content_type_id, value):
+    """Returns the points of a single item
+
+    :param content_type_id: The ID of the item's ContentType
+    :type content_type_id: int
+    :param value: The level or count of the item
+    :type value: int
+    :returns: int -- The points of this item
+    """
+    base_cost, modifier, category = get_cost_model(content_type_id)
+    if modifier is None:
+        return value * (base_cost[0] + base_cost[1] + base_cost[2])
+    cost = costs_total(base_cost, modifier, value)
+    return cost[0] + cost[1] + cost[2]
+
+
+def get_items_points(rows):
+    """Returns the points of many items
+
+    :param rows: ``(content_type_id, level/count)`` tuples
+    :type rows: list
+    :returns: list -- The points of every item
+
+    Items with levels are grouped by their cost modifier and calculated with
+    :py:func:`oweb.libs.costs.costs_total_batch`.
+    """
+    points = [0] * len(rows)
+    groups = {}
+    for i, (content_type_id, value) in enumerate(rows):
+        base_cost, modifier, category = get_cost_model(content_type_id)
+        if modifier is None:
+            points[i] = value * (base_cost[0] + base_cost[1] + base_cost[2])
+        else:
+            group = groups.setdefault(modifier, ([], [], []))
+            group[0].append(i)
+            group[1].append(base_cost)
+            group[2].append(value)
+
+    for modifier, (indices, base_costs, levels) in groups.items():
+        for i, cost in zip(indices, costs_total_batch(base_costs, modifier, levels)):
+            points[i] = int(cost[0] + cost[1] + cost[2])
+
+    return points
+
+
+def sum_points(rows):
+    """Returns the points of a list of items
+
+    :param rows: ``(content_type_id, level/count)`` tuples
+    :type rows: list
+    :returns: tuple -- total points and points of production buildings or civil ships
+    """
+    total = 0
+    flagged = 0
+    for (content_type_id, value), points in zip(rows, get_items_points(rows)):
+        total += points
+        if get_cost_model(content_type_id)[2]:
+            flagged += points
+    return total, flagged
+
+
+def _rows(objects, value_field, type_field='content_type_id'):
+    """Reduces a list of objects to ``(content_type_id, value)`` tuples"""
+    return [(getattr(o, type_field), getattr(o, value_field)) for o in objects]
+
+
+def get_planet_points(planet, buildings=None, defense=None, moon_points=None):
+    """Returns the points of a planet, including its moon
+
+    :param planet: The planet in question
+    :type planet: Planet object
+    :param buildings: This planet's buildings (default: None)
+    :type buildings: list
+    :param defense: This planet's defense devices (default: None)
+    :type defense: list
+    :param moon_points: The result of :py:func:`get_moon_points` for this planet's moon (default: None)
+    :type moon_points: tuple
+    :returns: tuple -- planet, production, other, defense, moon, moon buildings and moon defense points
+
+    If the optional parameters are not specified, they will be fetched.
+    """
+    if buildings is None:
+        buildings = get_values_list_or_404(Building, ('content_type_id', 'level'), astro_object=planet)
+    else:
+        buildings = _rows(buildings, 'level')
+    if defense is None:
+        defense = get_values_list_or_404(Defense, ('content_type_id', 'count'), astro_object=planet)
+    else:
+        defense = _rows(defense, 'count')
+
+    building_points, production_points = sum_points(buildings)
+    other_points = building_points - production_points
+    defense_points = sum_points(defense)[0]
+
+    if moon_points is None:
+        try:
+            moon = Moon.objects.get(planet=planet)
+            moon_points = get_moon_points(moon)
+        except Moon.DoesNotExist:
+            moon_points = (0, 0, 0)
+    moon_points, moon_buildings, moon_defense = moon_points
 
     planet_points = production_points + other_points + defense_points + moon_points
 
     return planet_points, production_points, other_points, defense_points, moon_points, moon_buildings, moon_defense
 
 
-def get_moon_points(moon):
-    buildings = get_list_or_404(Building, astro_object=moon)
-    defense = get_list_or_404(Defense, astro_object=moon)
+def get_moon_points(moon, buildings=None, defense=None):
+    """Returns the points of a moon
 
-    other_points = 0
-    defense_points = 0
+    :param moon: The moon in question
+    :type moon: Moon object
+    :param buildings: This moon's buildings (default: None)
+    :type buildings: list
+    :param defense: This moon's defense devices (default: None)
+    :type defense: list
+    :returns: tuple -- moon, buildings and defense points
+    """
+    if buildings is None:
+        buildings = get_values_list_or_404(Building, ('content_type_id', 'level'), astro_object=moon)
+    else:
+        buildings = _rows(buildings, 'level')
+    if defense is None:
+        defense = get_values_list_or_404(Defense, ('content_type_id', 'count'), astro_object=moon)
+    else:
+        defense = _rows(defense, 'count')
 
-    for b in buildings:
-        this_building_cost = b.get_total_cost()
-        this_building_points = this_building_cost[0] + this_building_cost[1] + this_building_cost[2]
+    other_points = sum_points(buildings)[0]
+    defense_points = sum_points(defense)[0]
 
-        other_points += this_building_points
+    return other_points + defense_points, other_points, defense_points
 
-    for d in defense:
-        this_defense = d.as_real_class()
-        this_defense_points = this_defense.count * (this_defense.cost[0] + this_defense.cost[1] + this_defense.cost[2])
 
-        defense_points += this_defense_points
+def get_ship_points(account, ships=None):
+    """Returns the points of an account's ships
 
-    return other_points + defense_points, other_points, defense_points
+    :param account: The account in question
+    :type account: Account object
+    :param ships: This account's ships (default: None)
+    :type ships: list
+    :returns: tuple -- ship, civil and military points
+    """
+    if ships is None:
+        ships = get_values_list_or_404(Ship, ('content_type_id', 'count'), account=account)
+    else:
+        ships = _rows(ships, 'count')
+
+    ship_points, civil_points = sum_points(ships)
+    military_points = ship_points - civil_points
+
+    return ship_points, civil_points, military_points
+
+
+def get_research_points(account, research=None):
+    """Returns the points of an account's researches
 
+    :param account: The account in question
+    :type account: Account object
+    :param research: This account's researches (default: None)
+    :type research: list
+    :returns: int -- research points
+    """
+    if research is None:
+        research = get_values_list_or_404(Research, ('real_class_id', 'level'), account=account)
+    else:
+        research = _rows(research, 'level', type_field='real_class_id')
 
-def get_ship_points(account):
-    ships = get_list_or_404(Ship, account=account)
+    return sum_points(research)[0]
 
-    civil_points = 0
-    military_points = 0
 
-    for s in ships:
-        this_ship = s.as_real_class()
-        this_ship_points = this_ship.count * (this_ship.cost[0] + this_ship.cost[1] + this_ship.cost[2])
+def collect_points(buildings, defense, ships, research):
+    """Calculates the points of many accounts from value lists
 
-        if s.content_type.model_class() in [Civil202, Civil203, Civil208, Civil210, Civil212]:
-            civil_points += this_ship_points
+    :param buildings: ``(account_id, planet_id, is_moon, content_type_id, level)`` tuples
+    :type buildings: iterable
+    :param defense: ``(account_id, planet_id, is_moon, content_type_id, count)`` tuples
+    :type defense: iterable
+    :param ships: ``(account_id, content_type_id, count)`` tuples
+    :type ships: iterable
+    :param research: ``(account_id, content_type_id, level)`` tuples
+    :type research: iterable
+    :returns: dict -- Maps account IDs to their points (see :py:func:`get_account_points`)
+
+    For moons, ``planet_id`` is the ID of the moon's planet.
+    """
+    accounts = {}
+
+    def account_points(account_id):
+        try:
+            return accounts[account_id]
+        except KeyError:
+            accounts[account_id] = {'planets': {}, 'ships': [0, 0, 0], 'research': 0}
+            return accounts[account_id]
+
+    def planet_points(account_id, planet_id):
+        planets = account_points(account_id)['planets']
+        try:
+            return planets[planet_id]
+        except KeyError:
+            planets[planet_id] = [0, 0, 0, 0, 0, 0, 0]
+            return planets[planet_id]
+
+    buildings = list(buildings)
+    defense = list(defense)
+    ships = list(ships)
+    research = list(research)
+
+    building_points = get_items_points([(b[3], b[4]) for b in buildings])
+    for (account_id, planet_id, is_moon, content_type_id, level), points in zip(buildings, building_points):
+        p = planet_points(account_id, planet_id)
+        if is_moon:
+            p[5] += points
+        elif get_cost_model(content_type_id)[2]:
+            p[1] += points
         else:
-            military_points += this_ship_points
+            p[2] += points
 
-    ship_points = civil_points + military_points
+    defense_points = get_items_points([(d[3], d[4]) for d in defense])
+    for (account_id, planet_id, is_moon, content_type_id, count), points in zip(defense, defense_points):
+        p = planet_points(account_id, planet_id)
+        if is_moon:
+            p[6] += points
+        else:
+            p[3] += points
+
+    ship_points = get_items_points([(s[1], s[2]) for s in ships])
+    for (account_id, content_type_id, count), points in zip(ships, ship_points):
+        s = account_points(account_id)['ships']
+        s[0] += points
+        if get_cost_model(content_type_id)[2]:
+            s[1] += points
+        else:
+            s[2] += points
+
+    research_points = get_items_points([(r[1], r[2]) for r in research])
+    for (account_id, content_type_id, level), points in zip(research, research_points):
+        account_points(account_id)['research'] += points
+
+    # build the same tuples as get_planet_points() and get_ship_points()
+    for acc in accounts.values():
+        for planet_id, p in acc['planets'].items():
+            p[4] = p[5] + p[6]
+            p[0] = p[1] + p[2] + p[3] + p[4]
+            acc['planets'][planet_id] = tuple(p)
+        acc['ships'] = tuple(acc['ships'])
+
+    return accounts
+
+
+def get_accounts_points(account_ids):
+    """Returns the points of many accounts at once
+
+    :param account_ids: The IDs of the accounts
+    :type account_ids: list
+    :returns: dict -- Maps account IDs to their points (see :py:func:`get_account_points`)
+
+    This function needs four queries, regardless of the number of accounts.
+    """
+    account_ids = list(account_ids)
+    on_planet = Q(astro_object__planet__account_id__in=account_ids)
+    on_moon = Q(astro_object__moon__planet__account_id__in=account_ids)
+    fields = ('astro_object__planet__account_id',
+              'astro_object__moon__planet__account_id',
+              'astro_object__moon__planet_id',
+              'astro_object_id')
+
+    def astro_rows(klass, value_field):
+        for p_acc, m_acc, m_planet, astro_id, content_type_id, value in \
+                klass.objects.filter(on_planet | on_moon).values_list(*(fields + ('content_type_id', value_field))):
+            if m_planet:
+                yield m_acc, m_planet, True, content_type_id, value
+            else:
+                yield p_acc, astro_id, False, content_type_id, value
+
+    accounts = collect_points(
+        astro_rows(Building, 'level'),
+        astro_rows(Defense, 'count'),
+        Ship.objects.filter(account_id__in=account_ids).values_list('account_id', 'content_type_id', 'count'),
+        Research.objects.filter(account_id__in=account_ids).values_list('account_id', 'real_class_id', 'level'))
+
+    for account_id in account_ids:
+        accounts.setdefault(int(account_id), {'planets': {}, 'ships': (0, 0, 0), 'research': 0})
+
+    return accounts
 
-    return ship_points, civil_points, military_points
 
+def get_account_points(account):
+    """Returns the points of an account
 
-def get_research_points(account):
-    research = get_list_or_404(Research, account=account)
+    :param account: The account in question
+    :type account: Account object
+    :returns: dict -- The points of this account
 
-    research_points = 0
+    The returned dictionary contains these keys:
 
-    for r in research:
-        this_research_cost = r.get_total_cost()
-        research_points += this_research_cost[0] + this_research_cost[1] + this_research_cost[2]
+    ``planets``
+        Maps planet IDs to tuples, as returned by :py:func:`get_planet_points`
+    ``ships``
+        A tuple, as returned by :py:func:`get_ship_points`
+    ``research``
+        The research points, as returned by :py:func:`get_research_points`
 
-    return research_points
+    This function needs four queries.
+    """
+    return get_accounts_points([account.id])[account.id]
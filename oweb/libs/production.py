@@ -9,13 +9,32 @@ Please note, that most of the functions return a tuple with four values:
 For every function, these four values are populated, i.e. if you calculate the
 production of a metal mine, you will get a tuple with a positive ``metal`` value,
 a negative ``energy`` value and ``crystal`` and ``deut`` will be zero.
+
+If the same productions are needed over and over again (i.e. while building a
+queue), use :py:func:`get_production_table`. A table is indexed by the level
+and returns exactly the values of the wrapped function.
 """
 # Python imports
+from collections import namedtuple
 from math import floor, ceil
+# Django imports
+from django.db.models import Q
 # app imports
-from oweb.models import Supply1, Supply2, Supply3, Supply4, Supply12, Civil212, Research113, Research122, Station14, Station15
+from oweb.exceptions import OWebDoesNotExist
+from oweb.models import Building, Supply1, Supply2, Supply3, Supply4, Supply12, Civil212, Research113, Research122
+from oweb.libs.cache import LRUCache
+from oweb.libs.costs import costs
+from oweb.libs.points import get_cost_model
 from oweb.libs.shortcuts import get_object_or_404
 
+
+PRODUCTION_TABLE_SIZE = 256
+"""The maximum number of production tables"""
+
+_production_tables = LRUCache(maxsize=PRODUCTION_TABLE_SIZE)
+"""Maps functions and their parameters to production tables"""
+
+
 def get_metal_production(level, performance=1.0, speed=1):
     """Returns the production of a metal mine with a given level
 
@@ -276,6 +295,378 @@ def get_planet_production(planet, speed,
     return prod
 
 
+class ProductionTable(object):
+    """The productions of a function, indexed by level
+
+    :param function: The production function
+    :type function: function
+    :param kwargs: The parameters of the function (except the level)
+
+    ``table[level]`` returns ``function(level, **kwargs)``. The values are
+    calculated on first access and kept; the table grows up to the highest
+    requested level.
+    """
+
+    def __init__(self, function, **kwargs):
+        self.function = function
+        """The production function"""
+
+        self.kwargs = kwargs
+        """The parameters of the production function"""
+
+        self._values = []
+
+    def __getitem__(self, level):
+        if level < 0:
+            return self.function(level, **self.kwargs)
+        values = self._values
+        if level >= len(values):
+            # the list is replaced, so concurrent readers never see a partial list
+            values = values + [self.function(l, **self.kwargs) for l in range(len(values), level + 1)]
+            self._values = values
+        return values[level]
+
+    def __len__(self):
+        return len(self._values)
+
+
+def get_production_table(function, **kwargs):
+    """Returns the production table of a function with the given parameters
+
+    :param function: The production function, i.e. :py:func:`get_metal_production`
+    :type function: function
+    :param kwargs: The parameters of the function (except the level), i.e. ``speed`` or ``temp``
+    :returns: ProductionTable -- The table
+
+    The tables are shared and kept in a bounded cache, see
+    :py:func:`production_table_info`.
+    """
+    key = (function.__name__, tuple(sorted(kwargs.items())))
+    table = _production_tables.get(key)
+    if table is None:
+        table = ProductionTable(function, **kwargs)
+        _production_tables.set(key, table)
+    return table
+
+
+def production_table_info():
+    """Returns the statistics of the production tables
+
+    :returns: dict -- See :py:meth:`oweb.libs.cache.LRUCache.info`
+    """
+    return _production_tables.info()
+
+
+PlanetState = namedtuple('PlanetState', (
+    'planet_id', 'max_temp',
+    'metal_level', 'metal_perf',
+    'crystal_level', 'crystal_perf',
+    'deut_level', 'deut_perf',
+    'solar_level', 'solar_perf',
+    'fusion_level', 'fusion_perf',
+    'sat_count'))
+"""The production related values of a planet
+
+See :py:func:`get_planet_state` and :py:func:`get_account_production`.
+"""
+
+
+def get_planet_state(planet, supply1, supply2, supply3, supply4, supply12, civil212):
+    """Returns the production related values of a planet
+
+    :param planet: The planet in question
+    :type planet: Planet object
+    :param supply1: This planet's metal mine
+    :type supply1: Supply1 object
+    :param supply2: This planet's crystal mine
+    :type supply2: Supply2 object
+    :param supply3: This planet's deuterium synthesizer
+    :type supply3: Supply3 object
+    :param supply4: This planet's solar plant
+    :type supply4: Supply4 object
+    :param supply12: This planet's fusion plant
+    :type supply12: Supply12 object
+    :param civil212: This planet's solar satellites
+    :type civil212: Civil212 object
+    :returns: PlanetState -- The values of this planet
+    """
+    return PlanetState(planet.id, planet.max_temp,
+                       supply1.level, supply1.performance,
+                       supply2.level, supply2.performance,
+                       supply3.level, supply3.performance,
+                       supply4.level, supply4.performance,
+                       supply12.level, supply12.performance,
+                       civil212.count)
+
+
+def get_account_production(states, speed, energy=3, plasma=0):
+    """Returns the production of all planets of an account
+
+    :param states: The planets of the account
+    :type states: list of PlanetState objects
+    :param speed: This universe's speed
+    :type speed: int
+    :param energy: The level of energy technology (default: 3)
+    :type energy: int
+    :param plasma: The level of plasma technology (default: 0)
+    :type plasma: int
+    :returns: list -- the production of every planet, tuple -- the total production
+
+    **Please note, that this function returns two values!**
+
+    The production of every planet is the same tuple, that
+    :py:func:`get_planet_production` returns. The planets are calculated in
+    one step; the powers of every level are only calculated once.
+    """
+    mine_powers = {}
+    fusion_powers = {}
+    fusion_factor = 1.05 + energy * 0.01
+    base_income = (30 * speed, 15 * speed, 0, 0)
+
+    def mine_power(level):
+        try:
+            return mine_powers[level]
+        except KeyError:
+            mine_powers[level] = 1.1 ** level
+            return mine_powers[level]
+
+    production = []
+    for s in states:
+        # these are the formulas of the get_*_production() functions
+        power = mine_power(s.metal_level)
+        metal = floor(30 * s.metal_level * power * s.metal_perf * speed)
+        metal_energy = ceil(10 * s.metal_level * power * s.metal_perf)
+
+        power = mine_power(s.crystal_level)
+        crystal = floor(20 * s.crystal_level * power * s.crystal_perf * speed)
+        crystal_energy = ceil(10 * s.crystal_level * power * s.crystal_perf)
+
+        power = mine_power(s.deut_level)
+        deut = floor(10 * s.deut_level * power * (1.44 - 0.004 * s.max_temp) * s.deut_perf * speed)
+        deut_energy = ceil(20 * s.deut_level * power * s.deut_perf)
+
+        solar = round(floor(20 * s.solar_level * mine_power(s.solar_level)) * s.solar_perf)
+
+        try:
+            power = fusion_powers[s.fusion_level]
+        except KeyError:
+            power = fusion_powers[s.fusion_level] = fusion_factor ** s.fusion_level
+        fusion = round(floor(30 * s.fusion_level * power) * s.fusion_perf)
+        fusion_consumption = ceil(10 * s.fusion_level * mine_power(s.fusion_level) * s.fusion_perf) * speed
+
+        sats = round(floor((s.max_temp + 140) / 6) * s.sat_count)
+
+        plasma_bonus = get_plasma_bonus(plasma, metal, crystal)
+
+        production.append(tuple(sum(x) for x in zip(
+            (metal, 0, 0, -metal_energy),
+            (0, crystal, 0, -crystal_energy),
+            (0, 0, deut, -deut_energy),
+            (0, 0, 0, solar),
+            (0, 0, -fusion_consumption, fusion),
+            (0, 0, 0, sats),
+            plasma_bonus, base_income
+        )))
+
+    total = tuple(sum(x) for x in zip(*production))
+    if not total:
+        total = (0, 0, 0, 0)
+
+    return production, total
+
+
+PERFORMANCE_STEPS = tuple(step / 10.0 for step in range(10, -1, -1))
+"""The performances, that can be selected in the game (highest first)"""
+
+PerformanceSettings = namedtuple('PerformanceSettings', (
+    'metal_perf', 'crystal_perf', 'deut_perf',
+    'solar_perf', 'fusion_perf',
+    'production'))
+"""The best performances of a planet and the resulting production
+
+See :py:func:`get_optimal_performance`.
+"""
+
+
+def get_optimal_performance(state, speed, energy=3, plasma=0, trade=(1, 1, 1)):
+    """Returns the performances, that maximise the production of a planet
+
+    :param state: The planet in question
+    :type state: PlanetState object
+    :param speed: This universe's speed
+    :type speed: int
+    :param energy: The level of energy technology (default: 3)
+    :type energy: int
+    :param plasma: The level of plasma technology (default: 0)
+    :type plasma: int
+    :param trade: A tuple with the account's trading rates (default: (1, 1, 1))
+    :type trade: tuple
+    :returns: PerformanceSettings -- The best performances
+
+    The performances are selected in steps of 10%, see
+    :py:data:`PERFORMANCE_STEPS`. The mines may not consume more energy than
+    the planet produces; the production (including the deuterium consumption
+    of the fusion plant) is rated in MSE.
+
+    The solar plant and the satellites do not consume anything, so the solar
+    plant always runs at 100%. The remaining settings are searched from the
+    highest performances downwards. A branch is dropped, if the mines can not
+    beat the best setting even with the remaining mines at 100%. For given
+    settings of the fusion plant, the metal mine and the crystal mine, the
+    best deuterium synthesizer is the highest one, that fits into the
+    remaining energy.
+    """
+    crystal_factor = trade[0] / float(trade[1])
+    deut_factor = trade[0] / float(trade[2])
+
+    metal = [get_metal_production(state.metal_level, performance=p, speed=speed)
+             for p in PERFORMANCE_STEPS]
+    crystal = [get_crystal_production(state.crystal_level, performance=p, speed=speed)
+               for p in PERFORMANCE_STEPS]
+    deut = [get_deuterium_production(state.deut_level, temp=state.max_temp, performance=p, speed=speed)
+            for p in PERFORMANCE_STEPS]
+    fusion = [get_fusion_production(state.fusion_level, performance=p, speed=speed, energy=energy)
+              for p in PERFORMANCE_STEPS]
+    base_energy = get_solar_production(state.solar_level)[3] + \
+        get_sat_production(state.sat_count, temp=state.max_temp)[3]
+
+    def rating(m, c, d, f):
+        bonus = get_plasma_bonus(plasma, metal[m][0], crystal[c][1])
+        return metal[m][0] + bonus[0] + \
+            (crystal[c][1] + bonus[1]) * crystal_factor + \
+            (deut[d][2] + fusion[f][2]) * deut_factor
+
+    best = None
+    best_rating = None
+    for f in range(len(PERFORMANCE_STEPS)):
+        if best_rating is not None and rating(0, 0, 0, f) <= best_rating:
+            continue
+        budget = base_energy + fusion[f][3]
+        for m in range(len(PERFORMANCE_STEPS)):
+            rest = budget + metal[m][3]
+            if rest < 0:
+                continue
+            if best_rating is not None and rating(m, 0, 0, f) <= best_rating:
+                # lower settings of the metal mine are even worse
+                break
+            for c in range(len(PERFORMANCE_STEPS)):
+                crystal_rest = rest + crystal[c][3]
+                if crystal_rest < 0:
+                    continue
+                if best_rating is not None and rating(m, c, 0, f) <= best_rating:
+                    break
+                d = 0
+                while deut[d][3] + crystal_rest < 0:
+                    d += 1
+                this_rating = rating(m, c, d, f)
+                if best_rating is None or this_rating > best_rating:
+                    best_rating = this_rating
+                    best = (m, c, d, f)
+
+    m, c, d, f = best
+    settings = state._replace(metal_perf=PERFORMANCE_STEPS[m],
+                              crystal_perf=PERFORMANCE_STEPS[c],
+                              deut_perf=PERFORMANCE_STEPS[d],
+                              solar_perf=1.0,
+                              fusion_perf=PERFORMANCE_STEPS[f])
+    production = get_account_production([settings], speed, energy=energy, plasma=plasma)[0][0]
+
+    return PerformanceSettings(settings.metal_perf, settings.crystal_perf, settings.deut_perf,
+                               settings.solar_perf, settings.fusion_perf, production)
+
+
+def get_account_performance(states, speed, energy=3, plasma=0, trade=(1, 1, 1)):
+    """Returns the best performances of all planets of an account
+
+    :param states: The planets of the account
+    :type states: list of PlanetState objects
+    :returns: list -- A PerformanceSettings object for every planet
+
+    Planets with the same levels, temperature and satellites share their
+    result. See :py:func:`get_optimal_performance` for the other parameters.
+    """
+    results = {}
+    settings = []
+    for s in states:
+        key = s._replace(planet_id=None, metal_perf=None, crystal_perf=None, deut_perf=None,
+                         solar_perf=None, fusion_perf=None)
+        try:
+            settings.append(results[key])
+        except KeyError:
+            results[key] = get_optimal_performance(s, speed, energy=energy, plasma=plasma, trade=trade)
+            settings.append(results[key])
+
+    return settings
+
+
+def get_planet_performance(planet, speed,
+                           trade=None,
+                           supply1=None,
+                           supply2=None,
+                           supply3=None,
+                           supply4=None,
+                           supply12=None,
+                           civil212=None,
+                           research113=None,
+                           research122=None):
+    """Returns the best performances of a Planet
+
+    :param planet: The planet in question
+    :type planet: Planet object
+    :param speed: This universe's speed
+    :type speed: int
+    :param trade: A tuple with the account's trading rates (default: None)
+    :type trade: tuple
+    :returns: PerformanceSettings -- The best performances
+
+    The objects are optional; if they are not specified, they will be
+    fetched. See :py:func:`get_planet_production` for the other parameters
+    and :py:func:`get_optimal_performance` for the result.
+    """
+    if not trade:
+        trade = (planet.account.trade_metal, planet.account.trade_crystal, planet.account.trade_deut)
+    if not supply1:
+        supply1 = get_object_or_404(Supply1, astro_object=planet.id)
+    if not supply2:
+        supply2 = get_object_or_404(Supply2, astro_object=planet.id)
+    if not supply3:
+        supply3 = get_object_or_404(Supply3, astro_object=planet.id)
+    if not supply4:
+        supply4 = get_object_or_404(Supply4, astro_object=planet.id)
+    if not supply12:
+        supply12 = get_object_or_404(Supply12, astro_object=planet.id)
+    if not civil212:
+        civil212 = get_object_or_404(Civil212, astro_object=planet.id)
+    if not research113:
+        research113 = get_object_or_404(Research113, account=planet.account.id)
+    if not research122:
+        research122 = get_object_or_404(Research122, account=planet.account.id)
+
+    state = get_planet_state(planet, supply1, supply2, supply3, supply4, supply12, civil212)
+
+    return get_optimal_performance(state, speed,
+                                   energy=research113.level,
+                                   plasma=research122.level,
+                                   trade=trade)
+
+
+def _get_capacities(speed, *args, **kwargs):
+    """Returns the capacities of the planets and moons, that match the filters
+
+    The levels of the Robotics and Nanite Factories are fetched with one
+    query.
+    """
+    levels = {}
+    for astro_object_id, model, level in Building.objects.filter(
+            content_type__app_label='oweb',
+            content_type__model__in=('station14', 'station15'),
+            *args, **kwargs).values_list('astro_object_id', 'content_type__model', 'level'):
+        levels.setdefault(astro_object_id, {})[model] = level
+
+    return dict((astro_object_id, get_capacity(l.get('station14', 0), l.get('station15', 0), speed))
+                for astro_object_id, l in levels.items())
+
+
 def get_planet_capacity(planet, speed=None):
     """Returns the planet's capacity, which means: How many resources can be used in one hour
 
@@ -292,10 +683,29 @@ def get_planet_capacity(planet, speed=None):
     if not speed:
         speed = planet.account.speed
 
-    robo = get_object_or_404(Station14, astro_object=planet.id)
-    nani = get_object_or_404(Station15, astro_object=planet.id)
+    try:
+        return _get_capacities(speed, astro_object=planet.id)[planet.id]
+    except KeyError:
+        raise OWebDoesNotExist
+
 
-    return get_capacity(robo.level, nani.level, speed)
+def get_account_capacities(account, speed=None):
+    """Returns the capacities of all planets and moons of an account
+
+    :param account: The account in question
+    :type account: Account object
+    :param speed: The account's speed (default: None)
+    :type speed: int
+    :returns: dict -- Maps the IDs of the planets and moons to their capacity
+
+    This function needs one query. Moons have no Nanite Factory; their
+    capacity only depends on the Robotics Factory.
+    """
+    if not speed:
+        speed = account.speed
+
+    return _get_capacities(speed, Q(astro_object__planet__account_id=account.id) |
+                           Q(astro_object__moon__planet__account_id=account.id))
 
 
 def get_capacity(robo, nani, speed):
@@ -310,3 +720,36 @@ def get_capacity(robo, nani, speed):
     :returns: int -- The capacity of this combination
     """
     return 2500 * speed * (1 + robo) * 2 ** nani
+
+
+def get_build_time(cost, capacity):
+    """Returns the time to build something
+
+    :param cost: The costs in metal, crystal and deuterium
+    :type cost: tuple
+    :param capacity: The capacity of the planet or moon
+    :type capacity: int
+    :returns: float -- The build time in hours
+    """
+    return (cost[0] + cost[1] + cost[2]) / float(capacity)
+
+
+def get_build_times(buildings, capacity):
+    """Returns the time to build the next level of buildings
+
+    :param buildings: The buildings in question
+    :type buildings: list of Building objects
+    :param capacity: The capacity of their planet or moon
+    :type capacity: int
+    :returns: list -- The build time of every building in hours
+
+    The buildings do not need to be instances of their *real* classes; the
+    costs are determined by their ContentType, see
+    :py:func:`oweb.libs.points.get_cost_model`.
+    """
+    times = []
+    for b in buildings:
+        base_cost, modifier, category = get_cost_model(b.content_type_id)
+        times.append(get_build_time(costs(base_cost, modifier, b.level + 1), capacity))
+
+    return times
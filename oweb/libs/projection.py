@@ -0,0 +1,124 @@
+"""
+Contains the projection of resources over time
+
+:py:func:`oweb.libs.production.get_planet_production` returns the production
+of one hour. :py:func:`iter_projection` adds these productions up over an
+arbitrary horizon and yields the accumulated resources step by step. The
+series is never built in memory, so long horizons with a fine resolution
+(i.e. 90 days, hour by hour) can be streamed.
+
+Scheduled changes of the planets (i.e. a new level of a mine) are given as
+:py:class:`Upgrade` objects. The production is only calculated again for the
+planet, that is changed; the total rate of the account is updated by the
+difference.
+"""
+# Python imports
+from collections import namedtuple
+# app imports
+from oweb.exceptions import OWebDoesNotExist, OWebIllegalParameterException
+from oweb.libs.production import PlanetState, get_account_production
+
+
+Upgrade = namedtuple('Upgrade', ('hour', 'planet_id', 'field', 'value'))
+"""A scheduled change of a planet or the account
+
+``field`` is a field of :py:class:`oweb.libs.production.PlanetState`, i.e.
+``'metal_level'`` or ``'sat_count'``, and ``value`` is its new value. If
+``planet_id`` is ``None``, ``field`` is ``'energy'`` or ``'plasma'`` and the
+change applies to all planets.
+"""
+
+ProjectionStep = namedtuple('ProjectionStep', ('hour', 'resources', 'rate'))
+"""A step of the projection
+
+``resources`` is the tuple of accumulated metal, crystal and deuterium and
+``rate`` the production per hour at the end of this step.
+"""
+
+
+def _iter_hours(hours, step):
+    """Yields the hours of the steps; the last step ends at ``hours``"""
+    for n in range(1, int(hours // step) + 1):
+        yield n * step
+    if hours % step:
+        yield hours
+
+
+def iter_projection(states, speed, hours, step=1, energy=3, plasma=0, upgrades=None, resources=(0, 0, 0)):
+    """Yields the accumulated resources of planets over time
+
+    :param states: The planets in question
+    :type states: list of PlanetState objects
+    :param speed: This universe's speed
+    :type speed: int
+    :param hours: The horizon of the projection
+    :type hours: int
+    :param step: The number of hours between two steps (default: 1)
+    :type step: int
+    :param energy: The level of energy technology (default: 3)
+    :type energy: int
+    :param plasma: The level of plasma technology (default: 0)
+    :type plasma: int
+    :param upgrades: Scheduled changes of the planets (default: None)
+    :type upgrades: list of Upgrade objects
+    :param resources: The resources at the beginning (default: (0, 0, 0))
+    :type resources: tuple
+    :returns: generator -- ProjectionStep objects
+
+    Upgrades take effect at their hour, even if it lies between two steps.
+    If ``hours`` is not a multiple of ``step``, the last step is shorter.
+
+    An upgrade of an unknown planet raises OWebDoesNotExist, an upgrade of
+    an unknown field raises OWebIllegalParameterException. The upgrades are
+    checked before the first step is yielded.
+    """
+    states = list(states)
+    index = dict((s.planet_id, i) for i, s in enumerate(states))
+    upgrades = sorted(upgrades or (), key=lambda u: u.hour)
+    for upgrade in upgrades:
+        if upgrade.planet_id is None:
+            if upgrade.field not in ('energy', 'plasma'):
+                raise OWebIllegalParameterException
+        elif upgrade.planet_id not in index:
+            raise OWebDoesNotExist
+        elif upgrade.field not in PlanetState._fields or upgrade.field == 'planet_id':
+            raise OWebIllegalParameterException
+
+    production = get_account_production(states, speed, energy=energy, plasma=plasma)[0]
+    rate = [sum(x) for x in zip(*production)] or [0, 0, 0, 0]
+    current = [float(r) for r in resources]
+    now = 0
+
+    def accrue(until):
+        for i in range(3):
+            current[i] += rate[i] * (until - now)
+
+    u = 0
+    for hour in _iter_hours(hours, step):
+        # apply the upgrades of this step
+        while u < len(upgrades) and upgrades[u].hour <= hour:
+            upgrade = upgrades[u]
+            u += 1
+            if upgrade.hour > now:
+                accrue(upgrade.hour)
+                now = upgrade.hour
+
+            if upgrade.planet_id is None:
+                # researches change all planets
+                if upgrade.field == 'energy':
+                    energy = upgrade.value
+                elif upgrade.field == 'plasma':
+                    plasma = upgrade.value
+                production = get_account_production(states, speed, energy=energy, plasma=plasma)[0]
+                rate = [sum(x) for x in zip(*production)] or [0, 0, 0, 0]
+            else:
+                i = index[upgrade.planet_id]
+                states[i] = states[i]._replace(**{upgrade.field: upgrade.value})
+                new = get_account_production([states[i]], speed, energy=energy, plasma=plasma)[0][0]
+                rate = [r - old + value for r, old, value in zip(rate, production[i], new)]
+                production[i] = new
+
+        accrue(hour)
+        now = hour
+
+        yield ProjectionStep(hour, tuple(int(r) for r in current), tuple(rate))
@@ -1,7 +1,14 @@
+# Python imports
+from collections import namedtuple
+from heapq import merge
+from itertools import count, islice
+from math import ceil
 # app imports
-from oweb.models import Supply1, Supply2, Supply3, Supply4, Supply12, Station14, Station15, Civil212, Research113, Research122
-from oweb.libs.production import get_metal_production, get_crystal_production, get_deuterium_production, get_plasma_bonus, get_capacity, get_sat_production, get_energy_production
-from oweb.libs.costs import costs_onepointfive, costs_onepointsix, costs_two
+from oweb.exceptions import OWebDoesNotExist
+from oweb.models import Account, Planet, Supply1, Supply2, Supply3, Supply4, Supply12, Station14, Station15, Civil212, Research113, Research122, Research124
+from oweb.libs.production import get_metal_production, get_crystal_production, get_deuterium_production, get_solar_production, get_fusion_production, get_plasma_bonus, get_capacity, get_sat_production, get_production_table
+from oweb.libs.cache import LRUCache, get_backend, get_version
+from oweb.libs.costs import costs_onepointfive, costs_onepointsix, costs_two, costs_rounded_range, costs_onepointfive_range, costs_onepointeight_range
 from oweb.libs.shortcuts import get_object_or_404
 
 
@@ -21,12 +28,111 @@ def get_mse(resources, trade):
     return int(mse)
 
 
+class QueueItem(object):
+    """An item of a queue
+
+    The ``key`` of an item holds the score, the number of required Solar
+    Satellites, the build time and the need of capacity. The items are sorted
+    by their ``order``, which is the key, unless the item must not be ranked
+    before an item of its queue (see :py:func:`_mine_queue`).
+
+    For compatibility with the former tuples, ``item[0]`` to ``item[3]``
+    return the values of the key and ``item[4]`` returns the item itself, which
+    provides ``id``, ``name``, ``level``, ``gain``, ``required_energy``,
+    ``planet_id``, ``planet_name`` and ``planet_coord`` as attributes and as
+    keys.
+
+    The planet is stored by its ID, name and coordinates, so an item does not
+    keep the model alive and is cached without it. For researches, these
+    values are ``None``.
+    """
+    __slots__ = ('key', 'order', 'id', 'name', 'level', 'gain', 'required_energy',
+                 'planet_id', 'planet_name', 'planet_coord')
+
+    _fields = frozenset(('id', 'name', 'level', 'gain', 'required_energy',
+                         'planet_id', 'planet_name', 'planet_coord'))
+
+    def __init__(self, key, id, name, level, gain, required_energy, planet_id, planet_name, planet_coord):
+        self.key = key
+        """The score, required Solar Satellites, build time and need of capacity"""
+
+        self.order = key
+        """The sort key of this item"""
+
+        self.id = id
+        """The ID of the building or research"""
+
+        self.name = name
+        """The name of the building or research"""
+
+        self.level = level
+        """The level of this item"""
+
+        self.gain = gain
+        """The production gain of this item in MSE"""
+
+        self.required_energy = required_energy
+        """The energy, that this item requires"""
+
+        self.planet_id = planet_id
+        """The ID of the planet or ``None`` for researches"""
+
+        self.planet_name = planet_name
+        """The name of the planet or ``None`` for researches"""
+
+        self.planet_coord = planet_coord
+        """The coordinates of the planet or ``None`` for researches"""
+
+    def __getitem__(self, index):
+        if index == 4:
+            return self
+        if isinstance(index, basestring):
+            if index in self._fields:
+                return getattr(self, index)
+            raise KeyError(index)
+        return self.key[index]
+
+    def __lt__(self, other):
+        return self.order < other.order
+
+    def __le__(self, other):
+        return self.order <= other.order
+
+    def __gt__(self, other):
+        return self.order > other.order
+
+    def __ge__(self, other):
+        return self.order >= other.order
+
+    def __eq__(self, other):
+        if not isinstance(other, QueueItem):
+            return NotImplemented
+        return (self.key == other.key and self.id == other.id and
+                self.level == other.level and self.planet_id == other.planet_id)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    def __repr__(self):
+        return '<QueueItem %s %s: %s>' % (self.name, self.level, self.key[0])
+
+
 def queue_item(id, name, level,
                next_cost, next_prod, this_prod, trade,
                this_capacity, next_capacity, next_cap_cost, next_cap_time,
                required_energy, required_sats,
                planet):
-    """Returns a queue item, which is a tuple of related values in a specific order
+    """Returns a queue item
     
     :param id: The ID of this item
     :type id: int
@@ -56,7 +162,7 @@ def queue_item(id, name, level,
     :type required_sats: int
     :param planet: The planet of this item (can be used to assign a Research, too)
     :type planet: Planet object
-    :returns: tuple -- A queue item
+    :returns: QueueItem -- A queue item
     """
     # init some vars... 
     # This catches some issues with Plasma research
@@ -96,62 +202,259 @@ def queue_item(id, name, level,
     if required_sats < 0:
         required_sats = 0
 
-    return (score,
-            required_sats,
-            this_build_time,
-            need_capacity,
-            {
-                'id': id,
-                'name': name,
-                'level': level,
-                'gain': gain,
-                'required_energy': -1 * required_energy,
-                'planet': planet,
-            })
+    # researches are assigned to the account
+    if isinstance(planet, Account):
+        planet_id = planet_name = planet_coord = None
+    else:
+        planet_id, planet_name, planet_coord = planet.id, planet.name, planet.coord
 
+    return QueueItem((score, required_sats, this_build_time, need_capacity),
+                     id, name, level, gain, -1 * required_energy,
+                     planet_id, planet_name, planet_coord)
 
-def get_planet_queue(planet,
-                     speed=None,
-                     trade=None,
-                     supply1=None,
-                     supply2=None,
-                     supply3=None,
-                     supply4=None,
-                     supply12=None,
-                     station14=None,
-                     station15=None,
-                     civil212=None,
-                     research113=None):
-    """Returns the queue for a given planet
 
-    :param planet: The planet in question
-    :type planet: Planet object
-    :param speed: The account's speed (Default: None)
+EnergyMix = namedtuple('EnergyMix', ('cost', 'sats', 'solar', 'fusion', 'consumption', 'energy'))
+"""The cheapest way to cover an energy shortfall
+
+``cost`` is the resource tuple of all sources, ``sats`` the number of Solar
+Satellites, ``solar`` and ``fusion`` the number of additional levels of the
+Solar Plant and the Fusion Reactor, ``consumption`` the additional
+deuterium consumption of the Fusion Reactor in MSE per hour and ``energy``
+the energy, that the sources produce (at least the shortfall).
+"""
+
+ENERGY_CONSUMPTION_HOURS = 24 * 30
+"""The number of hours, that the deuterium consumption is priced with"""
+
+ENERGY_MAX_LEVELS = 15
+"""The maximum number of additional levels of the Solar Plant and the Fusion Reactor"""
+
+_energy_mixes = LRUCache(maxsize=4096)
+"""Memoizes the results of get_energy_mix()"""
+
+
+def get_energy_mix(deficit, temp, energy_level, solar_level, fusion_level, speed, trade):
+    """Returns the cheapest mix of energy sources to cover a shortfall
+
+    :param deficit: The missing energy
+    :type deficit: int
+    :param temp: The maximum temperature of the planet
+    :type temp: int
+    :param energy_level: The level of energy technology
+    :type energy_level: int
+    :param solar_level: The current level of the Solar Plant
+    :type solar_level: int
+    :param fusion_level: The current level of the Fusion Reactor
+    :type fusion_level: int
+    :param speed: The account's speed
     :type speed: int
-    :param trade: The account's trading rates (Default: None)
+    :param trade: A tuple with the account's trading rates
     :type trade: tuple
-    :param supply1: This planet's metal mine (default: None)
-    :type supply1: Supply1 object
-    :param supply2: This planet's crystal mine (default: None)
-    :type supply2: Supply2 object
-    :param supply3: This planet's deuterium synthesizer (default: None)
-    :type supply3: Supply3 object
-    :param supply4: This planet's solar plant (default: None)
-    :type supply4: Supply4 object
-    :param supply12: This planet's fusion plant (default: None)
-    :type supply12: Supply12 object
-    :param station14: This planet's robotics factory (default: None)
-    :type station14: Station14 object
-    :param station15: This planet's nanite factory (default: None)
-    :type station15: Station15 object
-    :param civil212: This planet's solar satellites (default: None)
-    :type civil212: Civil212 object
-    :param research113: This account's energy technology (default: None)
-    :type research113: Research113 object
-    :returns: list -- The build queue of a planet
+    :returns: EnergyMix -- The cheapest mix or ``None``, if the shortfall can not be covered
 
-    Most of the parameters of this function are optional, but necessary. If
-    they are not specified while calling this function, they will be fetched.
+    The shortfall is covered by additional levels of the Solar Plant and the
+    Fusion Reactor; the rest is covered by Solar Satellites. The mixes are
+    rated by their costs in MSE plus the deuterium consumption of
+    :py:data:`ENERGY_CONSUMPTION_HOURS`. As the costs rise with every level,
+    the search stops, if the costs of the levels alone exceed the best mix.
+
+    The results are memoized by the temperature, the energy technology and
+    the shortfall (and the levels and account values, that the costs depend
+    on).
+    """
+    if deficit <= 0:
+        return EnergyMix((0, 0, 0), 0, 0, 0, 0, 0)
+
+    key = (temp, energy_level, deficit, solar_level, fusion_level, speed, trade)
+    mix = _energy_mixes.get(key)
+    if mix is not None:
+        return mix
+
+    sat_prod = get_sat_production(1, temp=temp)[3]
+    sat_cost = get_mse(Civil212.cost, trade)
+    solar_table = get_production_table(get_solar_production)
+    fusion_table = get_production_table(get_fusion_production, speed=speed, energy=energy_level)
+
+    best = None
+    best_rating = None
+    for fusion in range(0, ENERGY_MAX_LEVELS + 1):
+        fusion_cost = costs_onepointeight_range(Supply12.base_cost, fusion_level + 1, fusion_level + fusion)
+        fusion_energy = fusion_table[fusion_level + fusion][3] - fusion_table[fusion_level][3]
+        consumption = get_mse((0, 0, fusion_table[fusion_level][2] - fusion_table[fusion_level + fusion][2]), trade)
+        fusion_rating = get_mse(fusion_cost, trade) + consumption * ENERGY_CONSUMPTION_HOURS
+        if best_rating is not None and fusion_rating >= best_rating:
+            break
+
+        for solar in range(0, ENERGY_MAX_LEVELS + 1):
+            solar_cost = costs_onepointfive_range(Supply4.base_cost, solar_level + 1, solar_level + solar)
+            rating = fusion_rating + get_mse(solar_cost, trade)
+            if best_rating is not None and rating >= best_rating:
+                break
+
+            solar_energy = solar_table[solar_level + solar][3] - solar_table[solar_level][3]
+            rest = deficit - fusion_energy - solar_energy
+            sats = 0
+            if rest > 0:
+                if sat_prod <= 0:
+                    continue
+                sats = int(ceil(rest / float(sat_prod)))
+            rating += sats * sat_cost
+
+            if best_rating is None or rating < best_rating:
+                best_rating = rating
+                cost = (fusion_cost[0] + solar_cost[0] + sats * Civil212.cost[0],
+                        fusion_cost[1] + solar_cost[1] + sats * Civil212.cost[1],
+                        fusion_cost[2] + solar_cost[2] + sats * Civil212.cost[2])
+                best = EnergyMix(cost, sats, solar, fusion, consumption,
+                                 fusion_energy + solar_energy + sats * sat_prod)
+            if rest <= 0:
+                # more levels only add costs
+                break
+
+    _energy_mixes.set(key, best)
+    return best
+
+
+def _iter_energy_mixes(planet_energy, levels, energy, trade):
+    """Yields the energy sources, that the levels of a mine add
+
+    :param planet_energy: The current energy balance of the planet
+    :type planet_energy: int
+    :param levels: The energy values of the mine, starting with its current level
+    :type levels: iterable
+    :param energy: ``temp``, ``energy_level``, ``solar_level``, ``fusion_level`` and ``speed`` (see :py:func:`get_energy_mix`)
+    :type energy: tuple
+    :param trade: A tuple with the account's trading rates
+    :type trade: tuple
+    :returns: generator -- An EnergyMix (or ``None``) for every level above the current level
+
+    The sources are committed level by level: every level is priced against
+    the sources, that cover the levels below it, and the current shortfall
+    of the planet. A level only pays for the sources, that it adds, so the
+    costs and the consumption of a mix are never negative.
+    """
+    temp, energy_level, solar_level, fusion_level, speed = energy
+    levels = iter(levels)
+    prev_energy = next(levels)
+
+    # the sources of the planet's current shortfall are not charged to the mine
+    balance = planet_energy
+    mix = get_energy_mix(-1 * balance, temp, energy_level, solar_level, fusion_level, speed, trade)
+    if mix:
+        solar_level += mix.solar
+        fusion_level += mix.fusion
+        balance += mix.energy
+
+    for level_energy in levels:
+        balance += level_energy - prev_energy
+        prev_energy = level_energy
+        mix = get_energy_mix(-1 * balance, temp, energy_level, solar_level, fusion_level, speed, trade)
+        if mix:
+            solar_level += mix.solar
+            fusion_level += mix.fusion
+            balance += mix.energy
+        yield mix
+
+
+def _mine_queue(mine, costs, table, planet, trade, planet_energy, energy, capacity, depth):
+    """Yields the queue items of a mine, level by level
+
+    :param mine: The mine
+    :type mine: Building object
+    :param costs: The cost function of this mine, i.e. ``costs_onepointfive``
+    :type costs: function
+    :param table: The production table of this mine
+    :type table: ProductionTable object
+    :param planet: The planet of this mine
+    :type planet: Planet object
+    :param trade: A tuple with the account's trading rates
+    :type trade: tuple
+    :param planet_energy: The current energy balance of the planet
+    :type planet_energy: int
+    :param energy: ``temp``, ``energy_level``, ``solar_level``, ``fusion_level`` and ``speed`` (see :py:func:`get_energy_mix`)
+    :type energy: tuple
+    :param capacity: ``this_capacity``, ``next_capacity``, ``next_cap_cost`` and ``next_cap_time`` (see :py:func:`queue_item`)
+    :type capacity: tuple
+    :param depth: The number of levels or ``None`` for no limit
+    :type depth: int
+
+    The energy of every level is priced by :py:func:`_iter_energy_mixes`.
+
+    A level can only be built after the levels below it, so it is never
+    ranked before the previous level. The energy sources cover several levels
+    at once, so a level may be cheaper than the one below; it is then sorted
+    by the ``order`` of the level below, while its ``key`` is kept. The items
+    are yielded in ascending order, as :py:func:`heapq.merge` requires.
+    """
+    this_capacity, next_capacity, next_cap_cost, next_cap_time = capacity
+    last_order = None
+
+    # calculate current production
+    this_prod = table[mine.level]
+    this_prod_mse = get_mse(this_prod, trade)
+
+    # the energy sources, that every level adds
+    mixes = _iter_energy_mixes(planet_energy, (table[mine.level + n][3] for n in count()), energy, trade)
+
+    i = 1
+    while depth is None or i <= depth:
+        # cost of this level
+        next_cost = costs(mine.base_cost, mine.level, offset=i)
+        # production of this level
+        next_prod = table[mine.level + i]
+        next_prod_mse = get_mse(next_prod, trade)
+        # energy (the cheapest sources to cover the shortfall)
+        this_energy = -1 * (planet_energy + next_prod[3] - this_prod[3])
+        mix = next(mixes)
+        if mix:
+            required_sats = mix.sats
+            consumption = mix.consumption
+            next_cost = tuple(x + y for x, y in zip(next_cost[:3], mix.cost))
+        else:
+            required_sats = 0
+            consumption = 0
+
+        item = queue_item(
+            mine.id,
+            mine.name,
+            mine.level + i,
+            next_cost,
+            next_prod_mse - consumption,
+            this_prod_mse,
+            trade,
+            this_capacity,
+            next_capacity,
+            next_cap_cost,
+            next_cap_time,
+            this_energy,
+            required_sats,
+            planet)
+        if last_order is not None and item.order < last_order:
+            item.order = last_order
+        last_order = item.order
+        yield item
+
+        this_prod_mse = next_prod_mse
+        i += 1
+
+
+def _planet_queues(planet, depth,
+                   speed=None,
+                   trade=None,
+                   supply1=None,
+                   supply2=None,
+                   supply3=None,
+                   supply4=None,
+                   supply12=None,
+                   station14=None,
+                   station15=None,
+                   civil212=None,
+                   research113=None):
+    """Returns the queues of the mines of a planet
+
+    :returns: list -- A generator for every mine, see :py:func:`_mine_queue`
+
+    See :py:func:`get_planet_queue` for the parameters.
     """
     # Metal
     if not supply1:
@@ -187,40 +490,22 @@ def get_planet_queue(planet,
     if not trade:
         trade = (planet.account.trade_metal, planet.account.trade_crystal, planet.account.trade_deut)
 
-    # calculate current metal production
-    this_metal_prod = get_metal_production(supply1.level, speed=speed)
-    this_metal_prod_mse = get_mse(
-        this_metal_prod,
-        trade
-    )
-    # calculate current crystal production
-    this_crystal_prod = get_crystal_production(supply2.level, speed=speed)
-    this_crystal_prod_mse = get_mse(
-        this_crystal_prod,
-        trade
-    )
-    # calculate current deuterium production
-    this_deut_prod = get_deuterium_production(supply3.level, temp=planet.max_temp, speed=speed)
-    this_deut_prod_mse = get_mse(
-        this_deut_prod,
-        trade
-    )
+    # production tables of this planet
+    metal_table = get_production_table(get_metal_production, speed=speed)
+    crystal_table = get_production_table(get_crystal_production, speed=speed)
+    deut_table = get_production_table(get_deuterium_production, temp=planet.max_temp, speed=speed)
 
     # calculate planet's energy
-    sol, fus, sat = get_energy_production(
-        supply4.level,
-        supply12.level,
-        civil212.count,
-        temp=planet.max_temp,
-        energy=research113.level,
-        max_performance=True)
+    sol = get_production_table(get_solar_production)[supply4.level]
+    fus = get_production_table(get_fusion_production, energy=research113.level)[supply12.level]
+    sat = get_sat_production(civil212.count, temp=planet.max_temp)
     planet_energy = tuple(sum(x) for x in zip(sol, fus, sat))[3]
-    planet_energy += this_metal_prod[3]
-    planet_energy += this_crystal_prod[3]
-    planet_energy += this_deut_prod[3]
+    planet_energy += metal_table[supply1.level][3]
+    planet_energy += crystal_table[supply2.level][3]
+    planet_energy += deut_table[supply3.level][3]
 
-    # how much can one sat produce?
-    sat_prod = get_sat_production(1, temp=planet.max_temp)[3]
+    # the values of the energy sources
+    energy = (planet.max_temp, research113.level, supply4.level, supply12.level, speed)
 
     # calculate current capacity (ress per hour)
     this_capacity = get_capacity(station14.level, station15.level, speed)
@@ -232,107 +517,153 @@ def get_planet_queue(planet,
         next_cap_cost = costs_two(station14.base_cost, station14.level, offset=1)
     next_cap_cost_mse = get_mse(next_cap_cost, trade)
     next_cap_time = (next_cap_cost[0] + next_cap_cost[1] + next_cap_cost[2]) / float(this_capacity)
+    capacity = (this_capacity, next_capacity, next_cap_cost_mse, next_cap_time)
+    return [
+        _mine_queue(supply1, costs_onepointfive, metal_table,
+                    planet, trade, planet_energy, energy, capacity, depth),
+        _mine_queue(supply2, costs_onepointsix, crystal_table,
+                    planet, trade, planet_energy, energy, capacity, depth),
+        _mine_queue(supply3, costs_onepointfive, deut_table,
+                    planet, trade, planet_energy, energy, capacity, depth),
+    ]
+
 
+def get_planet_queue(planet,
+                     speed=None,
+                     trade=None,
+                     supply1=None,
+                     supply2=None,
+                     supply3=None,
+                     supply4=None,
+                     supply12=None,
+                     station14=None,
+                     station15=None,
+                     civil212=None,
+                     research113=None):
+    """Returns the queue for a given planet
+
+    :param planet: The planet in question
+    :type planet: Planet object
+    :param speed: The account's speed (Default: None)
+    :type speed: int
+    :param trade: The account's trading rates (Default: None)
+    :type trade: tuple
+    :param supply1: This planet's metal mine (default: None)
+    :type supply1: Supply1 object
+    :param supply2: This planet's crystal mine (default: None)
+    :type supply2: Supply2 object
+    :param supply3: This planet's deuterium synthesizer (default: None)
+    :type supply3: Supply3 object
+    :param supply4: This planet's solar plant (default: None)
+    :type supply4: Supply4 object
+    :param supply12: This planet's fusion plant (default: None)
+    :type supply12: Supply12 object
+    :param station14: This planet's robotics factory (default: None)
+    :type station14: Station14 object
+    :param station15: This planet's nanite factory (default: None)
+    :type station15: Station15 object
+    :param civil212: This planet's solar satellites (default: None)
+    :type civil212: Civil212 object
+    :param research113: This account's energy technology (default: None)
+    :type research113: Research113 object
+    :returns: list -- The build queue of a planet
+
+    Most of the parameters of this function are optional, but necessary. If
+    they are not specified while calling this function, they will be fetched.
+
+    The queue contains the next five levels of every mine. See
+    :py:func:`iter_planet_queue` for a queue without a fixed depth.
+    """
     queue = []
-    for i in range(1, 6):
-        # *** Metal Mine
-        # cost of this level
-        next_cost = costs_onepointfive(supply1.base_cost, supply1.level, offset=i)
-        # production of this level
-        next_metal_prod = get_metal_production(supply1.level + i, speed=speed)
-        next_metal_prod_mse = get_mse(
-            next_metal_prod,
-            trade
-        )
-        # energy (number of sats to determine the energy consumption)
-        this_energy = -1 * (planet_energy + next_metal_prod[3] - this_metal_prod[3])
-        required_sats = this_energy / sat_prod
+    for mine_queue in _planet_queues(planet, 5,
+                                     speed=speed,
+                                     trade=trade,
+                                     supply1=supply1,
+                                     supply2=supply2,
+                                     supply3=supply3,
+                                     supply4=supply4,
+                                     supply12=supply12,
+                                     station14=station14,
+                                     station15=station15,
+                                     civil212=civil212,
+                                     research113=research113):
+        queue.extend(mine_queue)
 
-        queue.append(queue_item(
-            supply1.id,
-            supply1.name,
-            supply1.level + i,
-            next_cost,
-            next_metal_prod_mse,
-            this_metal_prod_mse,
-            trade,
-            this_capacity,
-            next_capacity,
-            next_cap_cost_mse,
-            next_cap_time,
-            this_energy,
-            required_sats,
-            planet))
+    queue.sort()
 
-        this_metal_prod_mse = next_metal_prod_mse
+    return queue
 
-        # *** Crystal Mine
-        # cost of this level
-        next_cost = costs_onepointsix(supply2.base_cost, supply2.level, offset=i)
-        # production of this level
-        next_crystal_prod = get_crystal_production(supply2.level + i, speed=speed)
-        next_crystal_prod_mse = get_mse(
-            next_crystal_prod,
-            trade
-        )
-        # energy (number of sats to determine the energy consumption)
-        this_energy = -1 * (planet_energy + next_crystal_prod[3] - this_crystal_prod[3])
-        required_sats = this_energy / sat_prod
 
-        queue.append(queue_item(
-            supply2.id,
-            supply2.name,
-            supply2.level + i,
-            next_cost,
-            next_crystal_prod_mse,
-            this_crystal_prod_mse,
-            trade,
-            this_capacity,
-            next_capacity,
-            next_cap_cost_mse,
-            next_cap_time,
-            this_energy,
-            required_sats,
-            planet))
+def iter_planet_queue(planet, depth=None, **kwargs):
+    """Yields the queue of a planet, best item first
 
-        this_crystal_prod_mse = next_crystal_prod_mse
+    :param planet: The planet in question
+    :type planet: Planet object
+    :param depth: The number of levels of every mine or ``None`` for no limit (default: None)
+    :type depth: int
+    :returns: generator -- The queue items
 
-        # *** Deuterium Synthesizer
-        # cost of this level
-        next_cost = costs_onepointfive(supply3.base_cost, supply3.level, offset=i)
-        # production of this level
-        next_deut_prod = get_deuterium_production(supply3.level + i, temp=planet.max_temp, speed=speed)
-        next_deut_prod_mse = get_mse(
-            next_deut_prod,
-            trade
-        )
-        # energy (number of sats to determine the energy consumption)
-        this_energy = -1 * (planet_energy + next_deut_prod[3] - this_deut_prod[3])
-        required_sats = this_energy / sat_prod
+    The other parameters are the same as in :py:func:`get_planet_queue`.
 
-        queue.append(queue_item(
-            supply3.id,
-            supply3.name,
-            supply3.level + i,
-            next_cost,
-            next_deut_prod_mse,
-            this_deut_prod_mse,
-            trade,
-            this_capacity,
-            next_capacity,
-            next_cap_cost_mse,
-            next_cap_time,
-            this_energy,
-            required_sats,
-            planet))
+    The items are calculated on demand: the next level of a mine is only
+    calculated, when the previous level was taken from the queue. A level is
+    never yielded before the levels below it. Taking the first few items
+    costs the same for every depth.
+    """
+    return merge(*_planet_queues(planet, depth, **kwargs))
 
-        this_deut_prod_mse = next_deut_prod_mse
 
-    queue.sort()
+def _cached_queue(planet, key, build):
+    """Returns a queue of a planet from the cache or builds it
 
+    :param planet: The planet in question
+    :type planet: Planet object
+    :param key: The key of the queue (without the planet and the versions)
+    :type key: tuple
+    :param build: A function, that builds the queue
+    :type build: function
+    :returns: list -- The queue
+    """
+    backend = get_backend()
+    key = ('queue', planet.id) + key + (get_version('planet', planet.id),
+                                        get_version('account', planet.account_id))
+    queue = backend.get(key)
+    if queue is None:
+        queue = build()
+        backend.set(key, queue)
     return queue
 
 
+def get_cached_planet_queue(planet, **kwargs):
+    """Returns the queue for a given planet from the cache
+
+    :param planet: The planet in question
+    :type planet: Planet object
+    :returns: list -- The build queue of a planet
+
+    The parameters are the same as in :py:func:`get_planet_queue`; they are
+    only used (and fetched), if the queue is not cached. The cache is
+    invalidated by the state versions of the planet and its account (see
+    :py:mod:`oweb.libs.cache`).
+    """
+    return _cached_queue(planet, ('all',), lambda: get_planet_queue(planet, **kwargs))
+
+
+def get_cached_best_items(planet, count, **kwargs):
+    """Returns the first items of :py:func:`iter_planet_queue` from the cache
+
+    :param planet: The planet in question
+    :type planet: Planet object
+    :param count: The number of items
+    :type count: int
+    :returns: list -- The best items of this planet
+
+    See :py:func:`get_cached_planet_queue` for the other parameters.
+    """
+    return _cached_queue(planet, ('best', count),
+                         lambda: list(islice(iter_planet_queue(planet, depth=count, **kwargs), count)))
+
+
 def get_plasma_queue(account, research122=None, production=(0, 0, 0, 0)):
     """Returns the queue of plasma technology
 
@@ -382,3 +713,232 @@ def get_plasma_queue(account, research122=None, production=(0, 0, 0, 0)):
         this_prod = next_prod
 
     return queue
+
+
+def _get_snapshot(account, snapshot):
+    """Returns the given snapshot or creates one"""
+    if snapshot is None:
+        # imported here, because the snapshot uses the functions of this module
+        from oweb.libs.snapshot import AccountSnapshot
+        snapshot = AccountSnapshot(account, Planet.objects.filter(account_id=account.id))
+    return snapshot
+
+
+def _mine_output(states, speed, plasma, trade):
+    """Returns the energy values and the mine production of every planet
+
+    :returns: list -- ``(energy production without fusion, energy consumption, fusion level, fusion performance, mines in MSE)`` tuples
+
+    The mine production includes the plasma bonus, but no base income.
+    """
+    solar_table = get_production_table(get_solar_production)
+    output = []
+    for s in states:
+        metal = get_metal_production(s.metal_level, performance=s.metal_perf, speed=speed)
+        crystal = get_crystal_production(s.crystal_level, performance=s.crystal_perf, speed=speed)
+        deut = get_deuterium_production(s.deut_level, temp=s.max_temp, performance=s.deut_perf, speed=speed)
+        bonus = get_plasma_bonus(plasma, metal[0], crystal[1])
+        mines = get_mse((metal[0] + bonus[0], crystal[1] + bonus[1], deut[2]), trade)
+
+        energy = (round(solar_table[s.solar_level][3] * s.solar_perf) +
+                  get_sat_production(s.sat_count, temp=s.max_temp)[3])
+        consumption = -(metal[3] + crystal[3] + deut[3])
+        output.append((energy, consumption, s.fusion_level, s.fusion_perf, mines))
+    return output
+
+
+def _energy_prod(output, energy_level):
+    """Returns the mine production of all planets in MSE with a given energy technology
+
+    If a planet has not enough energy, its mines only produce the fraction of
+    their production, that is covered by the available energy.
+    """
+    fusion_table = get_production_table(get_fusion_production, energy=energy_level)
+    prod = 0.0
+    for energy, consumption, fusion_level, fusion_perf, mines in output:
+        available = energy + round(fusion_table[fusion_level][3] * fusion_perf)
+        if consumption <= available:
+            prod += mines
+        elif available > 0:
+            prod += mines * available / float(consumption)
+    return int(prod)
+
+
+def get_energy_queue(account, snapshot=None, depth=5):
+    """Returns the queue of energy technology
+
+    :param account: The account in question
+    :type account: Account object
+    :param snapshot: A snapshot of this account (default: None)
+    :type snapshot: AccountSnapshot object
+    :param depth: The number of levels (default: 5)
+    :type depth: int
+    :returns: list -- the energy queue
+
+    Energy technology raises the energy of every fusion plant. The gain is
+    the additional mine production of the planets, that do not have enough
+    energy. The planets are evaluated once; every level only looks up the
+    fusion energy of every planet.
+    """
+    snapshot = _get_snapshot(account, snapshot)
+    research113 = snapshot.get_research(Research113)
+    research122 = snapshot.get_research(Research122)
+    if not research113 or not research122:
+        raise OWebDoesNotExist
+
+    output = _mine_output([snapshot.get_planet_state(p) for p in snapshot.planets],
+                          snapshot.speed, research122.level, snapshot.trade)
+    this_prod = _energy_prod(output, research113.level)
+
+    queue = []
+
+    for i in range(1, depth + 1):
+        next_cost = costs_two(research113.base_cost, research113.level, offset=i)
+        next_prod = _energy_prod(output, research113.level + i)
+
+        queue.append(queue_item(
+            research113.id,
+            research113.name,
+            research113.level + i,
+            next_cost,
+            next_prod,
+            this_prod,
+            snapshot.trade,
+            None,
+            None,
+            None,
+            None,
+            0,
+            0,
+            account))
+
+        this_prod = next_prod
+
+    return queue
+
+
+def get_colonies(level):
+    """Returns the number of colonies, that a level of Astrophysics allows
+
+    :param level: The level of Astrophysics
+    :type level: int
+    :returns: int -- The number of colonies
+    """
+    return (level + 1) // 2
+
+
+def get_astrophysics_queue(account, snapshot=None, depth=3):
+    """Returns the queue of Astrophysics
+
+    :param account: The account in question
+    :type account: Account object
+    :param snapshot: A snapshot of this account (default: None)
+    :type snapshot: AccountSnapshot object
+    :param depth: The number of additional colonies (default: 3)
+    :type depth: int
+    :returns: list -- the Astrophysics queue
+
+    Only the levels, that allow an additional colony, are queued. Their costs
+    include the levels below, that do not allow a colony. A colony is valued
+    with the average production of the account's planets; its development is
+    priced with the average production points of the planets (added to the
+    metal costs).
+    """
+    snapshot = _get_snapshot(account, snapshot)
+    research124 = snapshot.get_research(Research124)
+    if not research124:
+        raise OWebDoesNotExist
+
+    trade = snapshot.trade
+    try:
+        average = get_mse(snapshot.get_production()[1], trade) / len(snapshot.planets)
+        development = sum(p[1] for p in snapshot.get_points()['planets'].values()) / len(snapshot.planets)
+    except ZeroDivisionError:
+        average = 0
+        development = 0
+
+    this_level = research124.level
+    this_prod = get_colonies(this_level) * average
+
+    queue = []
+
+    level = this_level
+    for i in range(0, depth):
+        # the next level, that allows another colony
+        level += 1
+        while get_colonies(level) == get_colonies(level - 1):
+            level += 1
+
+        next_cost = costs_rounded_range(research124.base_cost, research124.cost_modifier, this_level + 1, level)
+        next_cost = (next_cost[0] + development, next_cost[1], next_cost[2])
+        next_prod = get_colonies(level) * average
+
+        queue.append(queue_item(
+            research124.id,
+            research124.name,
+            level,
+            next_cost,
+            next_prod,
+            this_prod,
+            trade,
+            None,
+            None,
+            None,
+            None,
+            0,
+            0,
+            account))
+
+        this_level = level
+        this_prod = next_prod
+
+    return queue
+
+
+def get_research_queue(account, snapshot=None):
+    """Returns the queue of the economy related researches
+
+    :param account: The account in question
+    :type account: Account object
+    :param snapshot: A snapshot of this account (default: None)
+    :type snapshot: AccountSnapshot object
+    :returns: list -- the sorted queue of plasma technology, energy technology and Astrophysics
+    """
+    snapshot = _get_snapshot(account, snapshot)
+
+    queue = snapshot.get_plasma_queue(snapshot.get_production()[1])
+    queue += get_energy_queue(account, snapshot=snapshot)
+    queue += get_astrophysics_queue(account, snapshot=snapshot)
+    queue.sort()
+
+    return queue
+
+
+def get_account_queue(account, limit=20, per_planet=5, snapshot=None):
+    """Returns the queue of a whole account
+
+    :param account: The account in question
+    :type account: Account object
+    :param limit: The maximum number of items (default: 20)
+    :type limit: int
+    :param per_planet: The maximum number of items of every planet (default: 5)
+    :type per_planet: int
+    :param snapshot: A snapshot of this account (default: None)
+    :type snapshot: AccountSnapshot object
+    :returns: list -- The best items of all planets and the researches
+
+    If the snapshot is not specified, it will be created. All objects are
+    fetched at once, see :py:class:`oweb.libs.snapshot.AccountSnapshot`.
+
+    The queues of the planets are generated best item first (see
+    :py:func:`iter_planet_queue`) and cached (see
+    :py:func:`get_cached_best_items`). They are merged with a heap, that holds
+    one item of every planet. Only the first ``limit`` items are taken from
+    the merged queue.
+    """
+    snapshot = _get_snapshot(account, snapshot)
+
+    queues = [snapshot.get_best_items(p, per_planet) for p in snapshot.planets]
+    queues.append(get_research_queue(account, snapshot=snapshot))
+
+    return list(islice(merge(*queues), limit))
@@ -33,3 +33,18 @@ def get_list_or_404(klass, *args, **kwargs):
     if not obj_list:
         raise OWebDoesNotExist
     return obj_list
+
+def get_values_list_or_404(klass, fields, *args, **kwargs):
+    """
+    Uses filter() and values_list() to return a list of tuples, or raise a
+    Http404 exception if the list is empty.
+
+    klass may be a Model, Manager, or QuerySet object. fields is a tuple of
+    the field names to be fetched. All other passed arguments and keyword
+    arguments are used in the filter() query.
+    """
+    queryset = _get_queryset(klass)
+    obj_list = list(queryset.filter(*args, **kwargs).values_list(*fields))
+    if not obj_list:
+        raise OWebDoesNotExist
+    return obj_list
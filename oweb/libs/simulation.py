@@ -0,0 +1,466 @@
+"""
+Contains a simulation of build orders
+
+The queue (see :py:mod:`oweb.libs.queue`) scores every item on its own and
+assumes, that nothing else changes on the planet. This module simulates a
+sequence of builds over time: the account produces resources between the
+builds, every build has to wait until its costs are available and its planet
+is free, and its production is only added, when it is finished.
+
+The simulation works on compact states (see :py:func:`get_simulation_state`),
+not on model objects. A state holds the levels of the mines, the Robotics and
+Nanite Factories, the Solar Satellites and the energy balance of every planet
+and the level of Plasma Technology of the account.
+
+Some simplifications are made:
+
+* The resources of all planets are pooled.
+* The mines always work with full performance; an energy deficit is covered
+  by Solar Satellites, which are bought together with the mine.
+* Plasma Technology is researched with the capacity of the best planet.
+* Builds start in the order of the timeline.
+"""
+# Python imports
+from collections import namedtuple
+from heapq import heappush, heappop
+from math import ceil
+# app imports
+from oweb.exceptions import OWebDoesNotExist
+from oweb.models import Planet, Supply1, Supply2, Supply3, Supply4, Supply12, Station14, Station15, Civil212, Research113, Research122
+from oweb.libs.costs import costs_onepointfive, costs_onepointsix, costs_two
+from oweb.libs.production import get_metal_production, get_crystal_production, get_deuterium_production, get_solar_production, get_fusion_production, get_sat_production, get_plasma_bonus, get_capacity, get_production_table
+from oweb.libs.queue import get_mse
+from oweb.libs.snapshot import AccountSnapshot
+
+
+TimelineEntry = namedtuple('TimelineEntry', (
+    'start', 'finish', 'planet_id', 'name', 'level', 'cost', 'sats', 'gain'))
+"""A build of the simulated timeline
+
+``start`` and ``finish`` are hours from the beginning of the simulation.
+``planet_id`` is ``None`` for researches. ``cost`` is the resource tuple of
+the build (including the Solar Satellites), ``sats`` the number of Solar
+Satellites and ``gain`` the production gain in MSE per hour.
+"""
+
+METAL, CRYSTAL, DEUT, ROBO, NANI = range(0, 5)
+"""The indices of the levels of a planet"""
+
+_NAMES = {
+    METAL: Supply1,
+    CRYSTAL: Supply2,
+    DEUT: Supply3,
+    ROBO: Station14,
+    NANI: Station15,
+}
+"""Maps the indices of the levels to their classes"""
+
+_COSTS = {
+    METAL: costs_onepointfive,
+    CRYSTAL: costs_onepointsix,
+    DEUT: costs_onepointfive,
+    ROBO: costs_two,
+    NANI: costs_two,
+}
+"""Maps the indices of the levels to their cost functions"""
+
+
+class _Planet(object):
+    """The state of a planet in the simulation
+
+    ``data`` holds the values, that do not change during the simulation:
+    the planet's ID, its deuterium table, the energy of one Solar Satellite and
+    the deuterium consumption of the fusion plant.
+    """
+    __slots__ = ('data', 'levels', 'active', 'energy', 'sats', 'free', 'rate')
+
+    def copy(self):
+        planet = _Planet()
+        planet.data = self.data
+        planet.levels = self.levels[:]
+        planet.active = self.active[:]
+        planet.energy = self.energy
+        planet.sats = self.sats
+        planet.free = self.free
+        planet.rate = self.rate
+        return planet
+
+
+class SimulationState(object):
+    """The state of an account in the simulation
+
+    Use :py:func:`get_simulation_state` to create a state.
+    """
+    __slots__ = ('speed', 'trade', 'names', 'time', 'resources', 'planets',
+                 'plasma', 'plasma_active', 'research_free', 'pending', 'timeline')
+
+    def copy(self):
+        """Returns an independent copy of this state"""
+        state = SimulationState()
+        state.speed = self.speed
+        state.trade = self.trade
+        state.names = self.names
+        state.time = self.time
+        state.resources = self.resources[:]
+        state.planets = [p.copy() for p in self.planets]
+        state.plasma = self.plasma
+        state.plasma_active = self.plasma_active
+        state.research_free = self.research_free
+        state.pending = self.pending[:]
+        state.timeline = self.timeline[:]
+        return state
+
+    def get_rate(self):
+        """Returns the current production per hour"""
+        rate = [0, 0, 0]
+        for p in self.planets:
+            rate[0] += p.rate[0]
+            rate[1] += p.rate[1]
+            rate[2] += p.rate[2]
+        return rate
+
+
+def _mine_table(state, planet, kind):
+    """Returns the production table of a mine"""
+    if kind == METAL:
+        return get_production_table(get_metal_production, speed=state.speed)
+    if kind == CRYSTAL:
+        return get_production_table(get_crystal_production, speed=state.speed)
+    return planet.data[1]
+
+
+def _planet_rate(state, planet, levels, plasma):
+    """Returns the production per hour of a planet with the given mine levels"""
+    speed = state.speed
+    metal = _mine_table(state, planet, METAL)[levels[METAL]][0]
+    crystal = _mine_table(state, planet, CRYSTAL)[levels[CRYSTAL]][1]
+    deut = planet.data[1][levels[DEUT]][2] + planet.data[3]
+    bonus = get_plasma_bonus(plasma, metal, crystal)
+
+    return metal + bonus[0] + 30 * speed, crystal + bonus[1] + 15 * speed, deut
+
+
+def get_simulation_state(snapshot, resources=(0, 0, 0)):
+    """Returns the state of an account for the simulation
+
+    :param snapshot: A snapshot of the account
+    :type snapshot: AccountSnapshot object
+    :param resources: The available resources (default: (0, 0, 0))
+    :type resources: tuple
+    :returns: SimulationState -- The state
+    """
+    research113 = snapshot.get_research(Research113)
+    research122 = snapshot.get_research(Research122)
+    if research113 is None or research122 is None:
+        raise OWebDoesNotExist
+
+    state = SimulationState()
+    state.speed = snapshot.speed
+    state.trade = snapshot.trade
+    state.names = {}
+    state.time = 0.0
+    state.resources = list(resources)
+    state.planets = []
+    state.plasma = research122.level
+    state.plasma_active = research122.level
+    state.research_free = 0.0
+    state.pending = []
+    state.timeline = []
+    state.names[None] = research122.name
+
+    speed = state.speed
+    for p in snapshot.planets:
+        items = [snapshot.get_item(p, model) for model in (Supply1, Supply2, Supply3, Station14, Station15, Supply4, Supply12, Civil212)]
+        if None in items:
+            raise OWebDoesNotExist
+        supply1, supply2, supply3, station14, station15, supply4, supply12, civil212 = items
+        for i, item in enumerate(items[:5]):
+            state.names[i] = item.name
+
+        deut_table = get_production_table(get_deuterium_production, temp=p.max_temp, speed=speed)
+        fusion = get_production_table(get_fusion_production, speed=speed, energy=research113.level)[supply12.level]
+        sat_prod = get_sat_production(1, temp=p.max_temp)[3]
+
+        planet = _Planet()
+        planet.data = (p.id, deut_table, sat_prod, fusion[2])
+        planet.levels = [supply1.level, supply2.level, supply3.level, station14.level, station15.level]
+        planet.active = planet.levels[:3]
+        planet.sats = civil212.count
+        planet.energy = (get_production_table(get_solar_production)[supply4.level][3] + fusion[3] +
+                         planet.sats * sat_prod +
+                         get_production_table(get_metal_production, speed=speed)[supply1.level][3] +
+                         get_production_table(get_crystal_production, speed=speed)[supply2.level][3] +
+                         deut_table[supply3.level][3])
+        planet.free = 0.0
+        planet.rate = _planet_rate(state, planet, planet.active, state.plasma)
+        state.planets.append(planet)
+
+    return state
+
+
+def _advance(state, until):
+    """Accrues the production up to a given time and finishes the builds"""
+    while state.pending and state.pending[0][0] <= until:
+        finish, seq, index, kind, level = heappop(state.pending)
+        _accrue(state, finish)
+        if index is None:
+            state.plasma_active = level
+            for p in state.planets:
+                p.rate = _planet_rate(state, p, p.active, state.plasma_active)
+        elif kind < ROBO:
+            planet = state.planets[index]
+            planet.active[kind] = level
+            planet.rate = _planet_rate(state, planet, planet.active, state.plasma_active)
+    _accrue(state, until)
+
+
+def _accrue(state, until):
+    """Adds the production between the state's time and a given time"""
+    hours = until - state.time
+    if hours > 0:
+        rate = state.get_rate()
+        state.resources[0] += rate[0] * hours
+        state.resources[1] += rate[1] * hours
+        state.resources[2] += rate[2] * hours
+        state.time = until
+
+
+def _wait_for(state, cost, horizon):
+    """Advances the state until the costs are available
+
+    :returns: bool -- ``True``, if the costs are available before the horizon
+    """
+    while True:
+        rate = state.get_rate()
+        wait = 0.0
+        for have, need, r in zip(state.resources, cost, rate):
+            if have >= need:
+                continue
+            if r <= 0:
+                wait = None
+                break
+            wait = max(wait, (need - have) / float(r))
+
+        if state.pending and (wait is None or state.time + wait > state.pending[0][0]):
+            # the production changes before the costs are available
+            _advance(state, state.pending[0][0])
+            continue
+        if wait is None or state.time + wait > horizon:
+            return False
+        _advance(state, state.time + wait)
+        return True
+
+
+def _candidates(state):
+    """Returns the possible builds of a state, best score first
+
+    Every candidate is a tuple ``(score, index, kind, cost, sats, gain)``; the
+    index of the planet is ``None`` for Plasma Technology.
+    """
+    trade = state.trade
+    candidates = []
+    for index, p in enumerate(state.planets):
+        this_rate = get_mse(_planet_rate(state, p, p.levels, state.plasma), trade)
+        for kind in (METAL, CRYSTAL, DEUT):
+            level = p.levels[kind] + 1
+            cost = _COSTS[kind](_NAMES[kind].base_cost, p.levels[kind])
+
+            # the energy of this level and the satellites to cover it
+            table = _mine_table(state, p, kind)
+            energy = p.energy + table[level][3] - table[level - 1][3]
+            sats = 0
+            if energy < 0 and p.data[2] > 0:
+                sats = int(ceil(-energy / float(p.data[2])))
+                cost = (cost[0] + sats * Civil212.cost[0],
+                        cost[1] + sats * Civil212.cost[1],
+                        cost[2] + sats * Civil212.cost[2])
+
+            # the production of this level
+            levels = p.levels[:3]
+            levels[kind] = level
+            gain = get_mse(_planet_rate(state, p, levels, state.plasma), trade) - this_rate
+
+            candidates.append((_score(cost, gain, trade), index, kind, cost[:3], sats, gain))
+
+    # plasma technology
+    cost = costs_two(Research122.base_cost, state.plasma)
+    gain = 0
+    for p in state.planets:
+        gain += (get_mse(_planet_rate(state, p, p.levels, state.plasma + 1), trade) -
+                 get_mse(_planet_rate(state, p, p.levels, state.plasma), trade))
+    candidates.append((_score(cost, gain, trade), None, None, cost[:3], 0, gain))
+
+    candidates.sort()
+    return candidates
+
+
+def _score(cost, gain, trade):
+    """Returns the score of a build, see :py:func:`oweb.libs.queue.queue_item`"""
+    try:
+        return get_mse(cost, trade) / float(gain)
+    except ZeroDivisionError:
+        return float('inf')
+
+
+def _capacity_candidate(state, candidate):
+    """Returns the Robotics or Nanite Factory, if it pays off for a candidate
+
+    The decision is the same as in :py:func:`oweb.libs.queue.queue_item`: the
+    capacity is built first, if the saved time of the candidate, multiplied
+    with its gain, is worth the costs.
+    """
+    score, index, kind, cost, sats, gain = candidate
+    if index is None:
+        return None
+    p = state.planets[index]
+    if p.levels[ROBO] > 9:
+        cap_kind = NANI
+        next_capacity = get_capacity(p.levels[ROBO], p.levels[NANI] + 1, state.speed)
+    else:
+        cap_kind = ROBO
+        next_capacity = get_capacity(p.levels[ROBO] + 1, p.levels[NANI], state.speed)
+    this_capacity = get_capacity(p.levels[ROBO], p.levels[NANI], state.speed)
+
+    cap_cost = _COSTS[cap_kind](_NAMES[cap_kind].base_cost, p.levels[cap_kind])
+    cap_time = (cap_cost[0] + cap_cost[1] + cap_cost[2]) / float(this_capacity)
+    ress = cost[0] + cost[1] + cost[2]
+    cap_bonus = (ress / float(this_capacity) - (cap_time + ress / float(next_capacity))) * gain
+    if cap_bonus < get_mse(cap_cost, state.trade):
+        return None
+
+    return (score, index, cap_kind, cap_cost[:3], 0, 0)
+
+
+def _build(state, candidate, horizon):
+    """Applies a build to a state
+
+    :returns: bool -- ``True``, if the build starts before the horizon
+    """
+    score, index, kind, cost, sats, gain = candidate
+
+    if not _wait_for(state, cost, horizon):
+        return False
+    if index is None:
+        free = state.research_free
+    else:
+        free = state.planets[index].free
+    if free > horizon:
+        return False
+    if free > state.time:
+        _advance(state, free)
+
+    # build time, the capacity of the planet (or the best planet for researches)
+    if index is None:
+        capacity = max(get_capacity(p.levels[ROBO], p.levels[NANI], state.speed) for p in state.planets)
+    else:
+        p = state.planets[index]
+        capacity = get_capacity(p.levels[ROBO], p.levels[NANI], state.speed)
+    ress = cost[0] + cost[1] + cost[2] - sats * sum(Civil212.cost)
+    finish = state.time + ress / float(capacity)
+
+    for i in range(0, 3):
+        state.resources[i] -= cost[i]
+
+    if index is None:
+        state.plasma += 1
+        level = state.plasma
+        state.research_free = finish
+        planet_id = None
+    else:
+        p = state.planets[index]
+        p.levels[kind] += 1
+        level = p.levels[kind]
+        p.free = finish
+        planet_id = p.data[0]
+        if kind < ROBO:
+            table = _mine_table(state, p, kind)
+            p.energy += table[level][3] - table[level - 1][3] + sats * p.data[2]
+            p.sats += sats
+
+    heappush(state.pending, (finish, len(state.timeline), index, kind, level))
+    state.timeline.append(TimelineEntry(state.time, finish, planet_id, state.names[kind],
+                                        level, tuple(cost), sats, gain))
+    return True
+
+
+def _value(state, horizon):
+    """Returns the resources in MSE, that a state will have at the horizon
+
+    This is the rating of the beam search. Builds are not counted, only
+    resources and the production.
+    """
+    trade = state.trade
+    value = get_mse(state.resources, trade) + get_mse(state.get_rate(), trade) * (horizon - state.time)
+    for finish, seq, index, kind, level in state.pending:
+        gain = state.timeline[seq].gain
+        if finish < horizon:
+            value += gain * (horizon - finish)
+    return value
+
+
+def simulate(state, horizon=24 * 60, steps=30, width=1, branching=3):
+    """Simulates a build order
+
+    :param state: The state of the account, see :py:func:`get_simulation_state`
+    :type state: SimulationState object
+    :param horizon: The number of hours to simulate (default: 60 days)
+    :type horizon: int
+    :param steps: The maximum number of builds (default: 30)
+    :type steps: int
+    :param width: The number of states, that are kept in every step (default: 1)
+    :type width: int
+    :param branching: The number of candidates, that are tried for every state (default: 3)
+    :type branching: int
+    :returns: list -- The timeline, a list of TimelineEntry objects
+
+    With a ``width`` of 1, the simulation is greedy: it always builds the item
+    with the best score (like the first item of the queue). Otherwise, a beam
+    search is done: every state is continued with its ``branching`` best
+    candidates and the ``width`` states with the most resources at the horizon
+    are kept.
+
+    The given state is not modified.
+    """
+    beam = [state]
+    for step in range(0, steps):
+        next_beam = []
+        for s in beam:
+            candidates = _candidates(s)
+            if width == 1:
+                candidates = candidates[:1]
+            else:
+                candidates = candidates[:branching]
+            for candidate in candidates:
+                capacity = _capacity_candidate(s, candidate)
+                if capacity:
+                    candidate = capacity
+                next_state = s.copy()
+                if _build(next_state, candidate, horizon):
+                    next_beam.append(next_state)
+        if not next_beam:
+            break
+        next_beam.sort(key=lambda s: _value(s, horizon), reverse=True)
+        beam = next_beam[:width]
+
+    return max(beam, key=lambda s: _value(s, horizon)).timeline
+
+
+def simulate_account(account, days=60, steps=30, width=1, snapshot=None):
+    """Simulates the build order of an account
+
+    :param account: The account in question
+    :type account: Account object
+    :param days: The number of days to simulate (default: 60)
+    :type days: int
+    :param steps: The maximum number of builds (default: 30)
+    :type steps: int
+    :param width: The width of the beam search, 1 is greedy (default: 1)
+    :type width: int
+    :param snapshot: A snapshot of this account (default: None)
+    :type snapshot: AccountSnapshot object
+    :returns: list -- The timeline, see :py:func:`simulate`
+    """
+    if snapshot is None:
+        snapshot = AccountSnapshot(account, Planet.objects.filter(account_id=account.id))
+
+    return simulate(get_simulation_state(snapshot), horizon=days * 24, steps=steps, width=width)
@@ -0,0 +1,352 @@
+"""
+Contains a snapshot of a complete account
+
+The libraries in :py:mod:`oweb.libs` accept most of their objects as optional
+parameters and fetch them on their own, if they are not given. While this is
+convenient for single planets, it is expensive for whole accounts, because
+every planet will fetch its objects on its own.
+
+The :py:class:`AccountSnapshot` fetches all buildings, defense devices, ships
+and researches of an account at once and keeps them in memory. The objects are
+provided as instances of their *real* classes, so the cost calculations of
+the libraries will not trigger any additional queries.
+"""
+# app imports
+from oweb.models import Building, Defense, Moon, Research, Ship, Supply1, Supply2, Supply3, Supply4, Supply12, Station14, Station15, Civil212, Research113, Research122
+from oweb.exceptions import OWebDoesNotExist
+from oweb.models.polymorphic import downcast_all
+from oweb.libs.production import get_planet_production, get_planet_performance, get_planet_state, get_account_production, get_account_performance
+from oweb.libs.queue import get_planet_queue, iter_planet_queue, get_cached_planet_queue, get_cached_best_items, get_plasma_queue
+from oweb.libs.projection import iter_projection
+from oweb.libs.points import get_planet_points, get_moon_points, get_ship_points, get_research_points, collect_points
+
+
+class AccountSnapshot(object):
+    """Holds all objects of an account in memory
+
+    :param account: The account in question
+    :type account: Account object
+    :param planets: The planets of this account
+    :type planets: list of Planet objects
+
+    The snapshot fetches the moons, buildings, defense devices, ships and
+    researches of the account. The number of queries does not depend on the
+    number of planets.
+
+    The pages of a single planet provide only this planet; the snapshot then
+    holds the objects of this planet and its moon, that are shared by the
+    production, the queue and the points of the planet.
+    """
+
+    def __init__(self, account, planets):
+        self.account = account
+        """The account of this snapshot"""
+
+        self.planets = list(planets)
+        """The planets of this account"""
+
+        self.speed = account.speed
+        """This universe's speed"""
+
+        self.trade = (account.trade_metal, account.trade_crystal, account.trade_deut)
+        """A tuple with the account's trading rates"""
+
+        # moons
+        self.moons = {}
+        """Maps planet IDs to their moons"""
+        planets_by_id = dict((p.id, p) for p in self.planets)
+        for m in Moon.objects.filter(planet_id__in=planets_by_id.keys()):
+            m.planet = planets_by_id[m.planet_id]
+            self.moons[m.planet_id] = m
+
+        astro_ids = list(planets_by_id.keys()) + [m.id for m in self.moons.values()]
+
+        # buildings
+        self._buildings = {}
+        self._typed = {}
+        for b in downcast_all(Building.objects.filter(astro_object_id__in=astro_ids)):
+            self._buildings.setdefault(b.astro_object_id, []).append(b)
+            self._typed[(b.astro_object_id, b.__class__)] = b
+
+        # defense
+        self._defense = {}
+        for d in downcast_all(Defense.objects.filter(astro_object_id__in=astro_ids)):
+            self._defense.setdefault(d.astro_object_id, []).append(d)
+
+        # ships (including Solar Satellites)
+        self.ships = downcast_all(Ship.objects.filter(account_id=account.id))
+        """The ships of this account"""
+        for s in self.ships:
+            if isinstance(s, Civil212):
+                self._typed[(s.astro_object_id, Civil212)] = s
+
+        # research
+        self.research = downcast_all(Research.objects.filter(account_id=account.id),
+                                     type_field='real_class_id')
+        """The researches of this account"""
+        for r in self.research:
+            self._typed[(None, r.__class__)] = r
+
+        self._production = None
+        self._points = None
+
+    def get_moon(self, planet):
+        """Returns the moon of a planet or ``None``"""
+        return self.moons.get(planet.id)
+
+    def get_buildings(self, astro_object):
+        """Returns the list of buildings of a planet or moon"""
+        return self._buildings.get(astro_object.id, [])
+
+    def get_defense(self, astro_object):
+        """Returns the list of defense devices of a planet or moon"""
+        return self._defense.get(astro_object.id, [])
+
+    def get_item(self, astro_object, model):
+        """Returns a building or the Solar Satellites of a planet or moon
+
+        :param astro_object: The planet or moon in question
+        :type astro_object: AstronomicalObject
+        :param model: The class of the requested object
+        :type model: class
+        :returns: The object or ``None``
+        """
+        return self._typed.get((astro_object.id, model))
+
+    def get_research(self, model):
+        """Returns the research of a given class"""
+        return self._typed.get((None, model))
+
+    def _production_objects(self, planet):
+        """Returns the objects of a planet, that are needed for its production"""
+        return {
+            'supply1': self.get_item(planet, Supply1),
+            'supply2': self.get_item(planet, Supply2),
+            'supply3': self.get_item(planet, Supply3),
+            'supply4': self.get_item(planet, Supply4),
+            'supply12': self.get_item(planet, Supply12),
+            'civil212': self.get_item(planet, Civil212),
+            'research113': self.get_research(Research113),
+            'research122': self.get_research(Research122),
+        }
+
+    def get_planet_production(self, planet):
+        """Returns the production of a planet
+
+        See :py:func:`oweb.libs.production.get_planet_production`
+        """
+        return get_planet_production(planet, self.speed, **self._production_objects(planet))
+
+    def get_planet_performance(self, planet):
+        """Returns the best performances of a planet
+
+        See :py:func:`oweb.libs.production.get_planet_performance`
+        """
+        return get_planet_performance(planet, self.speed, trade=self.trade, **self._production_objects(planet))
+
+    def get_planet_state(self, planet):
+        """Returns the production related values of a planet
+
+        See :py:func:`oweb.libs.production.get_planet_state`
+        """
+        items = [self.get_item(planet, model) for model in (Supply1, Supply2, Supply3, Supply4, Supply12, Civil212)]
+        if None in items:
+            raise OWebDoesNotExist
+        return get_planet_state(planet, *items)
+
+    def get_production(self):
+        """Returns the production of all planets of this account
+
+        :returns: dict -- Maps planet IDs to their production, tuple -- the total production
+
+        The result is calculated once and kept.
+
+        See :py:func:`oweb.libs.production.get_account_production`
+        """
+        if self._production is not None:
+            return self._production
+
+        energy = self.get_research(Research113)
+        plasma = self.get_research(Research122)
+        if energy is None or plasma is None:
+            raise OWebDoesNotExist
+
+        production, total = get_account_production(
+            [self.get_planet_state(p) for p in self.planets],
+            self.speed,
+            energy=energy.level,
+            plasma=plasma.level)
+
+        self._production = dict((p.id, prod) for p, prod in zip(self.planets, production)), total
+        return self._production
+
+    def iter_projection(self, hours, step=1, upgrades=None, planets=None, resources=(0, 0, 0)):
+        """Yields the accumulated resources of this account over time
+
+        :param planets: The planets to project (default: all planets)
+        :type planets: list of Planet objects
+
+        See :py:func:`oweb.libs.projection.iter_projection` for the other
+        parameters and the result.
+        """
+        energy = self.get_research(Research113)
+        plasma = self.get_research(Research122)
+        if energy is None or plasma is None:
+            raise OWebDoesNotExist
+        if planets is None:
+            planets = self.planets
+
+        return iter_projection([self.get_planet_state(p) for p in planets],
+                               self.speed, hours,
+                               step=step,
+                               energy=energy.level,
+                               plasma=plasma.level,
+                               upgrades=upgrades,
+                               resources=resources)
+
+    def get_performance(self):
+        """Returns the best performances of all planets of this account
+
+        :returns: dict -- Maps planet IDs to PerformanceSettings objects
+
+        See :py:func:`oweb.libs.production.get_account_performance`
+        """
+        energy = self.get_research(Research113)
+        plasma = self.get_research(Research122)
+        if energy is None or plasma is None:
+            raise OWebDoesNotExist
+
+        settings = get_account_performance(
+            [self.get_planet_state(p) for p in self.planets],
+            self.speed,
+            energy=energy.level,
+            plasma=plasma.level,
+            trade=self.trade)
+
+        return dict((p.id, s) for p, s in zip(self.planets, settings))
+
+    def _queue_objects(self, planet):
+        """Returns the objects of a planet, that are needed for its queue"""
+        return {
+            'speed': self.speed,
+            'trade': self.trade,
+            'supply1': self.get_item(planet, Supply1),
+            'supply2': self.get_item(planet, Supply2),
+            'supply3': self.get_item(planet, Supply3),
+            'supply4': self.get_item(planet, Supply4),
+            'supply12': self.get_item(planet, Supply12),
+            'station14': self.get_item(planet, Station14),
+            'station15': self.get_item(planet, Station15),
+            'civil212': self.get_item(planet, Civil212),
+            'research113': self.get_research(Research113),
+        }
+
+    def get_planet_queue(self, planet):
+        """Returns the queue of a planet
+
+        See :py:func:`oweb.libs.queue.get_planet_queue`
+        """
+        return get_planet_queue(planet, **self._queue_objects(planet))
+
+    def iter_planet_queue(self, planet, depth=None):
+        """Yields the queue of a planet, best item first
+
+        See :py:func:`oweb.libs.queue.iter_planet_queue`
+        """
+        return iter_planet_queue(planet, depth=depth, **self._queue_objects(planet))
+
+    def get_cached_planet_queue(self, planet):
+        """Returns the queue of a planet from the cache
+
+        See :py:func:`oweb.libs.queue.get_cached_planet_queue`
+        """
+        return get_cached_planet_queue(planet, **self._queue_objects(planet))
+
+    def get_best_items(self, planet, count):
+        """Returns the best items of the queue of a planet
+
+        See :py:func:`oweb.libs.queue.get_cached_best_items`
+        """
+        return get_cached_best_items(planet, count, **self._queue_objects(planet))
+
+    def get_plasma_queue(self, production):
+        """Returns the queue of plasma technology
+
+        See :py:func:`oweb.libs.queue.get_plasma_queue`
+        """
+        return get_plasma_queue(self.account,
+                                research122=self.get_research(Research122),
+                                production=production)
+
+    def get_moon_points(self, moon):
+        """Returns the points of a moon
+
+        See :py:func:`oweb.libs.points.get_moon_points`
+        """
+        return get_moon_points(moon,
+                               buildings=self.get_buildings(moon),
+                               defense=self.get_defense(moon))
+
+    def get_planet_points(self, planet):
+        """Returns the points of a planet
+
+        See :py:func:`oweb.libs.points.get_planet_points`
+        """
+        moon = self.get_moon(planet)
+        if moon:
+            moon_points = self.get_moon_points(moon)
+        else:
+            moon_points = (0, 0, 0)
+
+        return get_planet_points(planet,
+                                 buildings=self.get_buildings(planet),
+                                 defense=self.get_defense(planet),
+                                 moon_points=moon_points)
+
+    def get_ship_points(self):
+        """Returns the points of this account's ships
+
+        See :py:func:`oweb.libs.points.get_ship_points`
+        """
+        return get_ship_points(self.account, ships=self.ships)
+
+    def get_research_points(self):
+        """Returns the points of this account's researches
+
+        See :py:func:`oweb.libs.points.get_research_points`
+        """
+        return get_research_points(self.account, research=self.research)
+
+    def get_points(self):
+        """Returns the points of this account
+
+        The points are calculated from the objects in memory, see
+        :py:func:`oweb.libs.points.get_account_points` for the result. The
+        result is calculated once and kept.
+        """
+        if self._points is not None:
+            return self._points
+
+        account_id = self.account.id
+        buildings = []
+        defense = []
+        for p in self.planets:
+            for b in self.get_buildings(p):
+                buildings.append((account_id, p.id, False, b.content_type_id, b.level))
+            for d in self.get_defense(p):
+                defense.append((account_id, p.id, False, d.content_type_id, d.count))
+            moon = self.get_moon(p)
+            if moon:
+                for b in self.get_buildings(moon):
+                    buildings.append((account_id, p.id, True, b.content_type_id, b.level))
+                for d in self.get_defense(moon):
+                    defense.append((account_id, p.id, True, d.content_type_id, d.count))
+
+        points = collect_points(
+            buildings,
+            defense,
+            [(account_id, s.content_type_id, s.count) for s in self.ships],
+            [(account_id, r.real_class_id, r.level) for r in self.research])
+
+        self._points = points.get(account_id, {'planets': {}, 'ships': (0, 0, 0), 'research': 0})
+        return self._points
@@ -23,6 +23,7 @@ from django.contrib.contenttypes.models import ContentType
 
 # app stuff
 from oweb.models.planet import AstronomicalObject
+from oweb.models.polymorphic import downcast
 from oweb.libs.costs import costs_two, costs_two_total, costs_onepointfive, costs_onepointfive_total, costs_onepointsix, costs_onepointsix_total, costs_onepointeight, costs_onepointeight_total, costs_twopointthree, costs_twopointthree_total
 
 
@@ -44,6 +45,9 @@ class Building(models.Model):
     base_cost = (0, 0, 0, 0)
     """The base costs of the building """
 
+    cost_modifier = 2.0
+    """The factor, by which the costs rise with every level """
+
     def get_next_cost(self):
         """Returns a tuple with the costs of the next level
 
@@ -87,11 +91,12 @@ class Building(models.Model):
         self.save_base()
 
     def as_real_class(self):
-        """Access the *real* class methods"""
-        model = self.content_type.model_class()
-        if model == Building:
-            return self
-        return model.objects.get(id=self.id)
+        """Access the *real* class methods
+
+        The object is converted in memory, see
+        :py:func:`oweb.models.polymorphic.downcast`.
+        """
+        return downcast(self, type_field='content_type_id')
 
     def __unicode__(self):
         return '{0}: {1}'.format(self.name, self.level)
@@ -107,6 +112,8 @@ class Building_onepointfive(Building):
     buildings.
     """
 
+    cost_modifier = 1.5
+
     def _calc_next_cost(self):
         """Calculates the cost of the next level of the building
 
@@ -130,6 +137,8 @@ class Building_onepointsix(Building):
     buildings.
     """
 
+    cost_modifier = 1.6
+
     def _calc_next_cost(self):
         """Calculates the cost of the next level of the building
 
@@ -153,6 +162,8 @@ class Building_onepointeight(Building):
     buildings.
     """
 
+    cost_modifier = 1.8
+
     def _calc_next_cost(self):
         """Calculates the cost of the next level of the building
 
@@ -176,6 +187,8 @@ class Building_twopointthree(Building):
     buildings.
     """
 
+    cost_modifier = 2.3
+
     def _calc_next_cost(self):
         """Calculates the cost of the next level of the building
 
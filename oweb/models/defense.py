@@ -5,6 +5,7 @@ from django.db import models
 from django.contrib.contenttypes.models import ContentType
 # app stuff
 from oweb.models.planet import AstronomicalObject
+from oweb.models.polymorphic import downcast
 
 
 class Defense(models.Model):
@@ -36,11 +37,12 @@ class Defense(models.Model):
         self.save_base()
 
     def as_real_class(self):
-        """Access the *real* class methods"""
-        model = self.content_type.model_class()
-        if model == Defense:
-            return self
-        return model.objects.get(id=self.id)
+        """Access the *real* class methods
+
+        The object is converted in memory, see
+        :py:func:`oweb.models.polymorphic.downcast`.
+        """
+        return downcast(self, type_field='content_type_id')
 
     def __unicode__(self):
         return '{0}: {1}'.format(self.name, self.count)
@@ -3,6 +3,7 @@ from django.db import models
 from django.contrib.contenttypes.models import ContentType
 # app imports
 from oweb.models import Account
+from oweb.models.polymorphic import downcast
 
 class AstronomicalObject(models.Model):
 
@@ -20,11 +21,12 @@ class AstronomicalObject(models.Model):
         self.save_base()
 
     def as_real_class(self):
-        """Access the "real" class methods"""
-        model = self.content_type.model_class()
-        if model == AstronomicalObject:
-            return self
-        return model.objects.get(id=self.id)
+        """Access the "real" class methods
+
+        The object is converted in memory, see
+        :py:func:`oweb.models.polymorphic.downcast`.
+        """
+        return downcast(self)
 
     def __unicode__(self):
         return '{0}'.format(self.name)
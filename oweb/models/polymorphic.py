@@ -0,0 +1,135 @@
+"""Contains the conversion of objects to their *real* classes
+
+The base classes :py:class:`oweb.models.building.Building`,
+:py:class:`oweb.models.research.Research`, :py:class:`oweb.models.ship.Ship`,
+:py:class:`oweb.models.defense.Defense` and
+:py:class:`oweb.models.planet.AstronomicalObject` store the ContentType of
+their *real* class. Most of these classes only differ in their costs, so an
+object can be converted without fetching it again: the *real* class is
+swapped in memory.
+
+Only classes, that add own columns (i.e. :py:class:`oweb.models.building.Supply1`
+with its ``performance``), need a query to fetch these columns. For a list of
+objects, this is one query per class.
+"""
+# Django imports
+from django.contrib.contenttypes.models import ContentType
+
+
+_real_classes = {}
+"""Maps the IDs of ContentType objects to the *real* classes"""
+
+
+def get_real_class(content_type_id):
+    """Returns the *real* class of a given ContentType ID
+
+    :param content_type_id: The ID of the ContentType
+    :type content_type_id: int
+    :returns: class -- The model class
+
+    All ContentType objects of this app are fetched with one query, if an
+    unknown ID is requested. The mapping is kept for the lifetime of the
+    process.
+    """
+    try:
+        return _real_classes[content_type_id]
+    except KeyError:
+        pass
+
+    for ct in ContentType.objects.filter(app_label='oweb'):
+        _real_classes[ct.id] = ct.model_class()
+    if content_type_id not in _real_classes:
+        _real_classes[content_type_id] = ContentType.objects.get_for_id(content_type_id).model_class()
+
+    return _real_classes[content_type_id]
+
+
+def get_extra_fields(model):
+    """Returns the attribute names of the columns, that a class adds to its parent
+
+    :param model: The model class
+    :type model: class
+    :returns: list -- The attribute names
+    """
+    return [f.attname for f in model._meta.local_fields if not f.primary_key]
+
+
+def _convert(obj, model):
+    """Returns a copy of ``obj`` as instance of ``model``
+
+    The columns of ``model`` are not populated. Only the columns and the
+    cached related objects of the base class are copied; cached reverse
+    relations may collide with the fields of ``model`` (i.e. the reverse
+    relation ``AstronomicalObject.planet`` and the field ``Moon.planet``).
+    """
+    real = model.__new__(model)
+    for f in obj._meta.concrete_fields:
+        if f.attname in obj.__dict__:
+            real.__dict__[f.attname] = obj.__dict__[f.attname]
+        if f.rel and f.get_cache_name() in obj.__dict__:
+            real.__dict__[f.get_cache_name()] = obj.__dict__[f.get_cache_name()]
+    real._state = obj._state.__class__(db=obj._state.db)
+    real._state.adding = obj._state.adding
+    for ptr in model._meta.parents.values():
+        if ptr:
+            setattr(real, ptr.attname, obj.pk)
+    return real
+
+
+def downcast(obj, type_field='content_type_id'):
+    """Returns an object as instance of its *real* class
+
+    :param obj: The object to be converted
+    :type obj: Model instance
+    :param type_field: The attribute, that stores the ContentType ID
+    :type type_field: string
+    :returns: The converted object
+
+    If the object already is an instance of its *real* class, it is returned
+    without modification.
+    """
+    model = get_real_class(getattr(obj, type_field))
+    if isinstance(obj, model):
+        return obj
+
+    real = _convert(obj, model)
+    fields = get_extra_fields(model)
+    if fields:
+        row = model._base_manager.filter(pk=obj.pk).values_list(*fields).get()
+        for field, value in zip(fields, row):
+            setattr(real, field, value)
+
+    return real
+
+
+def downcast_all(objects, type_field='content_type_id'):
+    """Returns a list of objects as instances of their *real* classes
+
+    :param objects: The objects to be converted
+    :type objects: list or QuerySet
+    :param type_field: The attribute, that stores the ContentType ID
+    :type type_field: string
+    :returns: list -- The converted objects
+
+    The additional columns are fetched with one query per class.
+    """
+    real_objects = []
+    extra = {}
+    for obj in objects:
+        model = get_real_class(getattr(obj, type_field))
+        if isinstance(obj, model):
+            real_objects.append(obj)
+            continue
+
+        real = _convert(obj, model)
+        real_objects.append(real)
+        if get_extra_fields(model):
+            extra.setdefault(model, {})[real.pk] = real
+
+    for model, by_pk in extra.items():
+        fields = get_extra_fields(model)
+        for row in model._base_manager.filter(pk__in=by_pk.keys()).values_list('pk', *fields):
+            for field, value in zip(fields, row[1:]):
+                setattr(by_pk[row[0]], field, value)
+
+    return real_objects
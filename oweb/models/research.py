@@ -1,13 +1,12 @@
 """This module contains all research related classes."""
 
-# Python imports
-from math import floor
 # Django imports
 from django.db import models
 from django.contrib.contenttypes.models import ContentType
 # app imports
 from oweb.models import Account
-from oweb.libs.costs import costs_two, costs_two_total, costs_total
+from oweb.models.polymorphic import downcast
+from oweb.libs.costs import costs_two, costs_two_total, costs_total, costs_rounded
 
 
 class Research(models.Model):
@@ -28,6 +27,9 @@ class Research(models.Model):
     base_cost = (0, 0, 0, 0)
     """The base costs of the research"""
 
+    cost_modifier = 2.0
+    """The factor, by which the costs rise with every level"""
+
     def get_next_cost(self):
         """Returns a tuple with the costs of the next level
 
@@ -71,11 +73,12 @@ class Research(models.Model):
         self.save_base()
 
     def as_real_class(self):
-        """Access the *real* class methods"""
-        model = self.real_class.model_class()
-        if model == Research:
-            return self
-        return model.objects.get(id=self.id)
+        """Access the *real* class methods
+
+        The object is converted in memory, see
+        :py:func:`oweb.models.polymorphic.downcast`.
+        """
+        return downcast(self, type_field='real_class_id')
 
     def __unicode__(self):
         return '{0}: {1}'.format(self.name, self.level)
@@ -255,6 +258,7 @@ class Research123(Research):
 class Research124(Research):
     """Research **Astrophysics**"""
     base_cost = (4000, 8000, 4000, 0)
+    cost_modifier = 1.75
 
     def __init__(self, *args, **kwargs):
         self._meta.get_field('name').default = 'Astrophysics'
@@ -269,13 +273,10 @@ class Research124(Research):
 
         The formulas are taken from owiki.de
         """
-        metal = int(100 * (floor(0.5 + (self.base_cost[0] / 100) * 1.75 ** self.level)))
-        crystal = int(100 * (floor(0.5 + (self.base_cost[1] / 100) * 1.75 ** self.level)))
-        deut = int(100 * (floor(0.5 + (self.base_cost[2] / 100) * 1.75 ** self.level)))
-        return (metal, crystal, deut, 0)
+        return costs_rounded(self.base_cost, self.cost_modifier, self.level + 1) + (0,)
 
     def _calc_total_cost(self):
-        return costs_total(self.base_cost, 1.75, self.level)
+        return costs_total(self.base_cost, self.cost_modifier, self.level)
 
     class Meta:
         app_label = 'oweb'
@@ -4,6 +4,7 @@ from django.db import models
 from django.contrib.contenttypes.models import ContentType
 # app stuff
 from oweb.models import Account, AstronomicalObject
+from oweb.models.polymorphic import downcast
 
 
 class Ship(models.Model):
@@ -35,11 +36,12 @@ class Ship(models.Model):
         self.save_base()
 
     def as_real_class(self):
-        """Access the *real* class methods"""
-        model = self.content_type.model_class()
-        if model == Ship:
-            return self
-        return model.objects.get(id=self.id)
+        """Access the *real* class methods
+
+        The object is converted in memory, see
+        :py:func:`oweb.models.polymorphic.downcast`.
+        """
+        return downcast(self, type_field='content_type_id')
 
     def __unicode__(self):
         return '{0}: {1}'.format(self.name, self.count)
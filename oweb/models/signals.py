@@ -2,6 +2,8 @@
 # Python imports
 from functools import wraps
 # Django imports
+from django.contrib.contenttypes.models import ContentType
+from django.db import router, transaction
 from django.db.models import signals
 # app imports
 from oweb.models import Account, Planet, Moon
@@ -9,6 +11,9 @@ from oweb.models.research import *
 from oweb.models.ship import *
 from oweb.models.building import *
 from oweb.models.defense import *
+from oweb.models.polymorphic import get_real_class
+from oweb.libs.cache import bump_version
+from oweb.libs.navigation import bump_navigation, get_account_id
 
 
 def disable_for_loaddata(signal_handler):
@@ -20,42 +25,88 @@ def disable_for_loaddata(signal_handler):
     return wrapper
 
 
+ACCOUNT_RESEARCH = (Research106, Research108, Research109, Research110, Research111,
+                    Research113, Research114, Research115, Research117, Research118,
+                    Research120, Research121, Research122, Research123, Research124,
+                    Research199)
+"""The researches of a new account"""
+
+ACCOUNT_SHIPS = (Military204, Military205, Military206, Military207, Military215,
+                 Military211, Military213, Military214,
+                 Civil202, Civil203, Civil208, Civil209, Civil210)
+"""The ships of a new account (Solar Satellites belong to the planets)"""
+
+PLANET_BUILDINGS = (Supply1, Supply2, Supply3, Supply4, Supply12,
+                    Supply22, Supply23, Supply24, Supply25, Supply26, Supply27,
+                    Station14, Station15, Station21, Station31, Station33, Station34, Station44)
+"""The buildings of a new planet"""
+
+MOON_BUILDINGS = (Supply22, Supply23, Supply24, Supply25, Supply26, Supply27,
+                  Station14, Station21, Station41, Station42, Station43)
+"""The buildings of a new moon"""
+
+PLANET_DEFENSE = (Defense401, Defense402, Defense403, Defense404, Defense405,
+                  Defense406, Defense407, Defense408, Defense502, Defense503)
+"""The defense devices of a new planet"""
+
+MOON_DEFENSE = (Defense401, Defense402, Defense403, Defense404, Defense405,
+                Defense406, Defense407, Defense408)
+"""The defense devices of a new moon"""
+
+
+def bulk_create_items(base, models, type_field='content_type', **values):
+    """Creates one object of every given class
+
+    :param base: The base class, i.e. :py:class:`Building`
+    :type base: class
+    :param models: The *real* classes, that are derived from ``base``
+    :type models: list of classes
+    :param type_field: The field of ``base``, that stores the *real* class (default: 'content_type')
+    :type type_field: string
+    :param values: The values of the new objects, i.e. ``astro_object``
+
+    The rows of the base class are inserted with one query and their IDs are
+    fetched with another one. Every *real* class has its own table, so its
+    row needs one more query. The ContentType objects are resolved at once
+    and the objects' ``save()`` methods are not called, so no signals are
+    sent.
+
+    The values must identify the new objects, i.e. there may not be other
+    objects of these classes with the same values.
+    """
+    content_types = ContentType.objects.get_for_models(*models)
+    objects = [model(**values) for model in models]
+
+    # the rows of the base class
+    base_fields = [f.attname for f in base._meta.concrete_fields if not f.primary_key]
+    rows = []
+    for model, obj in zip(models, objects):
+        setattr(obj, type_field, content_types[model])
+        rows.append(base(**dict((f, getattr(obj, f)) for f in base_fields)))
+    base.objects.bulk_create(rows)
+
+    ids = dict(base.objects.filter(**{type_field + '__in': content_types.values()})
+                           .filter(**values)
+                           .values_list(type_field + '_id', 'pk'))
+
+    # the rows of the real classes
+    db = router.db_for_write(base)
+    for model, obj in zip(models, objects):
+        obj.pk = ids[content_types[model].id]
+        model._base_manager._insert([obj], fields=model._meta.local_concrete_fields, using=db)
+
+    return objects
+
+
 @disable_for_loaddata
 def callback_create_account(sender, instance, created, **kwargs):
     """Creates :py:class:`Research` and :py:class:`Ship` objects after account creation"""
     if created:
-        Research106.objects.create(account=instance)
-        Research108.objects.create(account=instance)
-        Research109.objects.create(account=instance)
-        Research110.objects.create(account=instance)
-        Research111.objects.create(account=instance)
-        Research113.objects.create(account=instance)
-        Research114.objects.create(account=instance)
-        Research115.objects.create(account=instance)
-        Research117.objects.create(account=instance)
-        Research118.objects.create(account=instance)
-        Research120.objects.create(account=instance)
-        Research121.objects.create(account=instance)
-        Research122.objects.create(account=instance)
-        Research123.objects.create(account=instance)
-        Research124.objects.create(account=instance)
-        Research199.objects.create(account=instance)
-
-        Military204.objects.create(account=instance)
-        Military205.objects.create(account=instance)
-        Military206.objects.create(account=instance)
-        Military207.objects.create(account=instance)
-        Military215.objects.create(account=instance)
-        Military211.objects.create(account=instance)
-        Military213.objects.create(account=instance)
-        Military214.objects.create(account=instance)
-        Civil202.objects.create(account=instance)
-        Civil203.objects.create(account=instance)
-        Civil208.objects.create(account=instance)
-        Civil209.objects.create(account=instance)
-        Civil210.objects.create(account=instance)
-
-        Planet.objects.create(account=instance, name='Homeworld')
+        with transaction.atomic():
+            bulk_create_items(Research, ACCOUNT_RESEARCH, type_field='real_class', account=instance)
+            bulk_create_items(Ship, ACCOUNT_SHIPS, account=instance)
+
+            Planet.objects.create(account=instance, name='Homeworld')
 
 
 @disable_for_loaddata
@@ -63,64 +114,19 @@ def callback_create_planet(sender, instance, created, **kwargs):
     """Creates :py:class:`Building`, :py:class:`Defense` and
     :py:class:`Civil212` objects after planet creation"""
     if created:
-        Supply1.objects.create(astro_object=instance)
-        Supply2.objects.create(astro_object=instance)
-        Supply3.objects.create(astro_object=instance)
-        Supply4.objects.create(astro_object=instance)
-        Supply12.objects.create(astro_object=instance)
-        Supply22.objects.create(astro_object=instance)
-        Supply23.objects.create(astro_object=instance)
-        Supply24.objects.create(astro_object=instance)
-        Supply25.objects.create(astro_object=instance)
-        Supply26.objects.create(astro_object=instance)
-        Supply27.objects.create(astro_object=instance)
-        Station14.objects.create(astro_object=instance)
-        Station15.objects.create(astro_object=instance)
-        Station21.objects.create(astro_object=instance)
-        Station31.objects.create(astro_object=instance)
-        Station33.objects.create(astro_object=instance)
-        Station34.objects.create(astro_object=instance)
-        Station44.objects.create(astro_object=instance)
-
-        Civil212.objects.create(account=instance.account, astro_object=instance)
-
-        Defense401.objects.create(astro_object=instance)
-        Defense402.objects.create(astro_object=instance)
-        Defense403.objects.create(astro_object=instance)
-        Defense404.objects.create(astro_object=instance)
-        Defense405.objects.create(astro_object=instance)
-        Defense406.objects.create(astro_object=instance)
-        Defense407.objects.create(astro_object=instance)
-        Defense408.objects.create(astro_object=instance)
-        Defense502.objects.create(astro_object=instance)
-        Defense503.objects.create(astro_object=instance)
+        with transaction.atomic():
+            bulk_create_items(Building, PLANET_BUILDINGS, astro_object=instance)
+            Civil212.objects.create(account=instance.account, astro_object=instance)
+            bulk_create_items(Defense, PLANET_DEFENSE, astro_object=instance)
 
 
 @disable_for_loaddata
 def callback_create_moon(sender, instance, created, **kwargs):
     if created:
-        Supply22.objects.create(astro_object=instance)
-        Supply23.objects.create(astro_object=instance)
-        Supply24.objects.create(astro_object=instance)
-        Supply25.objects.create(astro_object=instance)
-        Supply26.objects.create(astro_object=instance)
-        Supply27.objects.create(astro_object=instance)
-        Station14.objects.create(astro_object=instance)
-        Station21.objects.create(astro_object=instance)
-        Station41.objects.create(astro_object=instance)
-        Station42.objects.create(astro_object=instance)
-        Station43.objects.create(astro_object=instance)
-
-        Civil212.objects.create(account=instance.planet.account, astro_object=instance)
-
-        Defense401.objects.create(astro_object=instance)
-        Defense402.objects.create(astro_object=instance)
-        Defense403.objects.create(astro_object=instance)
-        Defense404.objects.create(astro_object=instance)
-        Defense405.objects.create(astro_object=instance)
-        Defense406.objects.create(astro_object=instance)
-        Defense407.objects.create(astro_object=instance)
-        Defense408.objects.create(astro_object=instance)
+        with transaction.atomic():
+            bulk_create_items(Building, MOON_BUILDINGS, astro_object=instance)
+            Civil212.objects.create(account=instance.planet.account, astro_object=instance)
+            bulk_create_items(Defense, MOON_DEFENSE, astro_object=instance)
 
 
 @disable_for_loaddata
@@ -133,6 +139,50 @@ def callback_update_moon_coord(sender, instance, **kwargs):
         pass
 
 
+def callback_bump_version(sender, instance, **kwargs):
+    """Bumps the state versions of the cached results
+
+    The queue depends on the buildings and Solar Satellites of a planet, its
+    temperature, the account's speed and trading rates and the levels of
+    energy and plasma technology. See :py:mod:`oweb.libs.cache`.
+    """
+    if isinstance(instance, Building):
+        bump_version('planet', instance.astro_object_id)
+    elif isinstance(instance, Civil212):
+        bump_version('planet', instance.astro_object_id)
+    elif isinstance(instance, Ship):
+        # the planet of a Solar Satellite is only known to the real class
+        if instance.content_type_id and get_real_class(instance.content_type_id) is Civil212:
+            bump_version('account', instance.account_id)
+    elif isinstance(instance, Research):
+        if instance.real_class_id and get_real_class(instance.real_class_id) in (Research113, Research122):
+            bump_version('account', instance.account_id)
+    elif isinstance(instance, Planet):
+        bump_version('planet', instance.id)
+    elif isinstance(instance, Account):
+        bump_version('account', instance.id)
+
+
+def callback_bump_navigation(sender, instance, **kwargs):
+    """Drops the cached navigation of the account of a planet or moon
+
+    See :py:mod:`oweb.libs.navigation`.
+    """
+    if kwargs.get('raw'):
+        return
+    if isinstance(instance, Moon):
+        # a deleted planet drops the navigation on its own
+        account_id = get_account_id(instance.planet_id)
+    else:
+        account_id = instance.account_id
+
+    if 'created' in kwargs:
+        bump_navigation(account_id)
+    else:
+        # the object was deleted
+        bump_navigation(account_id, instance.id)
+
+
 # Register the callbacks
 signals.post_save.connect(callback_create_account,
                           sender=Account,
@@ -153,3 +203,31 @@ signals.post_save.connect(callback_create_moon,
                           sender=Moon,
                           weak=False,
                           dispatch_uid='models.callback_create_moon')
+
+signals.post_save.connect(callback_bump_version,
+                          weak=False,
+                          dispatch_uid='models.callback_bump_version')
+
+signals.post_delete.connect(callback_bump_version,
+                            weak=False,
+                            dispatch_uid='models.callback_bump_version')
+
+signals.post_save.connect(callback_bump_navigation,
+                          sender=Planet,
+                          weak=False,
+                          dispatch_uid='models.callback_bump_navigation_planet')
+
+signals.post_save.connect(callback_bump_navigation,
+                          sender=Moon,
+                          weak=False,
+                          dispatch_uid='models.callback_bump_navigation_moon')
+
+signals.post_delete.connect(callback_bump_navigation,
+                            sender=Planet,
+                            weak=False,
+                            dispatch_uid='models.callback_bump_navigation_planet')
+
+signals.post_delete.connect(callback_bump_navigation,
+                            sender=Moon,
+                            weak=False,
+                            dispatch_uid='models.callback_bump_navigation_moon')
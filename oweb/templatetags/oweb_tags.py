@@ -18,3 +18,19 @@ def daily_production(value):
 @register.filter
 def points(value):
     return value / 1000
+
+@register.filter
+def percentage(value):
+    """Converts a performance into a percentage"""
+    return int(round(value * 100))
+
+@register.filter
+def duration(value):
+    """Formats a number of hours as days, hours, minutes and seconds"""
+    seconds = int(round(value * 3600))
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if days:
+        return '{0}d {1:02d}:{2:02d}:{3:02d}'.format(days, hours, minutes, seconds)
+    return '{0:02d}:{1:02d}:{2:02d}'.format(hours, minutes, seconds)
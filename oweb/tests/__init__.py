@@ -1,8 +1,22 @@
 # Django imports
 from django.test import TestCase
+# app imports
+from oweb.libs.cache import reset_backend
 
 
-class OWebViewTests(TestCase):
+class OWebTestCase(TestCase):
+    """Provides a fresh cache for every test
+
+    The database is rolled back after every test, but the cached results are
+    not, so the cache is dropped.
+    """
+
+    def _pre_setup(self):
+        reset_backend()
+        super(OWebTestCase, self)._pre_setup()
+
+
+class OWebViewTests(OWebTestCase):
     """Provides view related tests"""
     fixtures = ['oweb_testdata_01.json']
 
@@ -13,3 +27,13 @@ class OWebViewTests(TestCase):
         self.urls = patterns('',
             url(r'', include('oweb.urls', namespace='oweb')),
         )
+
+
+class OWebModelTests(OWebTestCase):
+    """Provides model related tests"""
+    fixtures = ['oweb_testdata_01.json']
+
+
+class OWebLibTests(OWebTestCase):
+    """Provides library related tests"""
+    fixtures = ['oweb_testdata_01.json']
@@ -0,0 +1,34 @@
+"""Contains tests for oweb.libs.cache"""
+# Django imports
+from django.test import SimpleTestCase
+# app imports
+from oweb.libs.cache import LRUCache
+
+
+class OWebLibsCacheTests(SimpleTestCase):
+
+    def test_eviction(self):
+        """Does the cache evict the least recently used entry?"""
+        c = LRUCache(maxsize=2)
+        c.set('a', 1)
+        c.set('b', 2)
+        self.assertEqual(c.get('a'), 1)
+        c.set('c', 3)
+        self.assertEqual(len(c), 2)
+        self.assertTrue('a' in c)
+        self.assertFalse('b' in c)
+        self.assertEqual(c.info()['evictions'], 1)
+
+    def test_counters(self):
+        """Does the cache count hits and misses?"""
+        c = LRUCache()
+        self.assertEqual(c.get('a'), None)
+        c.set('a', 1)
+        self.assertEqual(c.get('a'), 1)
+        self.assertEqual(c.get('a'), 1)
+        info = c.info()
+        self.assertEqual((info['hits'], info['misses']), (2, 1))
+        self.assertAlmostEqual(info['ratio'], 2 / 3.0)
+        c.clear()
+        self.assertEqual(c.info()['hits'], 0)
+        self.assertEqual(len(c), 0)
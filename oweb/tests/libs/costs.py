@@ -0,0 +1,120 @@
+"""Contains tests for oweb.libs.costs"""
+# Django imports
+from django.test import SimpleTestCase
+# app imports
+from oweb.libs import costs
+
+
+class OWebLibsCostsTests(SimpleTestCase):
+
+    def setUp(self):
+        costs.clear_cost_tables()
+
+    def test_cost_table(self):
+        """Does the cost table return the calculated costs?"""
+        for modifier in (1.5, 1.6, 1.75, 1.8, 2.0, 2.3):
+            for level in range(0, 40):
+                self.assertEqual(costs.costs((60, 15, 0, 0), modifier, level),
+                                 costs._calc_costs((60, 15, 0, 0), modifier, level))
+                self.assertEqual(costs.costs_total((900, 360, 180, 0), modifier, level),
+                                 costs._calc_costs_total((900, 360, 180, 0), modifier, level))
+
+    def test_hits(self):
+        """Does the cost table count hits and misses?"""
+        costs.costs_onepointfive((60, 15, 0, 0), 10)
+        costs.costs_onepointfive((60, 15, 0, 0), 10)
+        costs.costs_onepointfive_total((60, 15, 0, 0), 10)
+        info = costs.cost_table_info()
+        self.assertEqual(info['hits'], 1)
+        self.assertEqual(info['misses'], 2)
+        self.assertEqual(info['size'], 2)
+
+        # the queue asks for the same levels again and again
+        for i in range(0, 10):
+            for level in range(0, 40):
+                costs.costs((60, 15, 0, 0), 1.5, level)
+        info = costs.cost_table_info()
+        self.assertTrue(info['hits'] / float(info['hits'] + info['misses']) > 0.85)
+
+    def test_size(self):
+        """Does the cost table stay bounded?"""
+        count = costs.COST_TABLE_SIZE // 40 + 10
+        for base in range(0, count):
+            for level in range(0, 40):
+                costs.costs((base, 15, 0, 0), 1.5, level)
+        info = costs.cost_table_info()
+        self.assertEqual(info['costs'], costs.COST_TABLE_SIZE)
+        self.assertEqual(info['evictions'], count * 40 - costs.COST_TABLE_SIZE)
+        self.assertEqual(info['misses'], count * 40)
+
+        # unhashable base costs are calculated
+        self.assertEqual(costs.costs([60, 15, 0, 0], 1.5, 10), costs._calc_costs((60, 15, 0, 0), 1.5, 10))
+
+    def _assert_batch(self, batch, scalar, base_costs, levels):
+        result = batch(base_costs, levels)
+        self.assertEqual(len(result), len(levels))
+        for row, base_cost, level in zip(result, base_costs, levels):
+            self.assertEqual(tuple(int(x) for x in row), scalar(base_cost, level))
+
+    def test_batch(self):
+        """Do the batch functions match the scalar functions to the unit?"""
+        base_costs = [(60, 15, 0, 0), (48, 24, 0, 0), (225, 75, 0, 0), (900, 360, 180, 0),
+                      (2645, 1322, 0, 0), (1000000, 500000, 100000, 0), (240000, 400000, 160000, 0)]
+        levels = range(0, 45)
+        all_base_costs = [b for b in base_costs for l in levels]
+        all_levels = [l for b in base_costs for l in levels]
+        for name in ('onepointfive', 'onepointsix', 'onepointeight', 'two', 'twopointthree'):
+            self._assert_batch(getattr(costs, 'costs_%s_batch' % name),
+                               getattr(costs, 'costs_%s' % name),
+                               all_base_costs, all_levels)
+            self._assert_batch(getattr(costs, 'costs_%s_total_batch' % name),
+                               getattr(costs, 'costs_%s_total' % name),
+                               all_base_costs, all_levels)
+
+    def test_batch_fallback(self):
+        """Do the batch functions work without NumPy?"""
+        numpy = costs.numpy
+        costs.numpy = None
+        try:
+            self._assert_batch(costs.costs_two_total_batch, costs.costs_two_total,
+                               [(400, 120, 200, 0)] * 3, [0, 5, 10])
+        finally:
+            costs.numpy = numpy
+
+    def test_batch_empty(self):
+        """Do the batch functions handle empty input?"""
+        self.assertEqual(len(costs.costs_two_batch([], [])), 0)
+
+    def test_range(self):
+        """Does a range cost the same as its single levels?"""
+        for modifier in (1.5, 1.6, 1.8, 2.0, 2.3):
+            for from_level in range(1, 20):
+                for to_level in range(from_level, 30):
+                    result = costs.costs_range((900, 360, 180, 0), modifier, from_level, to_level)
+                    levels = [costs._calc_costs((900, 360, 180, 0), modifier, l)
+                              for l in range(from_level, to_level + 1)]
+                    for i in range(0, 3):
+                        # every single level is truncated on its own
+                        expected = sum(l[i] for l in levels)
+                        self.assertTrue(abs(result[i] - expected) <= len(levels),
+                                        (modifier, from_level, to_level, result, expected))
+
+    def test_range_total(self):
+        """Does a range starting at level 1 match the total costs?"""
+        for level in range(0, 40):
+            self.assertEqual(costs.costs_two_range((400, 120, 200, 0), 1, level),
+                             costs.costs_two_total((400, 120, 200, 0), level))
+
+    def test_range_empty(self):
+        """Does an empty range cost nothing?"""
+        self.assertEqual(costs.costs_range((60, 15, 0, 0), 1.5, 5, 4), (0, 0, 0))
+        self.assertEqual(costs.costs_rounded_range((4000, 8000, 4000, 0), 1.75, 5, 4), (0, 0, 0))
+
+    def test_rounded_range(self):
+        """Does a rounded range match the sum of its single levels?"""
+        for from_level in range(1, 20):
+            for to_level in range(from_level, 30):
+                levels = [costs.costs_rounded((4000, 8000, 4000, 0), 1.75, l)
+                          for l in range(from_level, to_level + 1)]
+                self.assertEqual(costs.costs_rounded_range((4000, 8000, 4000, 0), 1.75, from_level, to_level),
+                                 tuple(sum(l[i] for l in levels) for i in range(0, 3)))
@@ -0,0 +1,142 @@
+"""Contains tests for oweb.libs.importer"""
+# Python imports
+import time
+# app imports
+from oweb.tests import OWebLibTests
+from oweb.models.account import Account
+from oweb.models.planet import Moon, Planet
+from oweb.models.building import Supply1, Supply2, Station14, Station41
+from oweb.models.defense import Defense401
+from oweb.models.research import Research113
+from oweb.models.ship import Civil212, Military204, Military205
+from oweb.libs.importer import Entry, get_import_updates, get_model, iter_entries
+
+
+class OWebLibsImporterTests(OWebLibTests):
+
+    def test_names(self):
+        """Are the names of the game mapped to the real classes?"""
+        self.assertEqual(get_model('Metal Mine'), Supply1)
+        self.assertEqual(get_model('  metal   MINE '), Supply1)
+        self.assertEqual(get_model('Heavy Fighter'), Military205)
+        self.assertEqual(get_model('Solar Satellite'), Civil212)
+        self.assertEqual(get_model('Energy Technology'), Research113)
+        self.assertEqual(get_model('Lunar Base'), Station41)
+        self.assertEqual(get_model('Fleet'), None)
+
+    def test_single_page(self):
+        """Are the lines of single pages parsed?"""
+        text = ('Resources\n'
+                'Metal Mine (Level 25)\n'
+                'Crystal Mine 22\n'
+                'Light Fighter (1.234)\n'
+                'Energy Technology\t12\n'
+                'Rocket Launcher (1,000)\n'
+                'Unknown Building (Level 3)\n')
+        self.assertEqual(list(iter_entries(text.splitlines())),
+                         [Entry(None, Supply1, 25), Entry(None, Supply2, 22),
+                          Entry(None, Military204, 1234), Entry(None, Research113, 12),
+                          Entry(None, Defense401, 1000)])
+
+    def test_empire(self):
+        """Are the columns of the empire view parsed?"""
+        text = ('Overview\tHomeworld\tColony\n'
+                '\t[1:123:4]\t[1:124:7]\n'
+                'Metal Mine\t25\t24\n'
+                'Crystal Mine\t-\t20\n')
+        self.assertEqual(list(iter_entries(text.splitlines())),
+                         [Entry('1:123:4', Supply1, 25), Entry('1:124:7', Supply1, 24),
+                          Entry('1:124:7', Supply2, 20)])
+
+    def test_updates(self):
+        """Are the entries mapped onto the objects of the account?"""
+        acc = Account.objects.get(pk=1)
+        planets = list(Planet.objects.filter(account=acc))
+        moon = Moon.objects.get(planet__account=acc)
+        mine = Supply1.objects.get(astro_object=planets[0])
+        sats = Civil212.objects.get(astro_object=planets[1])
+        energy = Research113.objects.get(account=acc)
+        fighters = Military204.objects.get(account=acc)
+        base = Station41.objects.get(astro_object=moon)
+
+        entries = [Entry(planets[0].coord, Supply1, mine.level + 1),
+                   Entry(planets[1].name, Civil212, sats.count + 5),
+                   Entry(planets[0].coord, Military204, 10),
+                   Entry(planets[1].coord, Military204, 20),
+                   Entry(planets[0].coord, Research113, energy.level),
+                   Entry('9:999:9', Supply1, 1)]
+        self.assertEqual(sorted(get_import_updates(acc, entries)),
+                         sorted([('building', mine.id, mine.level + 1),
+                                 ('ship', sats.id, sats.count + 5),
+                                 ('ship', fighters.id, 30)]))
+
+        # entries of a single page need their planet or moon
+        entries = [Entry(None, Station41, base.level + 2), Entry(None, Research113, energy.level + 1)]
+        self.assertEqual(get_import_updates(acc, entries), [('research', energy.id, energy.level + 1)])
+        self.assertEqual(sorted(get_import_updates(acc, entries, body=moon)),
+                         sorted([('building', base.id, base.level + 2),
+                                 ('research', energy.id, energy.level + 1)]))
+
+        # the fleet page lists the ships of one planet, not of the account
+        planet_sats = Civil212.objects.get(astro_object=planets[0])
+        entries = [Entry(None, Military204, fighters.count + 5), Entry(None, Civil212, planet_sats.count + 1)]
+        self.assertEqual(get_import_updates(acc, entries, body=planets[0]),
+                         [('ship', planet_sats.id, planet_sats.count + 1)])
+
+    def test_large_empire(self):
+        """Is an empire view of 18 bodies parsed quickly?"""
+        coords = ['1:%d:%d' % (i, i % 15 + 1) for i in range(18)]
+        lines = ['\t' + '\t'.join('[%s]' % c for c in coords)]
+        for name in ('Metal Mine', 'Crystal Mine', 'Deuterium Synthesizer', 'Solar Plant',
+                     'Fusion Reactor', 'Robotics Factory', 'Nanite Factory', 'Shipyard',
+                     'Solar Satellite', 'Rocket Launcher', 'Light Laser', 'Heavy Laser',
+                     'Light Fighter', 'Large Cargo', 'Energy Technology', 'Plasma Technology'):
+            lines.append(name + '\t' + '\t'.join('1.%03d' % i for i in range(18)))
+        # warm up the names
+        get_model('Metal Mine')
+
+        start = time.time()
+        entries = list(iter_entries(lines))
+        self.assertEqual(len(entries), 16 * 18)
+        self.assertTrue(time.time() - start < 0.1)
+
+    def test_moon_header(self):
+        """Are the names of the empire view of the moons parsed?"""
+        text = ('Overview\tMoon_02\tMoon_03\n'
+                'Lunar Base\t4\t-\n'
+                'Fields\t5/8\t1/1\n'
+                'Robotics Factory\t2\t1\n')
+        self.assertEqual(list(iter_entries(text.splitlines())),
+                         [Entry('Moon_02', Station41, 4), Entry('Moon_02', Station14, 2),
+                          Entry('Moon_03', Station14, 1)])
+
+    def test_moon_updates(self):
+        """Are the columns of the empire view of the moons mapped onto the moons?"""
+        acc = Account.objects.get(pk=1)
+        moon = Moon.objects.get(planet__account=acc)
+        robotics = Station14.objects.get(astro_object=moon.planet)
+        moon_robotics = Station14.objects.get(astro_object=moon)
+        base = Station41.objects.get(astro_object=moon)
+
+        # the moons share the coordinates with their planets
+        text = ('Overview\t%s\n'
+                '\t[%s]\n'
+                'Robotics Factory\t%d\n'
+                'Lunar Base\t%d\n' % (moon.name, moon.coord, robotics.level + 3, base.level + 1))
+        updates = get_import_updates(acc, iter_entries(text.splitlines()))
+        self.assertEqual(sorted(updates),
+                         sorted([('building', moon_robotics.id, robotics.level + 3),
+                                 ('building', base.id, base.level + 1)]))
+        self.assertNotIn(robotics.id, [u[1] for u in updates])
+
+        # a header of moon names
+        entries = [Entry(moon.name, Station14, robotics.level + 3)]
+        self.assertEqual(get_import_updates(acc, entries),
+                         [('building', moon_robotics.id, robotics.level + 3)])
+
+        # the columns may be given explicitly
+        entries = [Entry(moon.coord, Station14, robotics.level + 3)]
+        self.assertEqual(get_import_updates(acc, entries),
+                         [('building', robotics.id, robotics.level + 3)])
+        self.assertEqual(get_import_updates(acc, entries, moons=True),
+                         [('building', moon_robotics.id, robotics.level + 3)])
@@ -0,0 +1,144 @@
+"""Contains tests for oweb.libs.navigation and oweb.context_processors"""
+# Django imports
+from django.conf import settings
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+from django.contrib.auth.models import User
+# app imports
+from oweb.tests import OWebLibTests, OWebViewTests
+from oweb.models.account import Account
+from oweb.models.planet import Moon, Planet
+from oweb.libs.navigation import get_account_id, get_navigation, get_planet_moon
+
+
+class OWebLibsNavigationTests(OWebLibTests):
+
+    def _expected(self, acc):
+        planets = []
+        for p in Planet.objects.filter(account=acc):
+            try:
+                m = Moon.objects.get(planet=p)
+                moon = (m.id, m.name)
+            except Moon.DoesNotExist:
+                moon = None
+            planets.append((p.id, p.name, p.coord, moon))
+        return acc.owner_id, planets
+
+    def test_navigation(self):
+        """Does ``get_navigation()`` provide the planets and moons of an account?"""
+        acc = Account.objects.get(pk=1)
+        with self.assertNumQueries(3):
+            navigation = get_navigation(acc.id)
+        self.assertEqual(navigation, self._expected(acc))
+        self.assertEqual(unicode(navigation[1][0]), unicode(Planet.objects.get(pk=navigation[1][0].id)))
+
+        # the navigation is cached
+        with self.assertNumQueries(0):
+            self.assertEqual(get_navigation(acc.id), navigation)
+            self.assertEqual(get_account_id(navigation[1][0].id), acc.id)
+
+        self.assertEqual(get_navigation(0), (None, []))
+
+    def test_moon(self):
+        """Does ``get_planet_moon()`` find the moon of a planet?"""
+        m = Moon.objects.select_related('planet').first()
+        self.assertEqual(get_planet_moon(m.planet), (m.id, m.name))
+        p = Planet.objects.filter(account_id=m.planet.account_id).exclude(id=m.planet_id).first()
+        self.assertEqual(get_planet_moon(p), None)
+
+    def test_account_id(self):
+        """Does ``get_account_id()`` find the account of a planet or moon?"""
+        m = Moon.objects.select_related('planet').first()
+        self.assertEqual(get_account_id(m.planet_id), m.planet.account_id)
+        self.assertEqual(get_account_id(m.id, moon=True), m.planet.account_id)
+        self.assertEqual(get_account_id(0), None)
+
+    def test_invalidation(self):
+        """Is the navigation fetched again, if planets or moons change?"""
+        acc = Account.objects.get(pk=1)
+        get_navigation(acc.id)
+
+        p = Planet.objects.create(account=acc, name='Colony', coord='1:2:3')
+        self.assertEqual(get_navigation(acc.id), self._expected(acc))
+
+        p.name = 'New Colony'
+        p.save()
+        self.assertEqual(get_navigation(acc.id), self._expected(acc))
+
+        m = Moon.objects.create(planet=p)
+        self.assertEqual(get_navigation(acc.id), self._expected(acc))
+        self.assertEqual(get_account_id(m.id, moon=True), acc.id)
+
+        m.delete()
+        self.assertEqual(get_navigation(acc.id), self._expected(acc))
+
+        p.delete()
+        self.assertEqual(get_navigation(acc.id), self._expected(acc))
+        self.assertEqual(get_account_id(p.id), None)
+
+        # the navigation of other accounts is kept
+        other = Account.objects.get(pk=2)
+        get_navigation(other.id)
+        Planet.objects.create(account=acc)
+        with self.assertNumQueries(0):
+            get_navigation(other.id)
+
+
+@override_settings(AUTH_USER_MODEL='auth.User')
+class OWebViewsNavigationTests(OWebViewTests):
+    """The views provide the navigation without the context processor"""
+
+    def test_planets(self):
+        """Do the pages of an account provide the navigation of this account?"""
+        self.assertNotIn('oweb.context_processors.navigation', settings.TEMPLATE_CONTEXT_PROCESSORS)
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        m = Moon.objects.filter(planet__account=acc).first()
+        planets = get_navigation(acc.id)[1]
+        self.client.login(username='test01', password='foo')
+
+        for url in (reverse('oweb:account_settings', args=[acc.id]),
+                    reverse('oweb:planet_settings', args=[m.planet_id]),
+                    reverse('oweb:moon_settings', args=[m.id]),
+                    reverse('oweb:tools_energy', args=[acc.id])):
+            r = self.client.get(url)
+            self.assertEqual(r.status_code, 200)
+            self.assertEqual(r.context['navigation'].planets, planets)
+            for p in planets:
+                self.assertContains(r, reverse('oweb:planet_overview', args=[p.id]))
+
+        # the moon of the current planet is linked
+        r = self.client.get(reverse('oweb:planet_settings', args=[m.planet_id]))
+        self.assertContains(r, reverse('oweb:moon_overview', args=[m.id]))
+
+    def test_owner(self):
+        """Is the navigation hidden from other users?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        self.client.login(username='test02', password='foo')
+        p = Planet.objects.filter(account=acc).first()
+        r = self.client.get(reverse('oweb:planet_settings', args=[p.id]))
+        self.assertEqual(r.status_code, 403)
+        self.assertNotContains(r, p.name, status_code=403)
+
+
+@override_settings(AUTH_USER_MODEL='auth.User',
+                   TEMPLATE_CONTEXT_PROCESSORS=settings.TEMPLATE_CONTEXT_PROCESSORS + ('oweb.context_processors.navigation',))
+class OWebContextProcessorsNavigationTests(OWebViewTests):
+
+    def test_planets(self):
+        """Does the context processor agree with the views?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        planets = get_navigation(acc.id)[1]
+        self.client.login(username='test01', password='foo')
+        r = self.client.get(reverse('oweb:account_settings', args=[acc.id]))
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.context['navigation'].planets, planets)
+
+    def test_home(self):
+        """Does the context processor provide an empty navigation outside of an account?"""
+        self.client.login(username='test02', password='foo')
+        r = self.client.get(reverse('oweb:home'))
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.context['navigation'].planets, [])
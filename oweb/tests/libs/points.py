@@ -0,0 +1,53 @@
+"""Contains tests for oweb.libs.points"""
+# Django imports
+from django.contrib.auth.models import User
+# app imports
+from oweb.tests import OWebLibTests
+from oweb.models.account import Account
+from oweb.models.planet import Planet, Moon
+from oweb.models.building import Building
+from oweb.models.research import Research
+from oweb.libs.points import get_account_points, get_accounts_points, get_planet_points, get_ship_points, get_research_points, get_item_points
+
+
+class OWebLibsPointsTests(OWebLibTests):
+
+    def test_item_points(self):
+        """Does ``get_item_points()`` match the costs of the objects?"""
+        for b in Building.objects.all()[:20]:
+            cost = b.get_total_cost()
+            self.assertEqual(get_item_points(b.content_type_id, b.level),
+                             cost[0] + cost[1] + cost[2])
+        for r in Research.objects.all():
+            cost = r.get_total_cost()
+            self.assertEqual(get_item_points(r.real_class_id, r.level),
+                             cost[0] + cost[1] + cost[2])
+
+    def test_account_points(self):
+        """Does ``get_account_points()`` match the single functions?"""
+        for acc in Account.objects.all():
+            points = get_account_points(acc)
+            for p in Planet.objects.filter(account=acc):
+                self.assertEqual(points['planets'][p.id], get_planet_points(p))
+            self.assertEqual(points['ships'], get_ship_points(acc))
+            self.assertEqual(points['research'], get_research_points(acc))
+
+    def test_moon_points(self):
+        """Are moon points added to their planet?"""
+        m = Moon.objects.first()
+        points = get_account_points(m.planet.account)
+        self.assertTrue(points['planets'][m.planet_id][4] > 0)
+        self.assertEqual(points['planets'][m.planet_id], get_planet_points(m.planet))
+
+    def test_queries(self):
+        """Does ``get_accounts_points()`` need four queries for many accounts?"""
+        u = User.objects.get(username='test01')
+        Account.objects.create(owner=u)
+        ids = Account.objects.values_list('id', flat=True)
+        # warm up the map of real classes
+        get_accounts_points(ids)
+        with self.assertNumQueries(4):
+            points = get_accounts_points(ids)
+        self.assertEqual(sorted(points.keys()), sorted(ids))
+        for acc in Account.objects.all():
+            self.assertEqual(points[acc.id], get_account_points(acc))
@@ -0,0 +1,142 @@
+"""Contains tests for oweb.libs.production"""
+# Python imports
+from itertools import product
+# app imports
+from oweb.tests import OWebLibTests
+from oweb.models.account import Account
+from oweb.models.planet import Moon, Planet
+from oweb.models.building import Building, Station14, Station15
+from oweb.libs.production import PERFORMANCE_STEPS, PlanetState, get_account_capacities, get_account_performance, get_build_time, get_build_times, get_capacity, get_planet_capacity, get_account_production, get_optimal_performance, get_planet_performance, get_metal_production, get_crystal_production, get_deuterium_production, get_solar_production, get_fusion_production, get_energy_production, get_plasma_bonus, get_production_table
+from oweb.libs.snapshot import AccountSnapshot
+
+
+class OWebLibsProductionTests(OWebLibTests):
+
+    def test_account_production(self):
+        """Does ``get_account_production()`` match ``get_planet_production()``?"""
+        for acc in Account.objects.all():
+            planets = Planet.objects.filter(account=acc)
+            snapshot = AccountSnapshot(acc, planets)
+            production, total = snapshot.get_production()
+            for p in planets:
+                self.assertEqual(production[p.id], snapshot.get_planet_production(p))
+            self.assertEqual(total, tuple(sum(x) for x in zip(*production.values())))
+
+    def test_states(self):
+        """Does ``get_account_production()`` match the single functions?"""
+        states = []
+        for level in range(0, 45, 3):
+            for perf in (0.0, 0.3, 1.0):
+                states.append(PlanetState(level, level * 7 - 130,
+                                          level, perf, level + 1, perf, level + 2, perf,
+                                          level, perf, level / 2, perf, level * 10))
+
+        production, total = get_account_production(states, 5, energy=12, plasma=8)
+        for s, prod in zip(states, production):
+            metal = get_metal_production(s.metal_level, performance=s.metal_perf, speed=5)
+            crystal = get_crystal_production(s.crystal_level, performance=s.crystal_perf, speed=5)
+            deut = get_deuterium_production(s.deut_level, temp=s.max_temp, performance=s.deut_perf, speed=5)
+            solar, fusion, sats = get_energy_production(s.solar_level, s.fusion_level, s.sat_count,
+                                                        solar_perf=s.solar_perf, fusion_perf=s.fusion_perf,
+                                                        temp=s.max_temp, speed=5, energy=12)
+            plasma = get_plasma_bonus(8, metal[0], crystal[1])
+            expected = tuple(sum(x) for x in zip(metal, crystal, deut, solar, fusion, sats, plasma, (150, 75, 0, 0)))
+            self.assertEqual(prod, expected)
+
+    def test_empty(self):
+        """Does ``get_account_production()`` handle accounts without planets?"""
+        self.assertEqual(get_account_production([], 1), ([], (0, 0, 0, 0)))
+
+    def test_production_table(self):
+        """Do the production tables match their functions?"""
+        for speed in (1, 4):
+            for level in range(0, 60):
+                self.assertEqual(get_production_table(get_metal_production, speed=speed)[level],
+                                 get_metal_production(level, speed=speed))
+                self.assertEqual(get_production_table(get_crystal_production, speed=speed)[level],
+                                 get_crystal_production(level, speed=speed))
+                for temp in (-130, 0, 74):
+                    self.assertEqual(get_production_table(get_deuterium_production, temp=temp, speed=speed)[level],
+                                     get_deuterium_production(level, temp=temp, speed=speed))
+                self.assertEqual(get_production_table(get_solar_production)[level],
+                                 get_solar_production(level))
+                for energy in (0, 12):
+                    self.assertEqual(get_production_table(get_fusion_production, speed=speed, energy=energy)[level],
+                                     get_fusion_production(level, speed=speed, energy=energy))
+
+    def test_production_table_growth(self):
+        """Are production tables shared and grown lazily?"""
+        table = get_production_table(get_deuterium_production, temp=33, speed=7)
+        self.assertTrue(table is get_production_table(get_deuterium_production, speed=7, temp=33))
+        self.assertEqual(len(table), 0)
+        table[10]
+        self.assertEqual(len(table), 11)
+        table[5]
+        self.assertEqual(len(table), 11)
+
+    def _rating(self, production, trade):
+        return production[0] + production[1] * trade[0] / float(trade[1]) + production[2] * trade[0] / float(trade[2])
+
+    def test_optimal_performance(self):
+        """Does ``get_optimal_performance()`` find the best settings?"""
+        trade = (3, 2, 1)
+        for state in (PlanetState(1, 40, 30, 1.0, 27, 1.0, 25, 1.0, 22, 1.0, 0, 1.0, 10),
+                      PlanetState(1, -80, 28, 1.0, 26, 1.0, 24, 1.0, 20, 1.0, 12, 1.0, 0),
+                      PlanetState(1, 70, 20, 1.0, 17, 1.0, 12, 1.0, 22, 1.0, 0, 1.0, 0)):
+            result = get_optimal_performance(state, 4, energy=12, plasma=6, trade=trade)
+            self.assertTrue(result.production[3] >= 0)
+
+            # compare with all possible settings
+            best = None
+            for m, c, d, f in product(PERFORMANCE_STEPS, repeat=4):
+                s = state._replace(metal_perf=m, crystal_perf=c, deut_perf=d, fusion_perf=f)
+                production = get_account_production([s], 4, energy=12, plasma=6)[0][0]
+                if production[3] >= 0:
+                    best = max(best, self._rating(production, trade))
+            self.assertAlmostEqual(self._rating(result.production, trade), best)
+
+    def test_optimal_performance_enough_energy(self):
+        """Do planets with enough energy run at 100%?"""
+        state = PlanetState(1, 40, 10, 0.5, 10, 0.5, 10, 0.5, 30, 0.5, 0, 1.0, 0)
+        result = get_optimal_performance(state, 1)
+        self.assertEqual(result[:5], (1.0, 1.0, 1.0, 1.0, 1.0))
+
+    def test_account_performance(self):
+        """Does ``get_account_performance()`` match ``get_planet_performance()``?"""
+        for acc in Account.objects.all():
+            planets = Planet.objects.select_related('account').filter(account=acc)
+            snapshot = AccountSnapshot(acc, planets)
+            performance = snapshot.get_performance()
+            for p in planets:
+                self.assertEqual(performance[p.id], get_planet_performance(p, acc.speed))
+
+        states = [PlanetState(i, 40, 30, 1.0, 27, 1.0, 25, 1.0, 22, 1.0, 0, 1.0, 10) for i in range(3)]
+        settings = get_account_performance(states, 4)
+        self.assertEqual(len(settings), 3)
+        self.assertTrue(settings[0] is settings[2])
+
+    def test_account_capacities(self):
+        """Does ``get_account_capacities()`` return every planet and moon with one query?"""
+        acc = Account.objects.get(pk=1)
+        with self.assertNumQueries(1):
+            capacities = get_account_capacities(acc)
+
+        planets = Planet.objects.filter(account=acc)
+        moons = Moon.objects.filter(planet__account=acc)
+        self.assertEqual(set(capacities), set([p.id for p in planets] + [m.id for m in moons]))
+        for p in planets:
+            robo = Station14.objects.get(astro_object=p).level
+            nani = Station15.objects.get(astro_object=p).level
+            self.assertEqual(capacities[p.id], get_capacity(robo, nani, acc.speed))
+            self.assertEqual(capacities[p.id], get_planet_capacity(p, speed=acc.speed))
+        for m in moons:
+            robo = Station14.objects.get(astro_object=m).level
+            self.assertEqual(capacities[m.id], get_capacity(robo, 0, acc.speed))
+
+    def test_build_times(self):
+        """Do the build times match the costs of the next levels?"""
+        p = Planet.objects.first()
+        buildings = list(Building.objects.filter(astro_object=p))
+        times = get_build_times(buildings, 10000)
+        for b, time in zip(buildings, times):
+            self.assertEqual(time, get_build_time(b.get_next_cost(), 10000))
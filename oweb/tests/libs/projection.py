@@ -0,0 +1,96 @@
+"""Contains tests for oweb.libs.projection"""
+# Python imports
+import types
+# app imports
+from oweb.exceptions import OWebDoesNotExist, OWebIllegalParameterException
+from oweb.tests import OWebLibTests
+from oweb.models.account import Account
+from oweb.models.planet import Planet
+from oweb.libs.production import PlanetState, get_account_production
+from oweb.libs.projection import Upgrade, iter_projection
+from oweb.libs.snapshot import AccountSnapshot
+
+
+class OWebLibsProjectionTests(OWebLibTests):
+
+    def _states(self, count):
+        return [PlanetState(i, i * 8 - 60,
+                            20 + i, 1.0, 18 + i, 1.0, 15 + i, 1.0,
+                            20 + i, 1.0, i, 1.0, i * 5)
+                for i in range(count)]
+
+    def test_constant(self):
+        """Does the projection accumulate a constant rate?"""
+        states = self._states(3)
+        total = get_account_production(states, 4, energy=10, plasma=5)[1]
+        steps = list(iter_projection(states, 4, 48, step=6, energy=10, plasma=5, resources=(100, 200, 300)))
+        self.assertEqual([s.hour for s in steps], list(range(6, 49, 6)))
+        for s in steps:
+            self.assertEqual(s.rate, total)
+            self.assertEqual(s.resources, (int(100 + total[0] * s.hour),
+                                           int(200 + total[1] * s.hour),
+                                           int(300 + total[2] * s.hour)))
+
+    def test_upgrades(self):
+        """Do the upgrades change the rate at their hour?"""
+        states = self._states(2)
+        before = get_account_production(states, 1, plasma=2)[1]
+        upgraded = [states[0]._replace(metal_level=states[0].metal_level + 1), states[1]]
+        after_mine = get_account_production(upgraded, 1, plasma=2)[1]
+        after_plasma = get_account_production(upgraded, 1, plasma=3)[1]
+
+        steps = list(iter_projection(states, 1, 10, step=2, plasma=2,
+                                     upgrades=[Upgrade(7, None, 'plasma', 3),
+                                               Upgrade(3, 0, 'metal_level', states[0].metal_level + 1)]))
+        self.assertEqual(steps[0].rate, before)
+        self.assertEqual(steps[1].rate, after_mine)
+        self.assertEqual(steps[4].rate, after_plasma)
+        # the upgrades take effect between the steps
+        self.assertEqual(steps[1].resources[0], int(before[0] * 3 + after_mine[0]))
+        self.assertEqual(steps[4].resources[0],
+                         int(before[0] * 3 + after_mine[0] * 4 + after_plasma[0] * 3))
+
+    def test_last_step(self):
+        """Does the projection end at its horizon?"""
+        states = self._states(2)
+        total = get_account_production(states, 4)[1]
+        steps = list(iter_projection(states, 4, 10, step=4))
+        self.assertEqual([s.hour for s in steps], [4, 8, 10])
+        self.assertEqual(steps[-1].resources, tuple(int(r * 10) for r in total[:3]))
+
+        # an upgrade after the last full step
+        upgraded = get_account_production([states[0], states[1]._replace(crystal_level=30)], 4)[1]
+        steps = list(iter_projection(states, 4, 10, step=4, upgrades=[Upgrade(9, 1, 'crystal_level', 30)]))
+        self.assertEqual(steps[-1].rate, upgraded)
+
+    def test_illegal_upgrades(self):
+        """Are upgrades of unknown planets or fields rejected?"""
+        states = self._states(2)
+        with self.assertRaises(OWebIllegalParameterException):
+            next(iter_projection(states, 4, 10, upgrades=[Upgrade(3, None, 'metal_level', 30)]))
+        with self.assertRaises(OWebIllegalParameterException):
+            next(iter_projection(states, 4, 10, upgrades=[Upgrade(3, 0, 'plasma', 3)]))
+        with self.assertRaises(OWebDoesNotExist):
+            next(iter_projection(states, 4, 10, upgrades=[Upgrade(3, 5, 'metal_level', 30)]))
+
+    def test_streaming(self):
+        """Is a long projection streamed?"""
+        projection = iter_projection(self._states(15), 4, 90 * 24)
+        self.assertTrue(isinstance(projection, types.GeneratorType))
+        last = None
+        count = 0
+        for last in projection:
+            count += 1
+        self.assertEqual(count, 90 * 24)
+        self.assertEqual(last.hour, 90 * 24)
+
+    def test_snapshot(self):
+        """Does the projection of a snapshot start with its production?"""
+        acc = Account.objects.get(pk=1)
+        snapshot = AccountSnapshot(acc, Planet.objects.filter(account=acc))
+        first = next(snapshot.iter_projection(24))
+        self.assertEqual(first.rate, snapshot.get_production()[1])
+
+        planet = snapshot.planets[0]
+        first = next(snapshot.iter_projection(24, planets=[planet]))
+        self.assertEqual(first.rate, snapshot.get_production()[0][planet.id])
@@ -0,0 +1,343 @@
+"""Contains tests for oweb.libs.queue"""
+# Python imports
+from itertools import count, islice
+import pickle
+# Django imports
+from django.template import Context, Template
+from django.test.utils import override_settings
+# app imports
+from oweb.tests import OWebLibTests
+from oweb.models.account import Account
+from oweb.models.planet import Planet
+from oweb.models.building import Supply1, Supply2, Supply3, Supply4, Supply12
+from oweb.models.research import Research
+from oweb.models.ship import Civil212
+from oweb.libs.cache import DjangoCache, NullCache, get_backend, reset_backend
+from oweb.libs.production import get_deuterium_production, get_metal_production, get_production_table
+from oweb.libs.queue import QueueItem, _energy_mixes, _iter_energy_mixes, get_account_queue, get_astrophysics_queue, get_cached_best_items, get_cached_planet_queue, get_colonies, get_energy_mix, get_energy_queue, get_planet_queue, get_plasma_queue, get_research_queue, iter_planet_queue
+
+
+class OWebLibsQueueTests(OWebLibTests):
+
+    def _sorted_queue(self, acc, per_planet):
+        queue = []
+        for p in Planet.objects.filter(account=acc):
+            queue += get_planet_queue(p)[:per_planet]
+        queue += get_research_queue(acc)
+        queue.sort()
+        return queue
+
+    def test_account_queue(self):
+        """Does ``get_account_queue()`` match the sorted queues of the planets?"""
+        for acc in Account.objects.all():
+            queue = self._sorted_queue(acc, 5)
+            result = get_account_queue(acc)
+            self.assertEqual(sorted(result), result)
+            self.assertEqual(result, queue[:20])
+            self.assertEqual(get_account_queue(acc, limit=7), queue[:7])
+            self.assertEqual(get_account_queue(acc, limit=100, per_planet=2),
+                             self._sorted_queue(acc, 2))
+
+    def test_account_queue_deficit(self):
+        """Is the queue of an account sorted, if its planets are short of energy?"""
+        acc = Account.objects.get(pk=1)
+        Supply4.objects.filter(astro_object__planet__account=acc).update(level=0)
+        result = get_account_queue(acc, limit=50, per_planet=20)
+        self.assertEqual(len(result), 50)
+        self.assertEqual(sorted(result), result)
+
+    def test_iter_planet_queue(self):
+        """Does ``iter_planet_queue()`` yield the items of ``get_planet_queue()`` in order?"""
+        for p in Planet.objects.all():
+            self.assertEqual(list(iter_planet_queue(p, depth=5)), get_planet_queue(p))
+
+    def test_iter_planet_queue_depth(self):
+        """Does ``iter_planet_queue()`` respect the depth and the order of levels?"""
+        p = Planet.objects.first()
+        self.assertEqual(len(list(iter_planet_queue(p, depth=12))), 36)
+
+        levels = {}
+        for item in islice(iter_planet_queue(p), 100):
+            detail = item[4]
+            self.assertEqual(detail['level'], levels.get(detail['id'], detail['level'] - 1) + 1)
+            levels[detail['id']] = detail['level']
+
+    def test_iter_planet_queue_sorted(self):
+        """Does ``iter_planet_queue()`` yield the best items first on planets short of energy?"""
+        p = Planet.objects.select_related('account').first()
+        objects = dict((model.__name__.lower(), model.objects.get(astro_object=p))
+                       for model in (Supply1, Supply2, Supply3, Supply4, Supply12, Civil212))
+        for metal, solar, fusion, sats in ((5, 0, 0, 0), (12, 4, 0, 10), (20, 10, 2, 0),
+                                           (25, 15, 8, 50), (33, 20, 18, 83), (1, 0, 10, 0)):
+            objects['supply1'].level = metal
+            objects['supply4'].level = solar
+            objects['supply12'].level = fusion
+            objects['civil212'].count = sats
+            queue = list(islice(iter_planet_queue(p, **objects), 60))
+            self.assertEqual(queue, sorted(queue))
+            # a level ranked behind the level below it keeps its own values
+            for q in queue:
+                self.assertTrue(q.key <= q.order)
+                self.assertEqual(q[:4], q.key)
+
+    def test_research_queue(self):
+        """Does the research queue contain plasma, energy and Astrophysics?"""
+        acc = Account.objects.get(pk=1)
+        queue = get_research_queue(acc)
+        self.assertEqual(queue, sorted(queue))
+        self.assertEqual(set(q.name for q in queue),
+                         set(['Plasma Technology', 'Energy Technology', 'Astrophysics']))
+        self.assertTrue(all(q.planet_id is None for q in queue))
+
+    def test_energy_queue(self):
+        """Does energy technology gain production on planets without enough energy?"""
+        acc = Account.objects.get(pk=1)
+        # enough energy: no gain
+        self.assertTrue(all(q.gain == 0 for q in get_energy_queue(acc)))
+
+        for p in Planet.objects.filter(account=acc):
+            s = Supply4.objects.get(astro_object=p)
+            s.performance = 0.0
+            s.save()
+            f = Supply12.objects.get(astro_object=p)
+            f.level = 10
+            f.performance = 1.0
+            f.save()
+        queue = get_energy_queue(acc, depth=3)
+        self.assertEqual([q.level for q in queue], [18, 19, 20])
+        self.assertTrue(all(q.gain > 0 for q in queue))
+
+    def test_astrophysics_queue(self):
+        """Does the Astrophysics queue contain the levels, that allow a colony?"""
+        acc = Account.objects.get(pk=1)
+        queue = get_astrophysics_queue(acc, depth=3)
+        self.assertEqual(len(queue), 3)
+        last = Research.objects.get(account=acc, real_class__model='research124').level
+        for q in queue:
+            self.assertEqual(get_colonies(q.level), get_colonies(last) + 1)
+            self.assertTrue(q.gain > 0)
+            last = q.level
+
+
+class OWebLibsQueueCacheTests(OWebLibTests):
+
+    def test_cached(self):
+        """Is the queue of an unchanged planet taken from the cache?"""
+        p = Planet.objects.select_related('account').first()
+        queue = get_cached_planet_queue(p)
+        self.assertEqual(queue, get_planet_queue(p))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_planet_queue(p), queue)
+
+    def test_best_items(self):
+        """Are the cached best items of a planet sorted?"""
+        p = Planet.objects.select_related('account').first()
+        # the planet is short of energy
+        s = Supply4.objects.get(astro_object=p)
+        s.level = 0
+        s.save()
+        items = get_cached_best_items(p, 30)
+        self.assertEqual(len(items), 30)
+        self.assertEqual(sorted(items), items)
+        self.assertEqual(items, list(islice(iter_planet_queue(p, depth=30), 30)))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_best_items(p, 30), items)
+
+    def test_building(self):
+        """Does a changed building invalidate the queue?"""
+        p = Planet.objects.select_related('account').first()
+        queue = get_cached_planet_queue(p)
+        s = Supply1.objects.get(astro_object=p)
+        s.level += 1
+        s.save()
+        self.assertNotEqual(get_cached_planet_queue(p), queue)
+        self.assertEqual(get_cached_planet_queue(p), get_planet_queue(p))
+
+        # the base class is saved by item_update
+        queue = get_cached_planet_queue(p)
+        s = Supply4.objects.get(astro_object=p).building_ptr
+        s.level += 5
+        s.save()
+        self.assertNotEqual(get_cached_planet_queue(p), queue)
+
+    def test_research(self):
+        """Does a changed energy technology invalidate the queues of the account?"""
+        p = Planet.objects.select_related('account').first()
+        queue = get_cached_planet_queue(p)
+        r = Research.objects.get(account=p.account, real_class__model='research113')
+        r.level += 3
+        r.save()
+        self.assertNotEqual(get_cached_planet_queue(p), queue)
+        self.assertEqual(get_cached_planet_queue(p), get_planet_queue(p))
+
+    def test_planet(self):
+        """Does a changed temperature invalidate the queue?"""
+        p = Planet.objects.select_related('account').first()
+        queue = get_cached_planet_queue(p)
+        p.max_temp -= 40
+        p.save()
+        self.assertNotEqual(get_cached_planet_queue(p), queue)
+
+    def test_account(self):
+        """Does a changed trading rate invalidate the queues of the account?"""
+        p = Planet.objects.select_related('account').first()
+        queue = get_cached_planet_queue(p)
+        p.account.trade_metal += 1
+        p.account.save()
+        self.assertNotEqual(get_cached_planet_queue(p), queue)
+
+    @override_settings(OWEB_CACHE='django',
+                       CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_django_backend(self):
+        """Can Django's cache be used?"""
+        reset_backend()
+        try:
+            self.assertTrue(isinstance(get_backend(), DjangoCache))
+            p = Planet.objects.select_related('account').first()
+            queue = get_cached_planet_queue(p)
+            with self.assertNumQueries(0):
+                self.assertEqual(get_cached_planet_queue(p), queue)
+            s = Supply1.objects.get(astro_object=p)
+            s.level += 1
+            s.save()
+            self.assertEqual(get_cached_planet_queue(p), get_planet_queue(p))
+        finally:
+            get_backend().clear()
+            reset_backend()
+
+    @override_settings(OWEB_CACHE=None)
+    def test_no_backend(self):
+        """Can the cache be disabled?"""
+        reset_backend()
+        try:
+            self.assertTrue(isinstance(get_backend(), NullCache))
+            p = Planet.objects.select_related('account').first()
+            self.assertEqual(get_cached_planet_queue(p), get_planet_queue(p))
+        finally:
+            reset_backend()
+
+
+class OWebLibsQueueEnergyTests(OWebLibTests):
+
+    def test_no_deficit(self):
+        """Does a planet with enough energy need no sources?"""
+        mix = get_energy_mix(0, 40, 10, 20, 20, 4, (2, 1, 1))
+        self.assertEqual(mix.cost, (0, 0, 0))
+        self.assertEqual(mix.sats, 0)
+
+    def test_cheapest(self):
+        """Does the mix prefer the cheapest source?"""
+        # low levels are cheap: the Solar Plant beats the satellites
+        mix = get_energy_mix(100, 40, 0, 0, 0, 4, (2, 1, 1))
+        self.assertEqual((mix.sats, mix.fusion), (0, 0))
+        self.assertTrue(mix.solar > 0)
+        # high levels are expensive: satellites beat the Solar Plant
+        mix = get_energy_mix(100, 40, 0, 30, 0, 4, (2, 1, 1))
+        self.assertEqual((mix.solar, mix.fusion), (0, 0))
+        self.assertTrue(mix.sats > 0)
+
+    def test_memoized(self):
+        """Is the mix calculated only once?"""
+        mix = get_energy_mix(123, 41, 3, 5, 0, 1, (3, 2, 1))
+        hits = _energy_mixes.hits
+        self.assertTrue(get_energy_mix(123, 41, 3, 5, 0, 1, (3, 2, 1)) is mix)
+        self.assertEqual(_energy_mixes.hits, hits + 1)
+
+    def test_queue_costs(self):
+        """Do the queue items include the costs of the energy sources?"""
+        p = Planet.objects.select_related('account').first()
+        mine = Supply1.objects.get(astro_object=p)
+        before = [q for q in get_planet_queue(p) if q.id == mine.id][0]
+
+        s = Supply4.objects.get(astro_object=p)
+        s.level -= 5
+        s.save()
+        after = [q for q in get_planet_queue(p) if q.id == mine.id][0]
+        self.assertEqual(after.level, before.level)
+        self.assertTrue(after[1] > before[1])
+        self.assertTrue(after[0] > before[0])
+
+    def test_mixes_positive(self):
+        """Does every level only pay for the sources, that it adds?"""
+        trade = (2, 1, 1)
+        for temp, mine_level, planet_energy, solar, fusion in ((-40, 3, -100, 0, 0), (40, 5, 0, 0, 0),
+                                                                (-40, 3, 250, 0, 0), (80, 20, -500, 10, 2),
+                                                                (20, 25, 100, 20, 8), (-10, 8, -50, 0, 12)):
+            table = get_production_table(get_deuterium_production, temp=temp, speed=4)
+            levels = (table[mine_level + n][3] for n in count())
+            mixes = list(islice(_iter_energy_mixes(planet_energy, levels, (temp, 10, solar, fusion, 4), trade), 20))
+            self.assertEqual(len(mixes), 20)
+            for mix in mixes:
+                self.assertTrue(all(c >= 0 for c in mix.cost), mix)
+                self.assertTrue(mix.consumption >= 0, mix)
+                self.assertTrue(mix.sats >= 0, mix)
+
+        # a planet with enough energy does not need any source
+        table = get_production_table(get_metal_production, speed=4)
+        levels = (table[5 + n][3] for n in count())
+        mix = next(_iter_energy_mixes(10000, levels, (40, 10, 0, 0, 4), trade))
+        self.assertEqual(mix.cost, (0, 0, 0))
+
+    def test_queue_rising(self):
+        """Do the scores of a mine rise with its level on a planet short of energy?"""
+        p = Planet.objects.select_related('account').first()
+        # the planet has no energy sources at all
+        for model in (Supply4, Supply12):
+            s = model.objects.get(astro_object=p)
+            s.level = 0
+            s.save()
+        Civil212.objects.filter(astro_object=p).update(count=0)
+        mine = Supply1.objects.get(astro_object=p)
+        mine.level = 5
+        mine.save()
+
+        items = [q for q in iter_planet_queue(p, depth=20) if q.id == mine.id]
+        scores = [q[0] for q in sorted(items, key=lambda q: q.level)]
+        self.assertEqual(len(scores), 20)
+        self.assertTrue(scores[0] < scores[-1])
+        # the sources cover several levels at once, so the scores rise in steps
+        self.assertTrue(max(scores[:10]) < min(scores[10:]))
+
+
+class OWebLibsQueueItemTests(OWebLibTests):
+
+    def test_compatibility(self):
+        """Can a queue item be used like the former tuple?"""
+        p = Planet.objects.select_related('account').first()
+        item = get_planet_queue(p)[0]
+        self.assertTrue(isinstance(item, QueueItem))
+        self.assertEqual(item[:4], item.key)
+        self.assertEqual(item[0], item.key[0])
+        self.assertTrue(item[4] is item)
+        self.assertEqual(item[4]['level'], item.level)
+        self.assertEqual(item[4]['planet_id'], p.id)
+        self.assertEqual(item.planet_name, p.name)
+        self.assertEqual(item.planet_coord, p.coord)
+        self.assertRaises(KeyError, lambda: item['foo'])
+
+    def test_template(self):
+        """Do the templates work with queue items?"""
+        p = Planet.objects.select_related('account').first()
+        template = Template('{% for q in queue %}{% with q.4 as detail %}'
+                            '{% if detail.planet_id == None %}R{% else %}{{ detail.planet_id }}{% endif %}'
+                            ':{{ detail.name }}:{{ detail.level }}:{{ q.1 }};'
+                            '{% endwith %}{% endfor %}')
+        queue = get_planet_queue(p)[:1] + get_plasma_queue(p.account)[:1]
+        result = template.render(Context({'queue': queue, 'account': p.account}))
+        self.assertEqual(result, '%s:%s:%s:%s;R:%s:%s:0;' % (
+            p.id, queue[0].name, queue[0].level, queue[0][1], queue[1].name, queue[1].level))
+
+    def test_planet_id(self):
+        """Do the items of a queue store their planet by its ID?"""
+        p = Planet.objects.select_related('account').first()
+        queue = get_planet_queue(p) + get_plasma_queue(p.account)
+        for q in queue:
+            self.assertFalse(any(isinstance(getattr(q, slot), (Planet, Account)) for slot in q.__slots__))
+        self.assertEqual(set(q.planet_id for q in queue), set([p.id, None]))
+        self.assertFalse('oweb.models' in pickle.dumps(queue, pickle.HIGHEST_PROTOCOL))
+
+    def test_pickle(self):
+        """Can queue items be pickled (i.e. for Django's cache)?"""
+        p = Planet.objects.select_related('account').first()
+        queue = get_planet_queue(p)
+        self.assertEqual(pickle.loads(pickle.dumps(queue, pickle.HIGHEST_PROTOCOL)), queue)
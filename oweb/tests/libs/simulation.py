@@ -0,0 +1,57 @@
+"""Contains tests for oweb.libs.simulation"""
+# app imports
+from oweb.tests import OWebLibTests
+from oweb.models.account import Account
+from oweb.models.planet import Planet
+from oweb.libs.simulation import get_simulation_state, simulate, simulate_account
+from oweb.libs.snapshot import AccountSnapshot
+
+
+class OWebLibsSimulationTests(OWebLibTests):
+
+    def _state(self):
+        acc = Account.objects.get(pk=1)
+        return get_simulation_state(AccountSnapshot(acc, Planet.objects.filter(account=acc)))
+
+    def _assert_timeline(self, timeline, horizon):
+        levels = {}
+        planet_free = {}
+        for entry in timeline:
+            self.assertTrue(0 <= entry.start <= horizon)
+            self.assertTrue(entry.finish >= entry.start)
+            # levels are built one after another
+            key = (entry.planet_id, entry.name)
+            if key in levels:
+                self.assertEqual(entry.level, levels[key] + 1)
+            levels[key] = entry.level
+            # a planet builds one item at a time
+            self.assertTrue(entry.start >= planet_free.get(entry.planet_id, 0))
+            planet_free[entry.planet_id] = entry.finish
+
+    def test_greedy(self):
+        """Does the greedy simulation return a valid timeline?"""
+        timeline = simulate_account(Account.objects.get(pk=1), days=30, steps=20)
+        self.assertTrue(0 < len(timeline) <= 20)
+        self._assert_timeline(timeline, 30 * 24)
+
+    def test_beam(self):
+        """Does the beam search return a valid timeline?"""
+        timeline = simulate(self._state(), horizon=60 * 24, steps=30, width=4)
+        self.assertTrue(len(timeline) > 0)
+        self._assert_timeline(timeline, 60 * 24)
+
+    def test_state_unchanged(self):
+        """Does ``simulate()`` leave the given state alone?"""
+        state = self._state()
+        levels = [p.levels[:] for p in state.planets]
+        simulate(state, steps=10)
+        self.assertEqual([p.levels for p in state.planets], levels)
+        self.assertEqual(state.timeline, [])
+        self.assertEqual(state.time, 0.0)
+
+    def test_many_planets(self):
+        """Does the simulation handle an account with ten planets?"""
+        state = self._state()
+        state.planets = [state.planets[i % 2].copy() for i in range(0, 10)]
+        timeline = simulate(state, horizon=60 * 24, steps=30, width=3)
+        self.assertEqual(len(timeline), 30)
@@ -0,0 +1,77 @@
+"""Contains tests for oweb.models.polymorphic"""
+# Django imports
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+# app imports
+from oweb.tests import OWebModelTests
+from oweb.models.building import Building, Supply1, Supply22
+from oweb.models.research import Research, Research124
+from oweb.models.ship import Ship, Civil212
+from oweb.models.polymorphic import get_real_class, downcast_all
+
+
+class OWebModelsPolymorphicTests(OWebModelTests):
+
+    def setUp(self):
+        # populate the map of real classes
+        get_real_class(Building.objects.first().content_type_id)
+
+    def test_no_query(self):
+        """Does ``as_real_class()`` convert classes without own columns without a query?"""
+        b = Supply22.objects.first()
+        b_base = Building.objects.get(pk=b.pk)
+        with self.assertNumQueries(0):
+            b_real = b_base.as_real_class()
+        self.assertEqual(b_real.__class__, Supply22)
+        self.assertEqual(b_real.pk, b.pk)
+        self.assertEqual(b_real.level, b.level)
+        self.assertEqual(b_real.get_total_cost(), b.get_total_cost())
+
+    def test_research(self):
+        """Does ``as_real_class()`` respect the ``real_class`` field of researches?"""
+        r = Research124.objects.first()
+        r_base = Research.objects.get(pk=r.pk)
+        with self.assertNumQueries(0):
+            r_real = r_base.as_real_class()
+        self.assertEqual(r_real.__class__, Research124)
+        self.assertEqual(r_real.get_next_cost(), r.get_next_cost())
+
+    def test_extra_columns(self):
+        """Does ``as_real_class()`` fetch the additional columns?"""
+        b = Supply1.objects.first()
+        b.performance = 0.4
+        b.save()
+        b_base = Building.objects.get(pk=b.pk)
+        with self.assertNumQueries(1):
+            b_real = b_base.as_real_class()
+        self.assertEqual(b_real.__class__, Supply1)
+        self.assertEqual(b_real.performance, 0.4)
+
+    def test_already_real(self):
+        """Does ``as_real_class()`` return objects of the real class unchanged?"""
+        b = Supply1.objects.first()
+        with self.assertNumQueries(0):
+            self.assertTrue(b.as_real_class() is b)
+
+    def test_save(self):
+        """Can converted objects be saved?"""
+        b = Building.objects.get(pk=Supply1.objects.first().pk).as_real_class()
+        b.level = 42
+        b.performance = 0.7
+        b.save()
+        b_post = Supply1.objects.get(pk=b.pk)
+        self.assertEqual(b_post.level, 42)
+        self.assertEqual(b_post.performance, 0.7)
+
+    def test_downcast_all(self):
+        """Does ``downcast_all()`` fetch the additional columns with one query per class?"""
+        ships = list(Ship.objects.all())
+        sats = Civil212.objects.count()
+        with CaptureQueriesContext(connection) as c:
+            real = downcast_all(ships)
+        self.assertEqual(len(c), 1)
+        self.assertEqual(len([s for s in real if isinstance(s, Civil212)]), sats)
+        for s in real:
+            self.assertEqual(s.__class__, get_real_class(s.content_type_id))
+            if isinstance(s, Civil212):
+                self.assertEqual(s.astro_object_id, Civil212.objects.get(pk=s.pk).astro_object_id)
@@ -0,0 +1,53 @@
+"""Contains tests for oweb.models.signals"""
+# Django imports
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+# app imports
+from oweb.tests import OWebModelTests
+from oweb.models.account import Account
+from oweb.models.planet import Moon, Planet
+from oweb.models.building import Building, Supply1
+from oweb.models.defense import Defense
+from oweb.models.research import Research
+from oweb.models.ship import Ship, Civil212
+from oweb.models.signals import ACCOUNT_RESEARCH, ACCOUNT_SHIPS, PLANET_BUILDINGS, PLANET_DEFENSE, MOON_BUILDINGS, MOON_DEFENSE, bulk_create_items
+
+
+class OWebModelsSignalsTests(OWebModelTests):
+
+    def _assert_items(self, objects, models, type_field='content_type_id'):
+        self.assertEqual(sorted(o.as_real_class().__class__.__name__ for o in objects),
+                         sorted(m.__name__ for m in models))
+        for o in objects:
+            real = o.as_real_class()
+            self.assertEqual(getattr(o, type_field), ContentType.objects.get_for_model(real.__class__).id)
+            self.assertEqual(o.name, real.__class__().name)
+
+    def test_create_account(self):
+        """Does a new account get all of its objects?"""
+        acc = Account.objects.create(owner=User.objects.get(username='test01'))
+        self._assert_items(Research.objects.filter(account=acc), ACCOUNT_RESEARCH, type_field='real_class_id')
+        self._assert_items(Ship.objects.filter(account=acc).exclude(content_type__model='civil212'), ACCOUNT_SHIPS)
+
+        planet = Planet.objects.get(account=acc)
+        self._assert_items(Building.objects.filter(astro_object=planet), PLANET_BUILDINGS)
+        self._assert_items(Defense.objects.filter(astro_object=planet), PLANET_DEFENSE)
+        self.assertEqual(Civil212.objects.get(astro_object=planet).account_id, acc.id)
+        self.assertEqual(Supply1.objects.get(astro_object=planet).performance, 1.0)
+
+    def test_create_moon(self):
+        """Does a new moon get all of its objects?"""
+        planet = Planet.objects.exclude(id__in=Moon.objects.values('planet_id')).first()
+        moon = Moon.objects.create(planet=planet)
+        self._assert_items(Building.objects.filter(astro_object=moon), MOON_BUILDINGS)
+        self._assert_items(Defense.objects.filter(astro_object=moon), MOON_DEFENSE)
+        self.assertEqual(Civil212.objects.get(astro_object=moon).account_id, planet.account_id)
+
+    def test_queries(self):
+        """Does ``bulk_create_items()`` need one query per table?"""
+        planet = Planet.objects.first()
+        Defense.objects.filter(astro_object=planet).delete()
+        ContentType.objects.get_for_models(*PLANET_DEFENSE)
+        with self.assertNumQueries(2 + len(PLANET_DEFENSE)):
+            bulk_create_items(Defense, PLANET_DEFENSE, astro_object=planet)
+        self._assert_items(Defense.objects.filter(astro_object=planet), PLANET_DEFENSE)
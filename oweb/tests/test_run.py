@@ -1,11 +1,30 @@
+from oweb.tests.libs.cache import *
+from oweb.tests.libs.costs import *
+from oweb.tests.libs.importer import *
+from oweb.tests.libs.navigation import *
+from oweb.tests.libs.points import *
+from oweb.tests.libs.production import *
+from oweb.tests.libs.projection import *
+from oweb.tests.libs.queue import *
+from oweb.tests.libs.simulation import *
+from oweb.tests.models.polymorphic import *
+from oweb.tests.models.signals import *
 from oweb.tests.views.account_delete import *
+from oweb.tests.views.account_empire import *
+from oweb.tests.views.account_import import *
+from oweb.tests.views.account_overview import *
 from oweb.tests.views.account_settings_commit import *
 from oweb.tests.views.create_account import *
 from oweb.tests.views.home import *
 from oweb.tests.views.item_update import *
+from oweb.tests.views.items_update import *
+from oweb.tests.views.moon_buildings import *
 from oweb.tests.views.moon_create import *
 from oweb.tests.views.moon_delete import *
+from oweb.tests.views.moon_overview import *
 from oweb.tests.views.moon_settings_commit import *
+from oweb.tests.views.planet_buildings import *
 from oweb.tests.views.planet_create import *
 from oweb.tests.views.planet_delete import *
+from oweb.tests.views.planet_overview import *
 from oweb.tests.views.planet_settings_commit import *
@@ -0,0 +1,95 @@
+"""Contains tests for oweb.views.account.account_empire"""
+# Django imports
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import override_settings, CaptureQueriesContext
+from django.contrib.auth.models import User
+# app imports
+from oweb.tests import OWebViewTests
+from oweb.models.account import Account
+from oweb.models.planet import Planet, Moon
+from oweb.models.building import Building
+from oweb.models.defense import Defense
+from oweb.libs.points import get_planet_points
+
+
+@override_settings(AUTH_USER_MODEL='auth.User')
+class OWebViewsAccountEmpireTests(OWebViewTests):
+
+    def test_login_required(self):
+        """Unauthenticated users should be redirected to oweb:app_login"""
+        r = self.client.get(reverse('oweb:account_empire', args=[1,]))
+        self.assertRedirects(r,
+                             reverse('oweb:app_login'),
+                             status_code=302,
+                             target_status_code=200)
+
+    def test_account_owner(self):
+        """Can somebody access an account he doesn't posess?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        self.client.login(username='test02', password='foo')
+        r = self.client.get(reverse('oweb:account_empire', args=[acc.id]))
+        self.assertEqual(r.status_code, 403)
+        self.assertTemplateUsed(r, 'oweb/403.html')
+
+    def test_empire(self):
+        """Does ``account_empire()`` build the grid of all planets?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        planets = list(Planet.objects.filter(account=acc))
+        self.client.login(username='test01', password='foo')
+        r = self.client.get(reverse('oweb:account_empire', args=[acc.id]))
+        self.assertEqual(r.status_code, 200)
+        self.assertTemplateUsed(r, 'oweb/account_empire.html')
+
+        empire = dict(r.context['empire'])
+        for rows in empire.values():
+            for row in rows:
+                self.assertEqual(len(row), len(planets) + 1)
+
+        # points of the planets
+        self.assertEqual([c[1] for c in empire['Meta'][3][1:]],
+                         [get_planet_points(p)[0] for p in planets])
+
+        # the buildings and the Solar Satellites, the defense devices
+        self.assertEqual(len(empire['Buildings']), Building.objects.filter(astro_object=planets[0]).count() + 1)
+        self.assertEqual(empire['Buildings'][-1][0], ('caption', 'Solar Satellite'))
+        self.assertEqual(len(empire['Defense']), Defense.objects.filter(astro_object=planets[0]).count())
+        for row in empire['Buildings'] + empire['Defense']:
+            for cell in row[1:]:
+                self.assertEqual(row[0][1], cell[1].name)
+
+        # only the second planet has a moon
+        moon = Moon.objects.get(planet__account=acc)
+        for row in empire['Moon']:
+            for p, cell in zip(planets, row[1:]):
+                if p.id == moon.planet_id:
+                    self.assertEqual(cell[1].astro_object_id, moon.id)
+                    self.assertIn(cell[0], ('moon_building', 'moon_defense'))
+                else:
+                    self.assertEqual(cell, ('no_moon', 0))
+
+    def test_constant_queries(self):
+        """Does ``account_empire()`` need the same number of queries, regardless of the number of planets?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        self.client.login(username='test01', password='foo')
+        url = reverse('oweb:account_empire', args=[acc.id])
+        # warm up the ContentType cache
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as pre:
+            r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+
+        p = Planet.objects.create(account=acc)
+        Moon.objects.create(planet=p)
+        # the navigation is fetched again
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as post:
+            r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(pre), len(post))
+        self.assertEqual(len(dict(r.context['empire'])['Meta'][0]), 4)
@@ -0,0 +1,95 @@
+"""Contains tests for oweb.views.account.account_import and oweb.views.updates.account_import_commit"""
+# Django imports
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+from django.contrib.auth.models import User
+# app imports
+from oweb.tests import OWebViewTests
+from oweb.models.account import Account
+from oweb.models.planet import Moon, Planet
+from oweb.models.building import Supply1, Station14, Station41
+from oweb.models.research import Research113
+
+
+@override_settings(AUTH_USER_MODEL='auth.User')
+class OWebViewsAccountImportTests(OWebViewTests):
+
+    def test_login_required(self):
+        """Unauthenticated users should be redirected to oweb:app_login"""
+        acc = Account.objects.first()
+        r = self.client.get(reverse('oweb:account_import', args=[acc.id]))
+        self.assertRedirects(r,
+                             reverse('oweb:app_login'),
+                             status_code=302,
+                             target_status_code=200)
+
+    def test_account_owner(self):
+        """Can somebody import into an account he doesn't posess?"""
+        acc = Account.objects.get(owner=User.objects.get(username='test01'))
+        self.client.login(username='test02', password='foo')
+        r = self.client.get(reverse('oweb:account_import', args=[acc.id]))
+        self.assertEqual(r.status_code, 403)
+        r = self.client.post(reverse('oweb:account_import_commit', args=[acc.id]),
+                             data={'import_text': 'Energy Technology (Level 30)'})
+        self.assertEqual(r.status_code, 403)
+        self.assertNotEqual(Research113.objects.get(account=acc).level, 30)
+
+    def test_get(self):
+        """Does ``account_import()`` show the form?"""
+        acc = Account.objects.get(owner=User.objects.get(username='test01'))
+        self.client.login(username='test01', password='foo')
+        r = self.client.get(reverse('oweb:account_import', args=[acc.id]))
+        self.assertEqual(r.status_code, 200)
+        self.assertTemplateUsed(r, 'oweb/account_import.html')
+
+    def test_import(self):
+        """Does ``account_import_commit()`` apply the imported text?"""
+        acc = Account.objects.get(owner=User.objects.get(username='test01'))
+        planet = Planet.objects.filter(account=acc).first()
+        moon = Moon.objects.get(planet__account=acc)
+        self.client.login(username='test01', password='foo')
+
+        r = self.client.post(reverse('oweb:account_import_commit', args=[acc.id]),
+                             data={'import_text': '\t[%s]\t[9:9:9]\nMetal Mine\t31\t1\n'
+                                                  'Energy Technology\t20\t20\n' % planet.coord})
+        self.assertRedirects(r,
+                             reverse('oweb:account_overview', args=[acc.id]),
+                             status_code=302,
+                             target_status_code=200)
+        self.assertEqual(Supply1.objects.get(astro_object=planet).level, 31)
+        self.assertEqual(Research113.objects.get(account=acc).level, 20)
+
+        r = self.client.post(reverse('oweb:account_import_commit', args=[acc.id]),
+                             data={'import_text': 'Lunar Base (Level 4)', 'import_body': moon.id})
+        self.assertEqual(r.status_code, 302)
+        self.assertEqual(Station41.objects.get(astro_object=moon).level, 4)
+
+    def test_foreign_body(self):
+        """Can somebody import into a planet of another account?"""
+        acc = Account.objects.get(owner=User.objects.get(username='test01'))
+        other = Planet.objects.exclude(account=acc).first()
+        self.client.login(username='test01', password='foo')
+        r = self.client.post(reverse('oweb:account_import_commit', args=[acc.id]),
+                             data={'import_text': 'Metal Mine (Level 40)', 'import_body': other.id})
+        self.assertEqual(r.status_code, 500)
+        self.assertNotEqual(Supply1.objects.get(astro_object=other).level, 40)
+
+    def test_import_moons(self):
+        """Does the empire view of the moons leave the planets unchanged?"""
+        acc = Account.objects.get(owner=User.objects.get(username='test01'))
+        moon = Moon.objects.get(planet__account=acc)
+        level = Station14.objects.get(astro_object=moon.planet).level
+        self.client.login(username='test01', password='foo')
+
+        r = self.client.post(reverse('oweb:account_import_commit', args=[acc.id]),
+                             data={'import_text': '\t[%s]\nRobotics Factory\t%d\n' % (moon.coord, level + 5),
+                                   'import_columns': 'moons'})
+        self.assertEqual(r.status_code, 302)
+        self.assertEqual(Station14.objects.get(astro_object=moon.planet).level, level)
+        self.assertEqual(Station14.objects.get(astro_object=moon).level, level + 5)
+
+        r = self.client.post(reverse('oweb:account_import_commit', args=[acc.id]),
+                             data={'import_text': '\t[%s]\nRobotics Factory\t1\n' % moon.coord,
+                                   'import_columns': 'stars'})
+        self.assertEqual(r.status_code, 500)
+        self.assertEqual(Station14.objects.get(astro_object=moon).level, level + 5)
@@ -0,0 +1,68 @@
+"""Contains tests for oweb.views.account.account_overview"""
+# Django imports
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import override_settings, CaptureQueriesContext
+from django.contrib.auth.models import User
+# app imports
+from oweb.tests import OWebViewTests
+from oweb.models.account import Account
+from oweb.models.planet import Planet, Moon
+from oweb.libs.production import get_planet_production
+
+
+@override_settings(AUTH_USER_MODEL='auth.User')
+class OWebViewsAccountOverviewTests(OWebViewTests):
+
+    def test_login_required(self):
+        """Unauthenticated users should be redirected to oweb:app_login"""
+        r = self.client.get(reverse('oweb:account_overview', args=[1,]))
+        self.assertRedirects(r,
+                             reverse('oweb:app_login'),
+                             status_code=302,
+                             target_status_code=200)
+
+    def test_account_owner(self):
+        """Can somebody access an account he doesn't posess?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        self.client.login(username='test02', password='foo')
+        r = self.client.get(reverse('oweb:account_overview', args=[acc.id]))
+        self.assertEqual(r.status_code, 403)
+        self.assertTemplateUsed(r, 'oweb/403.html')
+
+    def test_constant_queries(self):
+        """Does ``account_overview()`` need the same number of queries, regardless of the number of planets?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        self.client.login(username='test01', password='foo')
+        url = reverse('oweb:account_overview', args=[acc.id])
+        # warm up the ContentType cache
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as pre:
+            r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+
+        p = Planet.objects.create(account=acc)
+        Moon.objects.create(planet=p)
+        # the navigation is fetched again
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as post:
+            r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(pre), len(post))
+        self.assertEqual(len(r.context['points']['planets']), 3)
+
+    def test_production(self):
+        """Does ``account_overview()`` calculate the same production as the planet based functions?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        planets = Planet.objects.filter(account=acc)
+        production = [get_planet_production(p, acc.speed) for p in planets]
+        production = tuple(sum(x) for x in zip(*production))
+        self.client.login(username='test01', password='foo')
+        r = self.client.get(reverse('oweb:account_overview', args=[acc.id]))
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.context['production'], production)
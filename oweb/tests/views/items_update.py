@@ -0,0 +1,115 @@
+"""Contains tests for oweb.views.updates.items_update"""
+# Django imports
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+from django.contrib.auth.models import User
+# app imports
+from oweb.tests import OWebViewTests
+from oweb.models.account import Account
+from oweb.models.research import Research
+from oweb.models.ship import Ship
+from oweb.models.planet import Planet, Moon
+from oweb.models.building import Building
+from oweb.models.defense import Defense
+from oweb.libs.queue import get_cached_planet_queue
+from oweb.views.updates import apply_item_updates
+
+
+@override_settings(AUTH_USER_MODEL='auth.User')
+class OWebViewsItemsUpdateTests(OWebViewTests):
+
+    def _items(self, acc):
+        p = Planet.objects.filter(account=acc).first()
+        m = Moon.objects.filter(planet__account=acc).first()
+        return [('research', Research.objects.filter(account=acc).first()),
+                ('ship', Ship.objects.filter(account=acc).first()),
+                ('building', Building.objects.filter(astro_object=p)[0]),
+                ('building', Building.objects.filter(astro_object=p)[1]),
+                ('moon_building', Building.objects.filter(astro_object=m).first()),
+                ('defense', Defense.objects.filter(astro_object=p).first()),
+                ('moon_defense', Defense.objects.filter(astro_object=m).first())]
+
+    def _data(self, items, value):
+        return {'item_type': [t for t, o in items],
+                'item_id': [o.id for t, o in items],
+                'item_level': [value] * len(items)}
+
+    def _value(self, obj):
+        return getattr(obj.__class__.objects.get(pk=obj.pk), 'count' if isinstance(obj, (Ship, Defense)) else 'level')
+
+    def test_login_required(self):
+        """Unauthenticated users should be redirected to oweb:app_login"""
+        r = self.client.get(reverse('oweb:items_update'))
+        self.assertRedirects(r,
+                             reverse('oweb:app_login'),
+                             status_code=302,
+                             target_status_code=200)
+
+    def test_account_owner(self):
+        """Can somebody update items he doesn't posess?"""
+        acc = Account.objects.get(owner=User.objects.get(username='test01'))
+        other = Account.objects.get(owner=User.objects.get(username='test02'))
+        items = self._items(acc)[:1] + [('research', Research.objects.filter(account=other).first())]
+        self.client.login(username='test01', password='foo')
+        r = self.client.post(reverse('oweb:items_update'),
+                             data=self._data(items, 33),
+                             HTTP_REFERER=reverse('oweb:account_research', args=[acc.id]))
+        self.assertEqual(r.status_code, 403)
+        self.assertTemplateUsed(r, 'oweb/403.html')
+        for t, o in items:
+            self.assertNotEqual(self._value(o), 33)
+
+    def test_no_post(self):
+        """What if no POST data is supplied?"""
+        self.client.login(username='test01', password='foo')
+        r = self.client.post(reverse('oweb:items_update'))
+        self.assertEqual(r.status_code, 500)
+        self.assertTemplateUsed(r, 'oweb/500.html')
+
+    def test_illegal_parameters(self):
+        """What if the lists do not match or contain illegal values?"""
+        acc = Account.objects.get(owner=User.objects.get(username='test01'))
+        items = self._items(acc)
+        self.client.login(username='test01', password='foo')
+        data = self._data(items, 5)
+        data['item_level'] = data['item_level'][1:]
+        r = self.client.post(reverse('oweb:items_update'), data=data)
+        self.assertEqual(r.status_code, 500)
+        r = self.client.post(reverse('oweb:items_update'), data=self._data(items, 'foo'))
+        self.assertEqual(r.status_code, 500)
+
+    def test_update(self):
+        """Does ``items_update()`` update all items?"""
+        acc = Account.objects.get(owner=User.objects.get(username='test01'))
+        items = self._items(acc)
+        self.client.login(username='test01', password='foo')
+        r = self.client.post(reverse('oweb:items_update'),
+                             data=self._data(items, 7),
+                             HTTP_REFERER=reverse('oweb:account_overview', args=[acc.id]))
+        self.assertRedirects(r,
+                             reverse('oweb:account_overview', args=[acc.id]),
+                             status_code=302,
+                             target_status_code=200)
+        for t, o in items:
+            self.assertEqual(self._value(o), 7)
+
+    def test_queries(self):
+        """Does ``apply_item_updates()`` need one query per base class and value?"""
+        u = User.objects.get(username='test01')
+        items = self._items(Account.objects.get(owner=u))
+        updates = [(t, o.id, 3) for t, o in items] + [('building', items[3][1].id, 4)]
+        # ownership: 4 base classes, updates: 4 base classes + 1 additional value,
+        # the transaction is a savepoint inside of the test's transaction
+        with self.assertNumQueries(4 + 5 + 2):
+            self.assertEqual(apply_item_updates(u, updates), len(items))
+        self.assertEqual(self._value(items[2][1]), 3)
+        self.assertEqual(self._value(items[3][1]), 4)
+
+    def test_cache(self):
+        """Are the cached queues of the planets invalidated?"""
+        u = User.objects.get(username='test01')
+        p = Planet.objects.select_related('account').filter(account__owner=u).first()
+        queue = get_cached_planet_queue(p)
+        mine = Building.objects.get(pk=queue[0].id)
+        apply_item_updates(u, [('building', mine.id, mine.level + 1)])
+        self.assertNotEqual(get_cached_planet_queue(p)[0], queue[0])
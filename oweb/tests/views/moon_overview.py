@@ -0,0 +1,65 @@
+"""Contains tests for oweb.views.planet.moon_overview"""
+# Django imports
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+from django.contrib.auth.models import User
+# app imports
+from oweb.tests import OWebViewTests
+from oweb.models.account import Account
+from oweb.models.building import Building, Station41
+from oweb.models.planet import Moon
+from oweb.libs.points import get_moon_points
+
+
+@override_settings(AUTH_USER_MODEL='auth.User')
+class OWebViewsMoonOverviewTests(OWebViewTests):
+
+    def test_login_required(self):
+        """Unauthenticated users should be redirected to oweb:app_login"""
+        o = Moon.objects.first()
+        r = self.client.get(reverse('oweb:moon_overview', args=[o.id]))
+        self.assertRedirects(r,
+                             reverse('oweb:app_login'),
+                             status_code=302,
+                             target_status_code=200)
+
+    def test_account_owner(self):
+        """Can somebody access a moon of an account he doesn't posess?"""
+        u = User.objects.get(username='test01')
+        o = Moon.objects.filter(planet__account__owner=u).first()
+        self.client.login(username='test02', password='foo')
+        r = self.client.get(reverse('oweb:moon_overview', args=[o.id]))
+        self.assertEqual(r.status_code, 403)
+        self.assertTemplateUsed(r, 'oweb/403.html')
+
+    def test_overview(self):
+        """Does ``moon_overview()`` provide the fields and points of the moon?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        o = Moon.objects.filter(planet__account=acc).first()
+        self.client.login(username='test01', password='foo')
+        r = self.client.get(reverse('oweb:moon_overview', args=[o.id]))
+        self.assertEqual(r.status_code, 200)
+        self.assertTemplateUsed(r, 'oweb/moon_overview.html')
+        self.assertEqual(r.context['points'], get_moon_points(o))
+        self.assertEqual(r.context['moon_fields'],
+                         (sum(b.level for b in Building.objects.filter(astro_object=o)),
+                          Station41.objects.get(astro_object=o).level * 3 + 1))
+
+    def test_queries(self):
+        """Do the moon pages fetch the moon, its planet and the account at once?"""
+        u = User.objects.get(username='test01')
+        o = Moon.objects.filter(planet__account__owner=u).first()
+        self.client.login(username='test01', password='foo')
+        # warm up the ContentType cache
+        self.client.get(reverse('oweb:moon_buildings', args=[o.id]))
+
+        # session, user, moon and the objects of the page; the navigation is
+        # cached
+        for view, queries in (('oweb:moon_overview', 5),
+                              ('oweb:moon_buildings', 5),
+                              ('oweb:moon_defense', 4),
+                              ('oweb:moon_settings', 3)):
+            with self.assertNumQueries(queries):
+                r = self.client.get(reverse(view, args=[o.id]))
+            self.assertEqual(r.status_code, 200)
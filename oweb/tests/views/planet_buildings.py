@@ -0,0 +1,48 @@
+"""Contains tests for oweb.views.planet.planet_buildings"""
+# Django imports
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+from django.contrib.auth.models import User
+# app imports
+from oweb.tests import OWebViewTests
+from oweb.models.account import Account
+from oweb.models.planet import Planet
+from oweb.models.building import Station15
+from oweb.libs.production import get_build_times, get_planet_capacity
+
+
+@override_settings(AUTH_USER_MODEL='auth.User')
+class OWebViewsPlanetBuildingsTests(OWebViewTests):
+
+    def test_login_required(self):
+        """Unauthenticated users should be redirected to oweb:app_login"""
+        o = Planet.objects.first()
+        r = self.client.get(reverse('oweb:planet_buildings', args=[o.id]))
+        self.assertRedirects(r,
+                             reverse('oweb:app_login'),
+                             status_code=302,
+                             target_status_code=200)
+
+    def test_build_times(self):
+        """Does ``planet_buildings()`` provide the build time of every building?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        o = Planet.objects.filter(account=acc).first()
+        self.client.login(username='test01', password='foo')
+        r = self.client.get(reverse('oweb:planet_buildings', args=[o.id]))
+        self.assertEqual(r.status_code, 200)
+        self.assertTemplateUsed(r, 'oweb/planet_buildings.html')
+        buildings = [b for b, time in r.context['build_times']]
+        self.assertEqual(buildings, r.context['buildings'])
+        self.assertEqual([time for b, time in r.context['build_times']],
+                         get_build_times(buildings, get_planet_capacity(o)))
+
+    def test_missing_capacity(self):
+        """Does ``planet_buildings()`` fail without the buildings of the capacity?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        o = Planet.objects.filter(account=acc).first()
+        Station15.objects.filter(astro_object=o).delete()
+        self.client.login(username='test01', password='foo')
+        r = self.client.get(reverse('oweb:planet_buildings', args=[o.id]))
+        self.assertEqual(r.status_code, 404)
@@ -0,0 +1,69 @@
+"""Contains tests for oweb.views.planet.planet_overview"""
+# Django imports
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+from django.contrib.auth.models import User
+# app imports
+from oweb.tests import OWebViewTests
+from oweb.models.account import Account
+from oweb.models.planet import Planet
+from oweb.libs.cache import bump_version
+from oweb.libs.production import PerformanceSettings
+
+
+@override_settings(AUTH_USER_MODEL='auth.User')
+class OWebViewsPlanetOverviewTests(OWebViewTests):
+
+    def test_login_required(self):
+        """Unauthenticated users should be redirected to oweb:app_login"""
+        p = Planet.objects.first()
+        r = self.client.get(reverse('oweb:planet_overview', args=[p.id]))
+        self.assertRedirects(r,
+                             reverse('oweb:app_login'),
+                             status_code=302,
+                             target_status_code=200)
+
+    def test_account_owner(self):
+        """Can somebody access a planet of an account he doesn't posess?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        p = Planet.objects.filter(account=acc).first()
+        self.client.login(username='test02', password='foo')
+        r = self.client.get(reverse('oweb:planet_overview', args=[p.id]))
+        self.assertEqual(r.status_code, 403)
+        self.assertTemplateUsed(r, 'oweb/403.html')
+
+    def test_performance(self):
+        """Does ``planet_overview()`` provide the best performances?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        p = Planet.objects.filter(account=acc).first()
+        self.client.login(username='test01', password='foo')
+        r = self.client.get(reverse('oweb:planet_overview', args=[p.id]))
+        self.assertEqual(r.status_code, 200)
+        self.assertTemplateUsed(r, 'oweb/planet_overview.html')
+        self.assertTrue(isinstance(r.context['performance'], PerformanceSettings))
+        self.assertContains(r, 'class="performance"')
+
+    def test_queries(self):
+        """Does ``planet_overview()`` fetch every table only once?"""
+        u = User.objects.get(username='test01')
+        acc = Account.objects.filter(owner=u).first()
+        p = Planet.objects.filter(account=acc).first()
+        self.client.login(username='test01', password='foo')
+        url = reverse('oweb:planet_overview', args=[p.id])
+        # warm up the ContentType cache and the queue
+        self.client.get(url)
+
+        # session, user, planet, moon, buildings (and the columns of five
+        # mines), defense, ships (and the Solar Satellites) and research; the
+        # navigation is cached
+        with self.assertNumQueries(14):
+            r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+
+        # the queue is built from the same objects
+        bump_version('planet', p.id)
+        with self.assertNumQueries(14):
+            r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
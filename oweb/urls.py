@@ -7,8 +7,11 @@ urlpatterns = patterns('oweb.views',
 
     # updates.py
     url(r'^update$', 'item_update', name='item_update'),
+    url(r'^update/bulk$', 'items_update', name='items_update'),
     url(r'^(?P<account_id>\d+)/settings/commit$',
         'account_settings_commit', name='account_settings_commit'),
+    url(r'^(?P<account_id>\d+)/import/commit$',
+        'account_import_commit', name='account_import_commit'),
     url(r'^planet/(?P<planet_id>\d+)/settings/update$',
         'planet_settings_commit', name='planet_settings_update'),
     url(r'^create$', 'create_account', name='create_account'),
@@ -30,6 +33,8 @@ urlpatterns = patterns('oweb.views',
         'account_overview', name='account_overview'),
     url(r'^(?P<account_id>\d+)/settings$',
         'account_settings', name='account_settings'),
+    url(r'^(?P<account_id>\d+)/import$',
+        'account_import', name='account_import'),
     url(r'^(?P<account_id>\d+)/research$',
         'account_research', name='account_research'),
     url(r'^(?P<account_id>\d+)/ships$',
@@ -1,6 +1,6 @@
 """Contains all account related views"""
 # Python imports
-from itertools import chain, izip_longest, repeat
+from itertools import chain
 # Django imports
 from django.core.urlresolvers import reverse
 from django.contrib.contenttypes.models import ContentType
@@ -8,11 +8,11 @@ from django.http import Http404, HttpResponseRedirect
 from django.shortcuts import redirect, render
 # app imports
 from oweb.exceptions import OWebDoesNotExist, OWebAccountAccessViolation
+from oweb.context_processors import Navigation
 from oweb.models import Account, Building, Civil212, Defense, Planet, Research, Ship, Moon
-from oweb.libs.production import get_planet_production
-from oweb.libs.queue import get_planet_queue, get_plasma_queue
-from oweb.libs.points import get_planet_points, get_ship_points, get_research_points
-from oweb.libs.shortcuts import get_object_or_404, get_list_or_404
+from oweb.libs.queue import get_account_queue
+from oweb.libs.points import get_moon_points, get_planet_points
+from oweb.libs.snapshot import AccountSnapshot
 
 
 def account_overview(req, account_id):
@@ -36,27 +36,27 @@ def account_overview(req, account_id):
     if not req.user.id == account.owner_id:
         raise OWebAccountAccessViolation
 
+    # fetch all objects of this account at once
+    snapshot = AccountSnapshot(account, planets)
+
     # production
-    production = []
+    production = snapshot.get_production()[1]
     # queue
-    queue = []
+    queue = get_account_queue(account, limit=20, snapshot=snapshot)
     # points
     total_points = 0
     production_points = 0
     other_points = 0
     defense_points = 0
     moon_points = 0
-    research_points = get_research_points(account)
-    ship_points = get_ship_points(account)
+    account_points = snapshot.get_points()
+    research_points = account_points['research']
+    ship_points = account_points['ships']
     planet_points = []
 
-    for p in planets:
-        # production
-        production.append(get_planet_production(p, account.speed))
-        # queue
-        queue += get_planet_queue(p)[:5]
+    for p in snapshot.planets:
         # points
-        this_planet_points = get_planet_points(p)
+        this_planet_points = account_points['planets'][p.id]
         production_points += this_planet_points[1]
         other_points += this_planet_points[2]
         defense_points += this_planet_points[3]
@@ -64,12 +64,6 @@ def account_overview(req, account_id):
         moon_points += this_planet_points[5]
         planet_points.append((this_planet_points, p))
 
-    # production
-    production = tuple(sum(x) for x in zip(*production))
-    # queue
-    queue += get_plasma_queue(account, production=production)
-    queue.sort()
-    queue = queue[:20]
     # points
     total_points = production_points + other_points + defense_points + moon_points + research_points + ship_points[0]
     points = {}
@@ -118,7 +112,7 @@ def account_overview(req, account_id):
     return render(req, 'oweb/account_overview.html', 
         {
             'account': account,
-            'planets': planets,
+            'navigation': Navigation(req),
             'production': production,
             'queue': queue,
             'points': points,
@@ -126,6 +120,40 @@ def account_overview(req, account_id):
     )
 
 
+def _pivot(columns, missing=('none', 0)):
+    """Returns the rows of a table of the empire view
+
+    :param columns: The items of every planet, as ``(item_type, item)`` tuples
+    :type columns: list of lists
+    :param missing: The cell of a column without items (default: ('none', 0))
+    :type missing: tuple
+    :returns: list -- The rows, starting with the caption of the item
+
+    The rows are matched by the *real* class of the items, so planets with
+    missing items do not shift the other cells.
+    """
+    captions = []
+    cells = {}
+    for i, column in enumerate(columns):
+        for item_type, item in column or ():
+            key = (item_type, item.content_type_id)
+            if key not in cells:
+                captions.append((key, item.name))
+                cells[key] = {}
+            cells[key][i] = (item_type, item)
+
+    rows = []
+    for key, name in captions:
+        row = [('caption', name)]
+        for i, column in enumerate(columns):
+            if column is None:
+                row.append(missing)
+            else:
+                row.append(cells[key].get(i, ('none', 0)))
+        rows.append(row)
+    return rows
+
+
 def account_empire(req, account_id):
     """Provides the empire view"""
     # this is the non-decorator version of the login_required decorator
@@ -147,53 +175,55 @@ def account_empire(req, account_id):
     if not req.user.id == account.owner_id:
         raise OWebAccountAccessViolation
 
+    # fetch all objects of the empire with one query per table
+    planets = list(planets)
+    moons = dict((m.planet_id, m) for m in Moon.objects.filter(planet__account_id=account.id))
+    astro_ids = [p.id for p in planets] + [m.id for m in moons.values()]
+
+    buildings = {}
+    for b in Building.objects.filter(astro_object_id__in=astro_ids).order_by('id'):
+        buildings.setdefault(b.astro_object_id, []).append(b)
+    defense = {}
+    for d in Defense.objects.filter(astro_object_id__in=astro_ids).order_by('id'):
+        defense.setdefault(d.astro_object_id, []).append(d)
+    sats = dict((s.astro_object_id, s) for s in Civil212.objects.filter(account_id=account.id))
+
     tmp_meta = []
     tmp_buildings = []
     tmp_defense = []
     tmp_moon = []
-    tmp_defense_points = []
-    tmp_building_points = []
-    moon_list = None
     for p in planets:
-        tmp_points = get_planet_points(p)
-        tmp_building_points.append(('plain', tmp_points[1] + tmp_points[2]))
-        tmp_defense_points.append(('plain', tmp_points[3]))
-
-        tmp_planet = []
-        tmp_planet.append(('planet', p.id, p.name))
-        tmp_planet.append(('coord', p.coord))
-        tmp_planet.append(('temp', p.max_temp))
-        tmp_planet.append(('points', tmp_points[0]))
-        tmp_meta.append(tmp_planet)
-
-        b_list = list(izip_longest(
-            [],
-            get_list_or_404(Building, astro_object=p),
-            fillvalue='building'))
-        b_list.append(('ship', get_object_or_404(Civil212, astro_object=p)))
+        moon = moons.get(p.id)
+        if moon:
+            moon_points = get_moon_points(moon,
+                                          buildings=buildings.get(moon.id, []),
+                                          defense=defense.get(moon.id, []))
+        else:
+            moon_points = (0, 0, 0)
+        tmp_points = get_planet_points(p,
+                                       buildings=buildings.get(p.id, []),
+                                       defense=defense.get(p.id, []),
+                                       moon_points=moon_points)
+
+        tmp_meta.append([
+            ('planet', p.id, p.name),
+            ('coord', p.coord),
+            ('temp', p.max_temp),
+            ('points', tmp_points[0]),
+        ])
+
+        b_list = [('building', b) for b in buildings.get(p.id, [])]
+        if p.id in sats:
+            b_list.append(('ship', sats[p.id]))
         tmp_buildings.append(b_list)
 
-        d_list = list(izip_longest(
-            [],
-            get_list_or_404(Defense, astro_object=p),
-            fillvalue='defense'
-        ))
-        tmp_defense.append(d_list)
+        tmp_defense.append([('defense', d) for d in defense.get(p.id, [])])
 
-        try:
-            moon = Moon.objects.get(planet=p)
-            m_b_list = list(izip_longest(
-                [],
-                get_list_or_404(Building, astro_object=moon),
-                fillvalue='moon_building'))
-            m_d_list = list(izip_longest(
-                [],
-                get_list_or_404(Defense, astro_object=moon),
-                fillvalue='moon_defense'))
-            moon_list = m_b_list + m_d_list
-            tmp_moon.append(moon_list)
-        except Moon.DoesNotExist:
-            tmp_moon.append([])
+        if moon:
+            tmp_moon.append([('moon_building', b) for b in buildings.get(moon.id, [])] +
+                            [('moon_defense', d) for d in defense.get(moon.id, [])])
+        else:
+            tmp_moon.append(None)
 
     tmp_meta.insert(0, [
         ('caption', 'Planet'),
@@ -203,25 +233,12 @@ def account_empire(req, account_id):
     ])
     tmp_meta = zip(*tmp_meta)
 
-    tmp_buildings.insert(0, [('caption', i[1].name) for i in b_list])
-    tmp_buildings = zip(*tmp_buildings)
-
-    tmp_defense.insert(0, [('caption', i[1].name) for i in d_list])
-    tmp_defense = zip(*tmp_defense)
-
-    if moon_list:
-        tmp_moon2 = tmp_moon
+    tmp_buildings = _pivot(tmp_buildings)
+    tmp_defense = _pivot(tmp_defense)
+    if moons:
+        tmp_moon = _pivot(tmp_moon, missing=('no_moon', 0))
+    else:
         tmp_moon = []
-        moon_len = len(moon_list)
-        for i in tmp_moon2:
-            if len(i) < moon_len:
-                tmp_moon.append(list(repeat(('no_moon', 0), moon_len)))
-            else:
-                tmp_moon.append(i)
-
-        tmp_moon.insert(0, [('caption', i[1].name) for i in moon_list])
-        tmp_moon = zip(*tmp_moon)
-
 
     empire = [
         ('Meta', tmp_meta),
@@ -233,7 +250,7 @@ def account_empire(req, account_id):
     return render(req, 'oweb/account_empire.html',
                   {
                       'account': account,
-                      'planets': planets,
+                      'navigation': Navigation(req),
                       'empire': empire,
                   }
     )
@@ -263,7 +280,40 @@ def account_settings(req, account_id):
     return render(req, 'oweb/account_settings.html',
                   {
                       'account': account,
+                      'navigation': Navigation(req),
+                  }
+    )
+
+
+def account_import(req, account_id):
+    """Provides the import of text, that is copied from the game"""
+    # this is the non-decorator version of the login_required decorator
+    # basically it checks, if the user is authenticated and redirects him, if
+    # not. The decorator could not handle the reverse url-resolution.
+    if not req.user.is_authenticated():
+        return redirect(reverse('oweb:app_login'))
+
+    # fetch the account and the list of planets
+    try:
+        planets = Planet.objects.select_related('account').filter(account_id=account_id)
+        account = planets.first().account
+    except Planet.DoesNotExist:
+        raise OWebDoesNotExist
+    except AttributeError:
+        return redirect(reverse('oweb:account_delete', args=account_id))
+
+    # checks, if this account belongs to the authenticated user
+    if not req.user.id == account.owner_id:
+        raise OWebAccountAccessViolation
+
+    moons = Moon.objects.select_related('planet').filter(planet__account_id=account.id)
+
+    return render(req, 'oweb/account_import.html',
+                  {
+                      'account': account,
+                      'navigation': Navigation(req),
                       'planets': planets,
+                      'moons': moons,
                   }
     )
 
@@ -289,12 +339,10 @@ def account_research(req, account_id):
     if not req.user.id == account.owner_id:
         raise OWebAccountAccessViolation
 
-    planets = get_list_or_404(Planet, account=account_id)
-
     return render(req, 'oweb/account_research.html',
                   {
                       'account': account,
-                      'planets': planets,
+                      'navigation': Navigation(req),
                       'research': research,
                   }
     )
@@ -328,7 +376,7 @@ def account_ships(req, account_id):
     return render(req, 'oweb/account_ships.html',
                   {
                       'account': account,
-                      'planets': planets,
+                      'navigation': Navigation(req),
                       'ships': ships,
                   }
     )
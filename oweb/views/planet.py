@@ -6,13 +6,16 @@ import hashlib
 from django.core.urlresolvers import reverse
 from django.http import Http404, HttpResponseRedirect
 from django.shortcuts import redirect, render
+from django.contrib.contenttypes.models import ContentType
 # app imports
 from oweb.exceptions import OWebDoesNotExist, OWebAccountAccessViolation
-from oweb.models import Account, Building, Civil212, Defense, Planet, Research113, Research122, Moon, Station41
-from oweb.libs.production import get_planet_production
-from oweb.libs.queue import get_planet_queue
-from oweb.libs.points import get_planet_points
+from oweb.context_processors import Navigation
+from oweb.models import Account, Building, Civil212, Defense, Planet, Moon, Station14, Station15, Station41, Supply1, Supply2, Supply3, Supply4, Supply12
+from oweb.libs.production import get_build_times, get_capacity
+from oweb.libs.points import get_moon_points
 from oweb.libs.shortcuts import get_list_or_404, get_object_or_404
+from oweb.libs.navigation import get_planet_moon
+from oweb.libs.snapshot import AccountSnapshot
 
 
 def planet_overview(req, planet_id):
@@ -33,31 +36,33 @@ def planet_overview(req, planet_id):
     if not req.user.id == planet.account.owner_id:
         raise OWebAccountAccessViolation
 
-    try:
-        moon = Moon.objects.get(planet=planet.id)
-    except Moon.DoesNotExist:
-        moon = None
-    planets = Planet.objects.filter(account_id=planet.account.id)
-    plasma = get_object_or_404(Research122, account=planet.account.id)
-    energy = get_object_or_404(Research113, account=planet.account.id)
-    buildings = get_list_or_404(Building, astro_object=planet_id)
+    # fetch the objects of this planet and its moon at once
+    snapshot = AccountSnapshot(planet.account, [planet])
+    moon = snapshot.get_moon(planet)
 
     planet_fields = 0
-    for b in buildings:
+    for b in snapshot.get_buildings(planet):
         planet_fields += b.level
 
-    production = get_planet_production(planet, planet.account.speed)
-    queue = get_planet_queue(planet)
-    points = get_planet_points(planet)
+    production = snapshot.get_planet_production(planet)
+    performance = snapshot.get_planet_performance(planet)
+    queue = snapshot.get_cached_planet_queue(planet)
+    points = snapshot.get_planet_points(planet)
 
     return render(req, 'oweb/planet_overview.html',
                   {
                       'account': planet.account,
+                      'navigation': Navigation(req),
                       'planet': planet,
                       'moon': moon,
-                      'planets': planets,
                       'planet_fields': planet_fields,
                       'production': production,
+                      'performance': performance,
+                      'supply1': snapshot.get_item(planet, Supply1),
+                      'supply2': snapshot.get_item(planet, Supply2),
+                      'supply3': snapshot.get_item(planet, Supply3),
+                      'supply4': snapshot.get_item(planet, Supply4),
+                      'supply12': snapshot.get_item(planet, Supply12),
                       'queue': queue,
                       'points': points,
                   }
@@ -82,18 +87,14 @@ def planet_settings(req, planet_id):
     if not req.user.id == planet.account.owner_id:
         raise OWebAccountAccessViolation
 
-    try:
-        moon = Moon.objects.get(planet=planet.id)
-    except Moon.DoesNotExist:
-        moon = None
-    planets = Planet.objects.filter(account_id=planet.account.id)
+    moon = get_planet_moon(planet)
 
     return render(req, 'oweb/planet_settings.html',
                   {
                       'account': planet.account,
+                      'navigation': Navigation(req),
                       'planet': planet,
                       'moon': moon,
-                      'planets': planets,
                       'planets_url': 'oweb:planet_settings',
                   }
     )
@@ -118,21 +119,25 @@ def planet_buildings(req, planet_id):
     if not req.user.id == planet.account.owner_id:
         raise OWebAccountAccessViolation
 
-    try:
-        moon = Moon.objects.get(planet=planet.id)
-    except Moon.DoesNotExist:
-        moon = None
-    planets = Planet.objects.filter(account_id=planet.account.id)
+    moon = get_planet_moon(planet)
     solarsat = get_object_or_404(Civil212, astro_object=planet_id)
 
+    # build times of the next levels
+    buildings = list(buildings)
+    capacity = get_capacity(_get_level(buildings, Station14, required=True),
+                            _get_level(buildings, Station15, required=True),
+                            planet.account.speed)
+    build_times = zip(buildings, get_build_times(buildings, capacity))
+
     return render(req, 'oweb/planet_buildings.html',
                   {
                       'account': planet.account,
+                      'navigation': Navigation(req),
                       'planet': planet,
                       'moon': moon,
-                      'planets': planets,
                       'planets_url': 'oweb:planet_buildings',
                       'buildings': buildings,
+                      'build_times': build_times,
                       'solarsat': solarsat,
                       'True': True,
                       'False': False,
@@ -159,24 +164,53 @@ def planet_defense(req, planet_id):
     if not req.user.id == planet.account.owner_id:
         raise OWebAccountAccessViolation
 
-    try:
-        moon = Moon.objects.get(planet=planet.id)
-    except Moon.DoesNotExist:
-        moon = None
-    planets = Planet.objects.filter(account_id=planet.account.id)
+    moon = get_planet_moon(planet)
 
     return render(req, 'oweb/planet_defense.html',
         {
             'account': planet.account,
+            'navigation': Navigation(req),
             'planet': planet,
             'moon': moon,
-            'planets': planets,
             'planets_url': 'oweb:planet_defense',
             'defense': defense,
         }
     )
 
 
+def _get_moon(moon_id):
+    """Returns a moon with its planet and account
+
+    The moon, the planet and the account are fetched with one query.
+    """
+    try:
+        return Moon.objects.select_related('planet', 'planet__account').get(id=moon_id)
+    except Moon.DoesNotExist:
+        raise OWebDoesNotExist
+
+
+def _get_level(buildings, model, required=False):
+    """Returns the level of a building of a given class or 0
+
+    :param buildings: The buildings of a planet or moon
+    :type buildings: list of Building objects
+    :param model: The *real* class of the building
+    :type model: class
+    :param required: Must the building exist? (default: False)
+    :type required: bool
+    :returns: int -- The level
+
+    A missing, required building raises OWebDoesNotExist.
+    """
+    content_type_id = ContentType.objects.get_for_model(model).id
+    for b in buildings:
+        if b.content_type_id == content_type_id:
+            return b.level
+    if required:
+        raise OWebDoesNotExist
+    return 0
+
+
 def moon_overview(req, moon_id):
     # this is the non-decorator version of the login_required decorator
     # basically it checks, if the user is authenticated and redirects him, if
@@ -184,33 +218,30 @@ def moon_overview(req, moon_id):
     if not req.user.is_authenticated():
         return redirect(reverse('oweb:app_login'))
 
-    # fetch the account and the current planet
-    try:
-        moon = Moon.objects.select_related('planet','planet__account').get(id=moon_id)
-    except Moon.DoesNotExist:
-        raise OWebDoesNotExist
+    # fetch the account and the current moon
+    moon = _get_moon(moon_id)
 
     # checks, if this account belongs to the authenticated user
     if not req.user.id == moon.planet.account.owner_id:
         raise OWebAccountAccessViolation
 
-    planets = Planet.objects.filter(account_id=moon.planet.account.id)
-
-    buildings = Building.objects.filter(astro_object=moon_id)
+    buildings = list(Building.objects.filter(astro_object=moon.id))
+    defense = list(Defense.objects.filter(astro_object=moon.id))
     moon_fields = 0
     for b in buildings:
         moon_fields += b.level
 
-    base = Station41.objects.get(astro_object=moon_id)
-    moon_fields = (moon_fields, base.level * 3 + 1)
+    moon_fields = (moon_fields, _get_level(buildings, Station41) * 3 + 1)
+    points = get_moon_points(moon, buildings=buildings, defense=defense)
 
     return render(req, 'oweb/moon_overview.html',
         {
             'account': moon.planet.account,
+            'navigation': Navigation(req),
             'planet': moon.planet,
             'moon': moon,
             'moon_fields': moon_fields,
-            'planets': planets,
+            'points': points,
         }
     )
 
@@ -222,29 +253,29 @@ def moon_buildings(req, moon_id):
     if not req.user.is_authenticated():
         return redirect(reverse('oweb:app_login'))
 
-    # fetch the account and the current planet
-    try:
-        buildings = Building.objects.select_related('astro_object', 'astro_object__planet').filter(astro_object=moon_id)
-        moon = buildings.first().astro_object.as_real_class()
-    except Moon.DoesNotExist:
-        raise OWebDoesNotExist
-    except AttributeError:
-        raise OWebDoesNotExist
+    # fetch the account and the current moon
+    moon = _get_moon(moon_id)
+    buildings = get_list_or_404(Building, astro_object=moon.id)
 
     # checks, if this account belongs to the authenticated user
     if not req.user.id == moon.planet.account.owner_id:
         raise OWebAccountAccessViolation
-
-    planets = Planet.objects.filter(account_id=moon.planet.account.id)
     solarsat = get_object_or_404(Civil212, astro_object=moon_id)
 
+    # build times of the next levels
+    capacity = get_capacity(_get_level(buildings, Station14),
+                            _get_level(buildings, Station15),
+                            moon.planet.account.speed)
+    build_times = zip(buildings, get_build_times(buildings, capacity))
+
     return render(req, 'oweb/moon_buildings.html',
         {
             'account': moon.planet.account,
+            'navigation': Navigation(req),
             'planet': moon.planet,
             'moon': moon,
-            'planets': planets,
             'buildings': buildings,
+            'build_times': build_times,
             'solarsat': solarsat,
             'True': True,
             'False': False,
@@ -261,27 +292,20 @@ def moon_defense(req, moon_id):
     if not req.user.is_authenticated():
         return redirect(reverse('oweb:app_login'))
 
-    # fetch the account and the current planet
-    try:
-        defense = Defense.objects.select_related('astro_object', 'astro_object__planet').filter(astro_object=moon_id)
-        moon = defense.first().astro_object.as_real_class()
-    except Moon.DoesNotExist:
-        raise OWebDoesNotExist
-    except AttributeError:
-        raise OWebDoesNotExist
+    # fetch the account and the current moon
+    moon = _get_moon(moon_id)
+    defense = get_list_or_404(Defense, astro_object=moon.id)
 
     # checks, if this account belongs to the authenticated user
     if not req.user.id == moon.planet.account.owner_id:
         raise OWebAccountAccessViolation
 
-    planets = Planet.objects.filter(account_id=moon.planet.account.id)
-
     return render(req, 'oweb/moon_defense.html',
         {
             'account': moon.planet.account,
+            'navigation': Navigation(req),
             'planet': moon.planet,
             'moon': moon,
-            'planets': planets,
             'defense': defense,
         }
     )
@@ -294,23 +318,18 @@ def moon_settings(req, moon_id):
     if not req.user.is_authenticated():
         return redirect(reverse('oweb:app_login'))
 
-    # fetch the account and the current planet
-    try:
-        moon = Moon.objects.select_related('planet','planet__account').get(id=moon_id)
-    except Moon.DoesNotExist:
-        raise OWebDoesNotExist
+    # fetch the account and the current moon
+    moon = _get_moon(moon_id)
 
     # checks, if this account belongs to the authenticated user
     if not req.user.id == moon.planet.account.owner_id:
         raise OWebAccountAccessViolation
 
-    planets = Planet.objects.filter(account_id=moon.planet.account.id)
-
     return render(req, 'oweb/moon_settings.html',
         {
             'account': moon.planet.account,
+            'navigation': Navigation(req),
             'planet': moon.planet,
             'moon': moon,
-            'planets': planets,
         }
     )
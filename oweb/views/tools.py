@@ -7,11 +7,12 @@ from django.http import Http404
 from django.shortcuts import redirect, render
 # app imports
 from oweb.exceptions import OWebDoesNotExist, OWebAccountAccessViolation
+from oweb.context_processors import Navigation
 from oweb.models.planet import Planet
 from oweb.models.building import Supply12
 from oweb.models.research import Research113
-from oweb.libs.production import get_fusion_production
-from oweb.libs.costs import costs_onepointeight_total, costs_two_total
+from oweb.libs.production import get_fusion_production, get_production_table
+from oweb.libs.costs import costs_onepointeight_range, costs_two_range
 from oweb.libs.queue import get_mse
 from oweb.libs.shortcuts import get_list_or_404, get_object_or_404
 
@@ -61,38 +62,32 @@ def tools_energy(req, account_id, energy_level=None, fusion_level=None):
         energy_level = int(energy_level)
         energy_base_cost = Research113.base_cost
 
-    # calculate the costs of the current fusion plant
-    current_fusion_cost = costs_onepointeight_total(fusion_base_cost, fusion_level)
-    current_fusion_cost = get_mse(current_fusion_cost, (account.trade_metal, account.trade_crystal, account.trade_deut))
-
-    # calculate the costs of the current energy technology
-    current_energy_cost = costs_two_total(energy_base_cost, energy_level)
-    current_energy_cost = get_mse(current_energy_cost, (account.trade_metal, account.trade_crystal, account.trade_deut))
+    trade = (account.trade_metal, account.trade_crystal, account.trade_deut)
 
     # calculate the production of the fusion plant
-    this_prod = int(get_fusion_production(fusion_level, energy=energy_level)[3])
+    this_prod = int(get_production_table(get_fusion_production, energy=energy_level)[fusion_level][3])
 
     fusion_matrix = []
     for i in range(0, 5):
         f = fusion_level + i
 
         # calculate the costs of this fusion plant
-        f_cost = costs_onepointeight_total(fusion_base_cost, f)
-        f_cost = get_mse(f_cost, (account.trade_metal, account.trade_crystal, account.trade_deut)) - current_fusion_cost
+        f_cost = costs_onepointeight_range(fusion_base_cost, fusion_level + 1, f)
+        f_cost = get_mse(f_cost, trade)
 
         et_range = []
         for j in range(0, 5):
             et = energy_level + j
 
             # calculate the costs of this energy tech
-            et_cost = costs_two_total(energy_base_cost, et)
-            et_cost = (get_mse(et_cost, (account.trade_metal, account.trade_crystal, account.trade_deut)) - current_energy_cost) / len(planet_ids)
+            et_cost = costs_two_range(energy_base_cost, energy_level + 1, et)
+            et_cost = get_mse(et_cost, trade) / len(planet_ids)
 
             # total costs of this combination
             next_cost = f_cost + et_cost
 
             # calculate the production of this combination
-            next_prod = int(get_fusion_production(f, energy=et)[3])
+            next_prod = int(get_production_table(get_fusion_production, energy=et)[f][3])
             next_prod_gain = int(next_prod - this_prod)
 
             # calculate the "score" of this combination
@@ -115,7 +110,7 @@ def tools_energy(req, account_id, energy_level=None, fusion_level=None):
     return render(req, 'oweb/tools_energy.html',
         {
             'account': account,
-            'planets': planets,
+            'navigation': Navigation(req),
             'fusion_matrix': fusion_matrix,
             'energy_level': energy_level,
             'fusion_level': fusion_level,
@@ -4,14 +4,28 @@ from datetime import datetime
 import hashlib
 # Django imports
 from django.core.urlresolvers import reverse
+from django.db import transaction
 from django.http import Http404, HttpResponseRedirect
 from django.shortcuts import redirect, render
 # app imports
 from oweb.exceptions import OWebDoesNotExist, OWebAccountAccessViolation, OWebParameterMissingException, OWebIllegalParameterException
 from oweb.models import Account, Building, Defense, Planet, Research, Ship, Moon
+from oweb.libs.cache import bump_version
+from oweb.libs.importer import iter_entries, get_import_updates
 from oweb.libs.shortcuts import get_object_or_404
 
 
+ITEM_TYPES = {
+    'research': Research,
+    'ship': Ship,
+    'building': Building,
+    'moon_building': Building,
+    'defense': Defense,
+    'moon_defense': Defense,
+}
+"""Maps the item types of the forms to the base classes"""
+
+
 def item_update(req):
     """Generic function to update items
 
@@ -65,6 +79,160 @@ def item_update(req):
     return HttpResponseRedirect(req.META['HTTP_REFERER'])
 
 
+def _get_owners(model, ids):
+    """Returns the owners of many items of one base class
+
+    :param model: The base class
+    :type model: class
+    :param ids: The IDs of the items
+    :type ids: list
+    :returns: dict -- Maps the IDs to ``(owner_id, scope, scope_id)``
+
+    ``scope`` and ``scope_id`` determine the state version, that has to be
+    bumped after an update (see :py:mod:`oweb.libs.cache`). The owners are
+    fetched with one query.
+    """
+    if model in (Research, Ship):
+        return dict((pk, (owner_id, 'account', account_id))
+                    for pk, owner_id, account_id in model.objects.filter(pk__in=ids).values_list(
+                        'pk', 'account__owner_id', 'account_id'))
+
+    return dict((pk, (planet_owner_id or moon_owner_id, 'planet', astro_object_id))
+                for pk, astro_object_id, planet_owner_id, moon_owner_id in model.objects.filter(pk__in=ids).values_list(
+                    'pk', 'astro_object_id',
+                    'astro_object__planet__account__owner_id',
+                    'astro_object__moon__planet__account__owner_id'))
+
+
+def apply_item_updates(user, updates):
+    """Updates many items at once
+
+    :param user: The authenticated user
+    :type user: User object
+    :param updates: ``(item_type, item_id, value)`` tuples
+    :type updates: list
+    :returns: int -- The number of updated items
+
+    The ownership of the items is checked with one query per base class. The
+    items are grouped by their new value and updated with one query per
+    group in a single transaction. Negative values are skipped, like in
+    :py:func:`item_update`.
+
+    The updates do not call ``save()``, so the state versions of the
+    affected planets and accounts are bumped here.
+    """
+    # group the items by their base class
+    by_model = {}
+    for item_type, item_id, value in updates:
+        try:
+            model = ITEM_TYPES[item_type]
+            item_id = int(item_id)
+            value = int(value)
+        except (KeyError, ValueError):
+            raise OWebIllegalParameterException
+        if value < 0:
+            continue
+        by_model.setdefault(model, {})[item_id] = value
+
+    # check, if the objects' accounts are actually owned by the current user
+    owners = {}
+    for model, values in by_model.items():
+        owners[model] = _get_owners(model, values.keys())
+        if len(owners[model]) != len(values):
+            raise OWebDoesNotExist
+        for owner_id, scope, scope_id in owners[model].values():
+            if not user.id == owner_id:
+                raise OWebAccountAccessViolation
+
+    count = 0
+    with transaction.atomic():
+        for model, values in by_model.items():
+            field = 'count' if model in (Ship, Defense) else 'level'
+            groups = {}
+            for item_id, value in values.items():
+                groups.setdefault(value, []).append(item_id)
+            for value, ids in groups.items():
+                count += model.objects.filter(pk__in=ids).update(**{field: value})
+
+    for model in owners:
+        for scope in set((scope, scope_id) for owner_id, scope, scope_id in owners[model].values()):
+            bump_version(*scope)
+
+    return count
+
+
+def items_update(req):
+    """Updates many items with one request
+
+    The POST data contains the lists ``item_type``, ``item_id`` and
+    ``item_level``; the n-th values of the lists describe one item. See
+    :py:func:`apply_item_updates`.
+    """
+    # this is the non-decorator version of the login_required decorator
+    # basically it checks, if the user is authenticated and redirects him, if
+    # not. The decorator could not handle the reverse url-resolution.
+    if not req.user.is_authenticated():
+        return redirect(reverse('oweb:app_login'))
+
+    item_types = req.POST.getlist('item_type')
+    item_ids = req.POST.getlist('item_id')
+    item_levels = req.POST.getlist('item_level')
+    if not item_types:
+        raise OWebParameterMissingException
+    if not len(item_types) == len(item_ids) == len(item_levels):
+        raise OWebIllegalParameterException
+
+    apply_item_updates(req.user, zip(item_types, item_ids, item_levels))
+
+    return HttpResponseRedirect(req.META['HTTP_REFERER'])
+
+
+def account_import_commit(req, account_id):
+    """Imports text, that is copied from the game
+
+    See :py:mod:`oweb.libs.importer`.
+    """
+    # this is the non-decorator version of the login_required decorator
+    # basically it checks, if the user is authenticated and redirects him, if
+    # not. The decorator could not handle the reverse url-resolution.
+    if not req.user.is_authenticated():
+        return redirect(reverse('oweb:app_login'))
+
+    acc = get_object_or_404(Account, pk=account_id)
+
+    # check, if the objects account is actually owned by the current user
+    if not req.user.id == acc.owner_id:
+        raise OWebAccountAccessViolation
+
+    try:
+        text = req.POST['import_text']
+        body_id = req.POST.get('import_body')
+        columns = req.POST.get('import_columns')
+    except KeyError:
+        raise OWebParameterMissingException
+
+    # the columns of the empire view are planets or moons
+    try:
+        moons = {None: None, '': None, 'planets': False, 'moons': True}[columns]
+    except KeyError:
+        raise OWebIllegalParameterException
+
+    body = None
+    if body_id:
+        try:
+            body = Planet.objects.get(pk=body_id, account=acc)
+        except (Planet.DoesNotExist, ValueError):
+            try:
+                body = Moon.objects.get(pk=body_id, planet__account=acc)
+            except (Moon.DoesNotExist, ValueError):
+                raise OWebIllegalParameterException
+
+    updates = get_import_updates(acc, iter_entries(text.splitlines()), body=body, moons=moons)
+    apply_item_updates(req.user, updates)
+
+    return redirect(reverse('oweb:account_overview', args=[acc.id]))
+
+
 def create_account(req):
     """Creates an :py:class:`Account`"""
     # this is the non-decorator version of the login_required decorator